@@ -1,30 +1,53 @@
 from agency_swarm import Agency, set_openai_key
 from content_manager.content_manager import ContentManager
+from content_manager.fast_path_router import route_agency
 from youtube_analyzer.youtube_analyzer import YouTubeAnalyzer
 from trend_analyzer.trend_analyzer import TrendAnalyzer
+from utils.parallel_dispatch import SendMessageParallel
+from utils.context_budget import manage_context
+from utils.tracing import instrument_agency
+from utils.warmup import start_warmup
+from utils.env import load_env
 import os
-from dotenv import load_dotenv
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Set OpenAI API key
 set_openai_key(os.getenv('OPENAI_API_KEY'))
 
-# Initialize agents
-content_manager = ContentManager()
-youtube_analyzer = YouTubeAnalyzer()
-trend_analyzer = TrendAnalyzer()
+def create_agency(settings_path: str = "./settings.json") -> Agency:
+    """
+    Builds the agency with its agents and communication flows.
+    Each call returns an independent agency (its own conversation threads).
+    """
+    # Initialize agents
+    content_manager = ContentManager()
+    youtube_analyzer = YouTubeAnalyzer()
+    trend_analyzer = TrendAnalyzer()
 
-# Create agency with communication flows
-agency = Agency(
-    [
-        content_manager,  # Content Manager is the entry point
-        [content_manager, youtube_analyzer],  # Only Content Manager can initiate with YouTube Analyzer
-        [content_manager, trend_analyzer],    # Only Content Manager can initiate with Trend Analyzer
-    ],
-    shared_instructions="agency_manifesto.md"
-)
+    # Create agency with communication flows
+    agency = Agency(
+        [
+            content_manager,  # Content Manager is the entry point
+            [content_manager, youtube_analyzer],  # Only Content Manager can initiate with YouTube Analyzer
+            [content_manager, trend_analyzer],    # Only Content Manager can initiate with Trend Analyzer
+        ],
+        shared_instructions="agency_manifesto.md",
+        send_message_tool_class=SendMessageParallel,  # Lets Content Manager fan out independent sub-tasks
+        settings_path=settings_path
+    )
+
+    # Time every tool, agent hop and turn when AGENCY_TRACING=1
+    instrument_agency(agency)
+    # Keep long tool results out of the threads and each run's prompt within CONTEXT_PROMPT_BUDGET
+    manage_context(agency)
+    # Send well-formed requests straight to their tool (FAST_PATH_ROUTER=0 turns this off)
+    route_agency(agency, content_manager.router)
+    # Prefetch the default channel (and COMPETITOR_WATCHLIST) into the API cache while the user types; AGENCY_WARMUP=0 skips it
+    start_warmup()
+    return agency
 
 if __name__ == "__main__":
-    agency.run_demo() 
\ No newline at end of file
+    agency = create_agency()
+    agency.run_demo()
@@ -0,0 +1,340 @@
+"""
+HTTP API that runs the agency's tools directly, without any LLM round trip.
+
+    GET  /healthz        liveness check
+    GET  /tools          the served tools with the JSON schema of their arguments
+    POST /tools/{name}   run a tool; the JSON body holds its arguments
+    GET  /metrics        Prometheus metrics from utils.tracing (AGENCY_TRACING=1)
+
+Only the tools in TOOLS are served: the read-only analytics and search tools
+and ScriptWriter. Other tools (script generation and editing, image
+generation) stay behind the agents.
+
+Arguments are validated against the tool's pydantic fields (422 with the
+errors when they don't fit). Tools run on a thread pool, at most
+API_MAX_CONCURRENCY at a time; up to API_MAX_QUEUE more requests wait for a
+slot and anything beyond that gets 503. A run that takes longer than
+API_TOOL_TIMEOUT seconds answers 504 (the thread finishes in the background).
+
+Identical requests to a read-only tool share one run while it is in
+progress, and successful results are reused for API_RESULT_TTL seconds unless
+the request sends "Cache-Control: no-cache". Tools with side effects
+(SIDE_EFFECT_TOOLS) run on every request. YouTube and Tavily responses are also cached on
+disk when API_CACHE_FILE is set (utils.cache).
+
+Run from the content_creation_agency directory (plain HTTP, so keep it on an
+internal network or behind a proxy):
+
+    python -m api.server --host 127.0.0.1 --port 8080
+    curl -X POST localhost:8080/tools/VideoPerformance -d '{"video_id": "dQw4w9WgXcQ"}'
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+
+from pydantic import ValidationError
+
+from utils import tracing
+from utils.env import load_env
+from utils.tool_registry import is_error_output, load_tool, plain_output, tool_index
+
+load_env()
+
+MAX_CONCURRENCY = int(os.getenv('API_MAX_CONCURRENCY', '8'))
+MAX_QUEUE = int(os.getenv('API_MAX_QUEUE', '64'))
+TOOL_TIMEOUT = float(os.getenv('API_TOOL_TIMEOUT', '120'))
+RESULT_TTL = float(os.getenv('API_RESULT_TTL', '60'))
+
+RESULT_CACHE_SIZE = 1024
+MAX_BODY_BYTES = 1 << 20
+KEEPALIVE_TIMEOUT = 15.0
+
+# Tools the API serves
+TOOLS = ('ChannelAnalytics', 'VideoPerformance', 'CommentSentiment', 'CompetitorAnalysis', 'WebSearchTool', 'ScriptWriter')
+# Served tools that change state (ScriptWriter saves a file): never shared or reused
+SIDE_EFFECT_TOOLS = {'ScriptWriter'}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, details=None, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+        self.headers = headers or {}
+
+
+class ResultCache:
+    """Tool outputs by (tool, canonical arguments) with a TTL, least recently used evicted first"""
+
+    def __init__(self, ttl: float, size: int = RESULT_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, dict]]" = OrderedDict()
+
+    def get(self, key) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, result: dict):
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+
+class ToolServer:
+    """Routes requests to tools; all state is touched from the event loop thread only"""
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, max_queue: int = MAX_QUEUE,
+                 timeout: float = TOOL_TIMEOUT, result_ttl: float = RESULT_TTL):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="api-tool")
+        self.results = ResultCache(result_ttl)
+        self.inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.active = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tools: Optional[list] = None
+
+    # Tool runs
+
+    def _run(self, name: str, tool) -> dict:
+        started = time.perf_counter()
+        with tracing.span(name, 'tool', entry='api'):
+            output = plain_output(str(tool.run()))
+        return {
+            'tool': name,
+            'status': 'error' if is_error_output(output) else 'ok',
+            'output': output,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+
+    async def _execute(self, key, name: str, tool) -> dict:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                try:
+                    result = await asyncio.wait_for(loop.run_in_executor(self.executor, self._run, name, tool), self.timeout)
+                except asyncio.TimeoutError:
+                    raise HttpError(504, f"{name} did not finish within {self.timeout:g} seconds")
+        finally:
+            self.active -= 1
+        if result['status'] == 'ok' and name not in SIDE_EFFECT_TOOLS:
+            self.results.put(key, result)
+        return result
+
+    async def run_tool(self, name: str, body: bytes, use_cache: bool) -> dict:
+        if name not in TOOLS:
+            raise HttpError(404, f"Unknown tool '{name}'")
+        tool_class = load_tool(name)
+        try:
+            args = json.loads(body or b'{}')
+        except ValueError as e:
+            raise HttpError(400, f"Request body is not valid JSON: {e}")
+        if not isinstance(args, dict):
+            raise HttpError(400, "Request body must be a JSON object of tool arguments")
+        try:
+            tool = tool_class(**args)
+        except ValidationError as e:
+            raise HttpError(422, f"Invalid arguments for {name}", json.loads(e.json(include_url=False)))
+
+        # Defaults included, so {} and the explicit defaults share a cache entry
+        key = (name, json.dumps(tool.model_dump(), sort_keys=True, default=str))
+        shared = name not in SIDE_EFFECT_TOOLS
+        if shared and use_cache:
+            cached = self.results.get(key)
+            tracing.record_cache('api.results', cached is not None)
+            if cached is not None:
+                return {**cached, 'cached': True}
+
+        task = self.inflight.get(key) if shared else None
+        if task is None:
+            if self.active >= self.max_concurrency + self.max_queue:
+                raise HttpError(503, "Too many requests in progress", headers={'Retry-After': '1'})
+            # Counted before the task first runs, so a burst within one loop iteration is limited too
+            self.active += 1
+            task = asyncio.ensure_future(self._execute(key, name, tool))
+            if shared:
+                self.inflight[key] = task
+                task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            tracing.incr('api_server_coalesced_total', tool=name)
+        # shield: a client that disconnects must not cancel a run others are waiting for
+        result = await asyncio.shield(task)
+        return {**result, 'cached': False}
+
+    def list_tools(self) -> list:
+        if self._tools is None:
+            tools = []
+            index = tool_index()
+            for name in sorted(TOOLS):
+                entry = index[name]
+                tool_class = load_tool(name)
+                tools.append({
+                    'name': name,
+                    'agent': entry['agent'],
+                    'description': ' '.join((tool_class.__doc__ or '').split()),
+                    'parameters': tool_class.model_json_schema(),
+                })
+            self._tools = tools
+        return self._tools
+
+    # HTTP
+
+    async def route(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, object]:
+        """(status, payload) for a request"""
+        if path == '/healthz':
+            return 200, {'status': 'ok', 'active': self.active}
+        if path == '/metrics':
+            return 200, tracing.prometheus_text()
+        if path == '/tools':
+            if method != 'GET':
+                raise HttpError(405, "Use GET", headers={'Allow': 'GET'})
+            loop = asyncio.get_running_loop()
+            return 200, {'tools': await loop.run_in_executor(self.executor, self.list_tools)}
+        if path.startswith('/tools/'):
+            if method != 'POST':
+                raise HttpError(405, "Use POST with the tool arguments as a JSON body", headers={'Allow': 'POST'})
+            use_cache = 'no-cache' not in headers.get('cache-control', '')
+            return 200, await self.run_tool(path[len('/tools/'):], body, use_cache)
+        raise HttpError(404, f"No route for {path}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one connection (HTTP/1.1 keep-alive)"""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), KEEPALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, ConnectionError):
+                    return
+                except HttpError as e:
+                    writer.write(_response(e.status, {'error': str(e)}, False, e.headers))
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                method, path, headers, body, keep_alive = request
+
+                started = time.perf_counter()
+                extra = {}
+                try:
+                    status, payload = await self.route(method, path, headers, body)
+                except HttpError as e:
+                    status, extra = e.status, e.headers
+                    payload = {'error': str(e)}
+                    if e.details is not None:
+                        payload['details'] = e.details
+                except Exception as e:
+                    status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+                label = _route_label(path)
+                tracing.incr('api_server_requests_total', route=label, status=str(status))
+                tracing.observe('api_server_request_seconds', time.perf_counter() - started, route=label)
+
+                writer.write(_response(status, payload, keep_alive, extra))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _route_label(path: str) -> str:
+    """Metric label of a request path; unknown paths share one label to keep the series bounded"""
+    if path in ('/healthz', '/metrics', '/tools'):
+        return path
+    name = path[len('/tools/'):] if path.startswith('/tools/') else ''
+    return name if name in TOOLS else 'other'
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """(method, path, headers, body, keep_alive), or None when the client closed the connection"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "Request headers too large")
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ', 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', ''):
+        raise HttpError(411, "Send a Content-Length instead of a chunked body")
+    length = int(headers.get('content-length') or 0)
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b''
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+    path = urllib.parse.unquote(urllib.parse.urlsplit(target).path)
+    return method.upper(), path, headers, body, keep_alive
+
+
+def _response(status: int, payload, keep_alive: bool, headers: Optional[Dict[str, str]] = None) -> bytes:
+    if isinstance(payload, str):
+        body, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+    else:
+        body, content_type = json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json'
+    lines = [
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def serve(host: str, port: int, server: ToolServer):
+    # Import the tools up front so the first request does not pay for it
+    await asyncio.get_running_loop().run_in_executor(server.executor, server.list_tools)
+    listener = await asyncio.start_server(server.handle, host, port, limit=64 * 1024)
+    address = listener.sockets[0].getsockname()
+    print(f"Serving {len(TOOLS)} tools on http://{address[0]}:{address[1]}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the agency's tools as JSON endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY, help="Tool runs at the same time")
+    parser.add_argument("--queue", type=int, default=MAX_QUEUE, help="Requests that may wait for a free slot before 503")
+    parser.add_argument("--timeout", type=float, default=TOOL_TIMEOUT, help="Seconds before a tool run answers 504")
+    parser.add_argument("--result-ttl", type=float, default=RESULT_TTL, help="Seconds a tool result is reused (0 disables)")
+    args = parser.parse_args(argv)
+
+    server = ToolServer(args.concurrency, args.queue, args.timeout, args.result_ttl)
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Headless batch runner: runs agency tools directly, without the chat loop or any LLM calls.
+
+Each line of the jobs file is one tool call:
+
+    {"id": "perf-1", "tool": "VideoPerformance", "args": {"video_id": "dQw4w9WgXcQ"}}
+    {"tool": "ChannelAnalytics", "args": {"channel_input": "@example"}, "timeout": 60}
+
+("id" defaults to the line number, "timeout" to --timeout.) Jobs run on a pool
+of worker processes. A job that runs past its timeout has its worker killed and
+replaced. Results are appended to the output JSONL as they complete, or in
+input order with --ordered, and every line is flushed to disk. After a crash
+the same command picks up where it stopped: jobs that already have an "ok"
+result in the output file are skipped.
+
+YouTube and Tavily responses are shared between the workers through the
+SQLite cache of utils.cache, so a channel that appears in many jobs is only
+fetched once.
+
+Run from the content_creation_agency directory:
+
+    python -m batch.run jobs.jsonl --out results.jsonl --workers 8 --timeout 300
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from multiprocessing.connection import wait
+from typing import Dict, List, Optional
+
+DEFAULT_CACHE_FILE = 'cache/api_cache.sqlite'
+
+
+def load_jobs(path: str) -> List[dict]:
+    jobs, seen = [], set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                raise SystemExit(f"{path}:{line_number}: invalid JSON ({e})")
+            if not isinstance(job, dict) or 'tool' not in job:
+                raise SystemExit(f"{path}:{line_number}: a job needs at least a \"tool\"")
+            job['id'] = str(job.get('id', line_number))
+            job.setdefault('args', {})
+            if job['id'] in seen:
+                raise SystemExit(f"{path}:{line_number}: duplicate job id {job['id']!r}")
+            seen.add(job['id'])
+            jobs.append(job)
+    return jobs
+
+
+def completed_ids(path: str) -> set:
+    """Ids of jobs that already finished successfully in an earlier run"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # A line cut short by the crash
+                continue
+            if result.get('status') == 'ok':
+                done.add(str(result.get('id')))
+    return done
+
+
+def run_job(job: dict) -> dict:
+    """Run one tool call in this process and describe the outcome"""
+    from pydantic import ValidationError
+    from utils.tool_registry import is_error_output, load_tool, plain_output
+
+    logs = io.StringIO()
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(logs):
+            tool = load_tool(job['tool'])(**job['args'])
+    except (KeyError, ValidationError, TypeError) as e:
+        tool, status, output = None, 'invalid', str(e)
+    if tool is not None:
+        try:
+            with contextlib.redirect_stdout(logs):
+                output = plain_output(str(tool.run()))
+            status = 'error' if is_error_output(output) else 'ok'
+        except Exception:
+            status, output = 'error', traceback.format_exc()
+    return {
+        'status': status,
+        'output': output,
+        'log': plain_output(logs.getvalue()),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def _worker_main(conn, cache_file: Optional[str], cache_ttl: Optional[float]):
+    """Worker process: run jobs received over the pipe until told to stop"""
+    from utils import cache
+    from utils.env import load_env
+
+    load_env()
+    cache.configure(cache_file, cache_ttl)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        conn.send(run_job(job))
+
+
+def _preload(tool_names: set):
+    """Import the tools before forking so every worker starts with them loaded"""
+    from utils.tool_registry import load_tool
+    for name in tool_names:
+        try:
+            load_tool(name)
+        except Exception:
+            # Reported as the job's result by the worker
+            pass
+
+
+class Worker:
+    """A worker process with a pipe to it and the job it is running"""
+
+    def __init__(self, ctx, cache_file: Optional[str], cache_ttl: Optional[float]):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, cache_file, cache_ttl), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job: Optional[dict] = None
+        self.deadline = 0.0
+
+    def start(self, job: dict, timeout: float):
+        self.job = job
+        self.deadline = time.monotonic() + timeout
+        self.conn.send(job)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ResultWriter:
+    """Appends results to the output file, optionally holding them back to keep input order"""
+
+    def __init__(self, path: str, order: Optional[List[str]] = None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        torn = False
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+        self.file = open(path, 'a', encoding='utf-8')
+        if torn:
+            # Start on a fresh line after one the last run died halfway through writing
+            self.file.write('\n')
+        self.order = order
+        self.next = 0
+        self.held: Dict[str, dict] = {}
+
+    def add(self, result: dict):
+        if self.order is None:
+            self._write(result)
+            return
+        self.held[result['id']] = result
+        while self.next < len(self.order) and self.order[self.next] in self.held:
+            self._write(self.held.pop(self.order[self.next]))
+            self.next += 1
+
+    def _write(self, result: dict):
+        self.file.write(json.dumps(result, ensure_ascii=False) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+def run_batch(jobs: List[dict], out_path: str, workers: int, timeout: float, ordered: bool,
+              cache_file: Optional[str], cache_ttl: Optional[float]) -> Dict[str, int]:
+    """Run the jobs on a pool of worker processes; returns the number of results per status"""
+    done = completed_ids(out_path)
+    pending = [job for job in jobs if job['id'] not in done]
+    if done:
+        print(f"Resuming: {len(jobs) - len(pending)} of {len(jobs)} jobs already completed", file=sys.stderr)
+
+    writer = ResultWriter(out_path, [job['id'] for job in pending] if ordered else None)
+    counts: Dict[str, int] = {}
+    ctx = multiprocessing.get_context()
+    if ctx.get_start_method() == 'fork':
+        _preload({job['tool'] for job in pending})
+    pool = [Worker(ctx, cache_file, cache_ttl) for _ in range(max(1, min(workers, len(pending))))] if pending else []
+    queue = list(reversed(pending))
+    finished = 0
+
+    def record(worker: Worker, outcome: dict):
+        nonlocal finished
+        job = worker.job
+        worker.job = None
+        result = {'id': job['id'], 'tool': job['tool'], 'args': job['args'], **outcome}
+        writer.add(result)
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        finished += 1
+        print(f"[{finished}/{len(pending)}] {result['status']:<7} {job['tool']} {job['id']} "
+              f"({result.get('seconds', 0):.1f}s)", file=sys.stderr)
+
+    try:
+        while queue or any(w.job for w in pool):
+            for worker in pool:
+                if worker.job is None and queue:
+                    job = queue.pop()
+                    worker.start(job, float(job.get('timeout', timeout)))
+
+            busy = [w for w in pool if w.job]
+            next_deadline = min(w.deadline for w in busy)
+            ready = wait([w.conn for w in busy], timeout=max(0.0, next_deadline - time.monotonic()))
+
+            for i, worker in enumerate(pool):
+                if worker.job is None:
+                    continue
+                if worker.conn in ready:
+                    try:
+                        outcome = worker.conn.recv()
+                    except EOFError:
+                        # The worker died (e.g. out of memory); replace it
+                        outcome = {'status': 'crashed', 'output': f"Worker exited with code {worker.process.exitcode}"}
+                        record(worker, outcome)
+                        worker.kill()
+                        pool[i] = Worker(ctx, cache_file, cache_ttl)
+                        continue
+                    record(worker, outcome)
+                elif time.monotonic() >= worker.deadline:
+                    seconds = float(worker.job.get('timeout', timeout))
+                    record(worker, {'status': 'timeout', 'output': f"No result after {seconds:g} seconds", 'seconds': seconds})
+                    worker.kill()
+                    pool[i] = Worker(ctx, cache_file, cache_ttl)
+    finally:
+        for worker in pool:
+            if worker.job is None:
+                worker.stop()
+            else:
+                worker.kill()
+        writer.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run agency tools in bulk from a JSONL file of jobs")
+    parser.add_argument("jobs", help="JSONL file with one {\"tool\", \"args\", \"id\"?, \"timeout\"?} object per line")
+    parser.add_argument("--out", default=None, help="Results JSONL (default: <jobs>.results.jsonl); appended to and resumed from")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Worker processes")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds per job before its worker is killed")
+    parser.add_argument("--ordered", action="store_true", help="Write results in input order instead of as they complete")
+    parser.add_argument("--cache", default=os.getenv('API_CACHE_FILE', DEFAULT_CACHE_FILE),
+                        help="SQLite file of YouTube/Tavily responses shared by the workers")
+    parser.add_argument("--cache-ttl", type=float, default=None, help="Seconds a cached response stays valid (default: API_CACHE_TTL or 6 hours)")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the APIs")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.jobs)
+    out_path = args.out or f"{os.path.splitext(args.jobs)[0]}.results.jsonl"
+    cache_file = None if args.no_cache else args.cache
+
+    started = time.perf_counter()
+    counts = run_batch(jobs, out_path, args.workers, args.timeout, args.ordered, cache_file, args.cache_ttl)
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "nothing to do"
+    print(f"Finished {sum(counts.values())} jobs in {time.perf_counter() - started:.1f}s: {summary}. Results: {out_path}",
+          file=sys.stderr)
+    return 0 if set(counts) <= {'ok'} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
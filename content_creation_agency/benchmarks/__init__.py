@@ -0,0 +1 @@
+"""Offline benchmarks for the agency's tools. See benchmarks/run.py."""
@@ -0,0 +1,65 @@
+"""
+Benchmark cases for the API-backed tools.
+
+Every case builds its tool with fixed arguments so that the requests it makes
+always map to the same recorded fixtures. A case with a "size" entry runs once
+per value, passing the value as that tool argument.
+"""
+
+# Inputs are fixed on purpose: changing them invalidates the recorded fixtures
+CHANNEL_ID = "UCbmCqH_WOUviDUsV83qloZQ"
+COMPETITOR_ID = "UCWN3xxRkmTPmbKwht9FuE5A"
+VIDEO_ID = "aircAruvnKk"
+
+CASES = [
+    {
+        "name": "ChannelAnalytics.statistics",
+        "module": "youtube_analyzer.tools.ChannelAnalytics",
+        "tool": "ChannelAnalytics",
+        "args": {"channel_input": CHANNEL_ID, "metric_type": "statistics"},
+    },
+    {
+        "name": "ChannelAnalytics.videos",
+        "module": "youtube_analyzer.tools.ChannelAnalytics",
+        "tool": "ChannelAnalytics",
+        "args": {"channel_input": CHANNEL_ID, "metric_type": "videos"},
+    },
+    {
+        "name": "CommentSentiment",
+        "module": "youtube_analyzer.tools.CommentSentiment",
+        "tool": "CommentSentiment",
+        "args": {"video_id": VIDEO_ID},
+        "size": ("max_comments", [100, 500, 2000]),
+    },
+    {
+        "name": "ChannelSentiment",
+        "module": "youtube_analyzer.tools.ChannelSentiment",
+        "tool": "ChannelSentiment",
+        "args": {"channel_input": CHANNEL_ID, "comments_per_video": 100},
+        "size": ("video_count", [5, 20]),
+    },
+    {
+        "name": "VideoPerformance",
+        "module": "youtube_analyzer.tools.VideoPerformance",
+        "tool": "VideoPerformance",
+        "args": {"video_id": VIDEO_ID},
+    },
+    {
+        "name": "CompetitorAnalysis",
+        "module": "youtube_analyzer.tools.CompetitorAnalysis",
+        "tool": "CompetitorAnalysis",
+        "args": {"channel_id": COMPETITOR_ID},
+    },
+    {
+        "name": "WebSearchTool",
+        "module": "trend_analyzer.tools.WebSearchTool",
+        "tool": "WebSearchTool",
+        "args": {"query": "latest developments in artificial intelligence"},
+    },
+    {
+        "name": "OpenAIContentGenerator",
+        "module": "content_manager.tools.OpenAIContentGenerator",
+        "tool": "OpenAIContentGenerator",
+        "args": {"prompt": "Generate 5 video ideas about AI trends"},
+    },
+]
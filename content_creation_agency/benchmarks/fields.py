@@ -0,0 +1,132 @@
+"""
+Checks that every YouTube call site has a fields= projection.
+
+Run from the content_creation_agency directory:
+
+    python -m benchmarks.fields            # static check, no API calls
+    python -m benchmarks.fields --audit    # also run the YouTube cases with YOUTUBE_FIELDS=audit (needs API keys)
+
+The static check parses every tool module and finds each
+youtube.<resource>().<method>(...).execute() call, keyed the way
+utils.youtube_api keys requests at runtime: (module, enclosing function,
+method id). It exits with status 1 when a call site has no entry in
+utils.youtube_fields.PROJECTIONS, or when an entry no longer matches any call
+site (the function was renamed or the call removed).
+
+With --audit it then runs the YouTube benchmark cases against the live API in
+audit mode and also exits with status 1 when a call site read a response field
+its projection does not include, or made a request with no projection at all.
+"""
+import argparse
+import ast
+import atexit
+import importlib
+import os
+import sys
+from typing import List, Set, Tuple
+
+from benchmarks.cases import CASES
+from utils import youtube_fields
+from utils.tool_registry import tool_index
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+
+
+def _method_id(call: ast.Call):
+    """'youtube.<resource>.<method>' for a youtube.<resource>().<method>(...).execute() call"""
+    func = call.func
+    if not (isinstance(func, ast.Attribute) and func.attr == "execute" and isinstance(func.value, ast.Call)):
+        return None
+    method = func.value.func
+    if not (isinstance(method, ast.Attribute) and isinstance(method.value, ast.Call)):
+        return None
+    resource = method.value.func
+    if not isinstance(resource, ast.Attribute):
+        return None
+    return f"youtube.{resource.attr}.{method.attr}"
+
+
+def _function_name(node) -> str:
+    return "<lambda>" if isinstance(node, ast.Lambda) else node.name
+
+
+def call_sites(path: str) -> List[Tuple[str, str, str, int]]:
+    """(module, function, method id, line) for every YouTube request executed in a file"""
+    module = os.path.splitext(os.path.basename(path))[0]
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    sites = []
+
+    def visit(node, function):
+        if isinstance(node, ast.Call):
+            method_id = _method_id(node)
+            if method_id:
+                sites.append((module, function, method_id, node.lineno))
+        for child in ast.iter_child_nodes(node):
+            visit(child, _function_name(child) if isinstance(child, FUNCTION_NODES) else function)
+
+    visit(tree, "<module>")
+    return sites
+
+
+def static_check() -> List[str]:
+    """Problems found by comparing the call sites in the code with PROJECTIONS"""
+    problems = []
+    found: Set[Tuple[str, str, str]] = set()
+    for entry in tool_index().values():
+        for module, function, method_id, line in call_sites(entry["path"]):
+            key = (module, function, method_id)
+            found.add(key)
+            if key not in youtube_fields.PROJECTIONS:
+                problems.append(f"{os.path.relpath(entry['path'])}:{line} {module}.{function} {method_id}: "
+                                f"no entry in PROJECTIONS")
+    for module, function, method_id in sorted(set(youtube_fields.PROJECTIONS) - found):
+        problems.append(f"PROJECTIONS entry {module}.{function} {method_id}: no matching call site")
+    return problems
+
+
+def audit_check(selected=None) -> List[str]:
+    """Run the YouTube benchmark cases in audit mode and return the call sites whose projection falls short"""
+    youtube_fields.set_mode("audit")
+    for case in CASES:
+        if not case["module"].startswith("youtube_analyzer.") or (selected and case["name"] not in selected):
+            continue
+        tool_class = getattr(importlib.import_module(case["module"]), case["tool"])
+        print(f"Auditing {case['name']}...")
+        tool_class(**case["args"]).run()
+
+    lines = youtube_fields.audit_report()
+    # Printed here instead of at exit, ahead of the verdict
+    atexit.unregister(youtube_fields.print_audit)
+    print("\n".join(lines))
+    problems = []
+    for line in lines:
+        if not line.startswith(" "):
+            site = line.split(":", 1)[0]
+        elif "MISSING" in line or "declared: none" in line:
+            problems.append(f"{site}: {line.strip()}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the YouTube fields= projections against the code")
+    parser.add_argument("--audit", action="store_true", help="Also run the YouTube cases live in audit mode")
+    parser.add_argument("--case", action="append", help="Only audit the named case (repeatable)")
+    args = parser.parse_args(argv)
+
+    problems = static_check()
+    if args.audit:
+        problems += audit_check(args.case)
+
+    if problems:
+        print("\nProjection problems:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print(f"\nAll {len(youtube_fields.PROJECTIONS)} YouTube call sites have a projection")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Offline benchmark suite for the API-backed tools.
+
+Run from the content_creation_agency directory:
+
+    python -m benchmarks.run --record              # capture fixtures from the live APIs (needs API keys)
+    python -m benchmarks.run                       # replay the fixtures and measure every case
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+For every case and input size the suite reports wall time (median and best of
+--repeat runs), API calls per run, peak traced memory and the number of memory
+blocks still allocated after the run. With --compare it exits with status 1
+when a case got slower, makes more API calls or uses more memory than the
+baseline allows.
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.cases import CASES
+from utils import replay
+
+DEFAULT_FIXTURES_DIR = os.path.join("benchmarks", "fixtures")
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "latest.json")
+
+
+def _expand_cases(selected=None):
+    """Yield (case id, case, tool arguments) for every case and input size"""
+    for case in CASES:
+        if selected and case["name"] not in selected:
+            continue
+        if "size" in case:
+            field, sizes = case["size"]
+            for size in sizes:
+                yield f"{case['name']}[{field}={size}]", case, dict(case["args"], **{field: size})
+        else:
+            yield case["name"], case, dict(case["args"])
+
+
+def _run_tool(tool_class, args):
+    return tool_class(**args).run()
+
+
+def _measure(tool_class, args, repeat: int) -> dict:
+    """Time, count API calls and trace memory for one case"""
+    # Warm-up run so that imports and lazy clients do not count
+    replay.reset_counts()
+    _run_tool(tool_class, args)
+    if replay.miss_counts():
+        return {"status": "missing fixtures", "missing": replay.miss_counts()}
+
+    timings = []
+    for _ in range(repeat):
+        replay.reset_counts()
+        gc.collect()
+        start = time.perf_counter()
+        _run_tool(tool_class, args)
+        timings.append(time.perf_counter() - start)
+    api_calls = replay.call_counts()
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    _run_tool(tool_class, args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    blocks_after = sys.getallocatedblocks()
+
+    return {
+        "status": "ok",
+        "wall_median_ms": statistics.median(timings) * 1000,
+        "wall_best_ms": min(timings) * 1000,
+        "api_calls": api_calls,
+        "api_calls_total": sum(api_calls.values()),
+        "peak_kib": peak / 1024,
+        "retained_blocks": blocks_after - blocks_before,
+    }
+
+
+def _compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return a description of every regression against the baseline"""
+    regressions = []
+    for case_id, result in results.items():
+        base = baseline.get(case_id)
+        if not base or result.get("status") != "ok" or base.get("status") != "ok":
+            continue
+        if result["wall_median_ms"] > base["wall_median_ms"] * (1 + tolerance):
+            regressions.append(f"{case_id}: wall time {base['wall_median_ms']:.1f}ms -> {result['wall_median_ms']:.1f}ms")
+        if result["api_calls_total"] > base["api_calls_total"]:
+            regressions.append(f"{case_id}: API calls {base['api_calls_total']} -> {result['api_calls_total']}")
+        if result["peak_kib"] > base["peak_kib"] * (1 + tolerance):
+            regressions.append(f"{case_id}: peak memory {base['peak_kib']:.0f}KiB -> {result['peak_kib']:.0f}KiB")
+    return regressions
+
+
+def _print_table(results: dict):
+    print(f"{'case':<45} {'median ms':>10} {'best ms':>10} {'API calls':>10} {'peak KiB':>10} {'blocks':>8}")
+    print("-" * 98)
+    for case_id, r in results.items():
+        if r["status"] != "ok":
+            print(f"{case_id:<45} {r['status']}")
+            continue
+        print(f"{case_id:<45} {r['wall_median_ms']:>10.1f} {r['wall_best_ms']:>10.1f} "
+              f"{r['api_calls_total']:>10} {r['peak_kib']:>10.0f} {r['retained_blocks']:>8}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the agency tools")
+    parser.add_argument("--record", action="store_true", help="Call the live APIs and record fixtures instead of measuring")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="Fixture directory")
+    parser.add_argument("--case", action="append", help="Only run the named case (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown / memory growth")
+    args = parser.parse_args(argv)
+
+    replay.set_mode("record" if args.record else "replay", args.fixtures)
+    if not args.record:
+        # Clients are built on first use and refuse to start without a key
+        for key in ("OPENAI_API_KEY", "TAVILY_API_KEY", "YOUTUBE_API_KEY"):
+            os.environ.setdefault(key, "replay")
+
+    results = {}
+    for case_id, case, tool_args in _expand_cases(args.case):
+        tool_class = getattr(importlib.import_module(case["module"]), case["tool"])
+        if args.record:
+            replay.reset_counts()
+            _run_tool(tool_class, tool_args)
+            print(f"Recorded {case_id}: {replay.call_counts()}")
+            continue
+        results[case_id] = _measure(tool_class, tool_args, args.repeat)
+
+    if args.record:
+        return 0
+
+    _print_table(results)
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"created": datetime.now().isoformat(), "results": results}, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = _compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Cold-start report for the agency.
+
+Imports agency.py and every tool module in a fresh interpreter running with
+-X importtime, then reports the total import time, the slowest top-level
+imports and whether any heavy client library was loaded eagerly.
+
+Run from the content_creation_agency directory:
+
+    python -m benchmarks.startup                       # report only
+    python -m benchmarks.startup --budget-ms 2500      # exit 1 if cold start is over budget
+
+The command also exits with status 1 if a library listed in --lazy (by
+default googleapiclient, textblob, nltk and tavily) is imported at startup
+instead of when a tool first runs.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from utils.tool_registry import AGENCY_ROOT, tool_index
+
+LAZY_MODULES = ("googleapiclient", "textblob", "nltk", "tavily")
+
+
+def _startup_code(lazy_modules) -> str:
+    modules = ["agency"] + [entry["module"] for entry in tool_index().values()]
+    lines = [f"import {module}" for module in modules]
+    lines.append("import json, sys")
+    lines.append(f"print(json.dumps(sorted(m for m in {list(lazy_modules)!r} if m in sys.modules)))")
+    return "\n".join(lines)
+
+
+def parse_importtime(stderr: str):
+    """Return (top-level imports, all imports) as lists of (name, self_us, cumulative_us)"""
+    top_level, everything = [], []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        entry = (name.strip(), int(self_us), int(cumulative_us))
+        everything.append(entry)
+        # Nested imports are indented below the module that triggered them
+        if not name[1:].startswith(" "):
+            top_level.append(entry)
+    return top_level, everything
+
+
+def measure(lazy_modules=LAZY_MODULES) -> dict:
+    env = dict(os.environ)
+    # Clients must not need real keys just to be imported
+    for key in ("OPENAI_API_KEY", "TAVILY_API_KEY", "YOUTUBE_API_KEY"):
+        env.setdefault(key, "startup-check")
+    env["AGENCY_TRACING"] = "0"
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _startup_code(lazy_modules)],
+        cwd=AGENCY_ROOT, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup import failed:\n{result.stderr[-2000:]}")
+
+    top_level, everything = parse_importtime(result.stderr)
+    return {
+        "wall_ms": wall_ms,
+        "import_ms": sum(cumulative for _, _, cumulative in top_level) / 1000,
+        "top_level": sorted(top_level, key=lambda e: e[2], reverse=True),
+        "self_time": sorted(everything, key=lambda e: e[1], reverse=True),
+        "eager_heavy_modules": json.loads(result.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import report for the agency")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the total import time exceeds this many milliseconds")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    parser.add_argument("--lazy", default=",".join(LAZY_MODULES), help="Comma-separated modules that must not load at startup")
+    args = parser.parse_args(argv)
+
+    lazy_modules = tuple(m for m in args.lazy.split(",") if m)
+    report = measure(lazy_modules)
+
+    print(f"Cold start: {report['import_ms']:.0f} ms importing, {report['wall_ms']:.0f} ms wall (interpreter included)")
+    print(f"\nSlowest top-level imports (cumulative):")
+    for name, _, cumulative in report["top_level"][:args.top]:
+        print(f"  {cumulative / 1000:>9.1f} ms  {name}")
+    print(f"\nSlowest modules (self time):")
+    for name, self_us, _ in report["self_time"][:args.top]:
+        print(f"  {self_us / 1000:>9.1f} ms  {name}")
+
+    failed = False
+    if report["eager_heavy_modules"]:
+        print(f"\nLoaded at startup but should be lazy: {', '.join(report['eager_heavy_modules'])}")
+        failed = True
+    if args.budget_ms is not None:
+        if report["import_ms"] > args.budget_ms:
+            print(f"\nOver budget: {report['import_ms']:.0f} ms > {args.budget_ms:.0f} ms")
+            failed = True
+        else:
+            print(f"\nWithin budget: {report['import_ms']:.0f} ms <= {args.budget_ms:.0f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
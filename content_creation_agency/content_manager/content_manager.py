@@ -1,5 +1,10 @@
+import time
+
 from agency_swarm import Agent
 
+from content_manager.fast_path_router import FastPathRouter
+from utils.context_budget import FetchStoredResult
+
 class ContentManager(Agent):
     def __init__(self):
         super().__init__(
@@ -7,16 +12,24 @@ class ContentManager(Agent):
             description="Manages content strategy and coordinates between analytics and trend research",
             instructions="./instructions.md",
             tools_folder="./tools",
+            tools=[FetchStoredResult],  # Reads long tool results that were shortened in the thread
             temperature=0.5  # Lower temperature for more consistent responses
-        ) 
+        )
+        # Answers well-formed requests (a channel, a video, a keyword list) without the LLM
+        self.router = FastPathRouter()
     
     def handle_request(self, user_input: str) -> str:
         """
         Handle user requests and coordinate with other agents
         """
         try:
+            routed = self.router.try_handle(user_input)
+            if routed is not None:
+                return routed[1]
             # Use the built-in chat method to process requests
+            started = time.perf_counter()
             response = self.chat(user_input)
+            self.router.record_llm_turn(time.perf_counter() - started)
             return response
         except Exception as e:
             return f"Error processing request: {str(e)}"
@@ -0,0 +1,292 @@
+"""
+Deterministic fast path in front of the Content Manager's LLM.
+
+Requests that name exactly one video or channel (URL, video ID, channel ID or
+@handle) or a short keyword list, with nothing else in them but a few intent
+words, are run straight on the matching tool:
+
+    stats for https://youtube.com/@foo         -> ChannelAnalytics
+    analyze video dQw4w9WgXcQ                  -> VideoPerformance
+    how do viewers feel about youtu.be/<id>    -> CommentSentiment
+    trends for: llm agents, rag, fine-tuning   -> KeywordExtractor
+
+Everything else, and every fast-path run whose tool reports an error, goes to
+the LLM as before. A routed request and its answer are added to the agency's
+main thread (the answer compacted by utils.context_budget like any tool
+output), so the next LLM turn still sees them. Hit rates and the latency
+saved (average LLM turn time, measured from the fallbacks, minus the
+fast-path time) are kept in FastPathRouter.stats and exported through
+utils.tracing. FAST_PATH_ROUTER=0 turns the router off.
+"""
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from openai.types.beta.threads import Message, Text, TextContentBlock, TextDelta
+
+from utils import context_budget, tracing
+from utils.tool_registry import is_error_output, load_tool, plain_output
+
+ENABLED = os.getenv('FAST_PATH_ROUTER', '1').lower() not in ('0', 'false', 'no')
+
+# Assumed LLM turn time until a fallback has been measured, in seconds
+LLM_LATENCY_ESTIMATE = float(os.getenv('FAST_PATH_LLM_ESTIMATE_SECONDS', '8'))
+
+# Longest message the router considers; longer ones are never "trivially structured"
+MAX_MESSAGE_CHARS = 200
+
+_URL_PREFIX = r'(?:https?://)?(?:www\.|m\.)?'
+VIDEO_URL = re.compile(_URL_PREFIX + r'(?:youtube\.com/(?:watch\?(?:\S*?&)?v=|shorts/|embed/|live/)|youtu\.be/)([\w-]{11})(?![\w-])\S*')
+CHANNEL_URL = re.compile(_URL_PREFIX + r'youtube\.com/(?:channel/(UC[\w-]{22})|(@[\w.-]+)|c/([\w.-]+)|user/([\w.-]+))\S*')
+CHANNEL_ID = re.compile(r'(?<![\w/-])(UC[\w-]{22})(?![\w-])')
+HANDLE = re.compile(r'(?<![\w/@.])(@[\w.-]{3,30})')
+# A bare video ID candidate: 11 URL-safe characters (see _looks_like_video_id)
+BARE_VIDEO_ID = re.compile(r'(?<![\w/-])([\w-]{11})(?![\w-])')
+KEYWORD_LIST = re.compile(r'^(?:trends?|keywords?|trend analysis)\s+(?:for|on|about|of)\s*:?\s*(.+)$|^(?:trends?|keywords?)\s*:\s*(.+)$', re.I)
+
+SENTIMENT_WORDS = {'sentiment', 'comments', 'comment', 'audience', 'viewers', 'feel', 'feels', 'mood', 'reactions'}
+COMPETITOR_WORDS = {'competitor', 'competitors', 'competition'}
+KEYWORD_WORDS = {'keywords', 'keyword', 'tags', 'titles'}
+
+# Words allowed around the entity; any other word sends the request to the LLM
+FILLER_WORDS = {
+    'analyze', 'analyse', 'analysis', 'stats', 'statistics', 'metrics', 'analytics', 'performance', 'report',
+    'overview', 'numbers', 'insights', 'for', 'of', 'on', 'the', 'a', 'an', 'this', 'that', 'my', 'our', 'me', 'show',
+    'get', 'give', 'check', 'please', 'pls', 'channel', 'video', 'how', 'is', 'are', 'do', 'does', 'doing',
+    'what', 'about', 'youtube', 'yt', 'run', 'pull', 'fetch', 'performing', 'perform', 'best', 'top',
+} | SENTIMENT_WORDS | COMPETITOR_WORDS | KEYWORD_WORDS
+
+_WORD = re.compile(r"[a-z]+")
+
+
+class Route(NamedTuple):
+    rule: str
+    tool: str
+    args: Dict[str, Any]
+
+
+def _looks_like_video_id(token: str) -> bool:
+    """Has a digit, - or _, or mixed case inside the token (so "dQw4w9WgXcQ" but not "Performance")"""
+    return (any(c.isdigit() or c in '-_' for c in token)
+            or (any(c.isupper() for c in token[1:]) and any(c.islower() for c in token)))
+
+
+def _only_intent_words(text: str) -> bool:
+    return set(_WORD.findall(text.lower())) <= FILLER_WORDS
+
+
+def _match_keywords(text: str) -> Optional[Route]:
+    keywords = KEYWORD_LIST.match(text)
+    if not keywords:
+        return None
+    items = [k.strip() for k in re.split(r'[,;]', keywords.group(1) or keywords.group(2)) if k.strip()]
+    if not items or len(items) > 10 or any(len(k.split()) > 4 for k in items):
+        return None
+    if len(items) == 1:
+        return Route('keyword', 'TrendAnalyzer', {'keyword': items[0]})
+    return Route('keyword_list', 'KeywordExtractor', {'keywords': ', '.join(items)})
+
+
+def match(message: str) -> Optional[Route]:
+    """The tool call for a well-formed request, or None if the LLM should handle it"""
+    text = message.strip()
+    if not text or len(text) > MAX_MESSAGE_CHARS or '\n' in text:
+        return None
+
+    words = set(_WORD.findall(text.lower()))
+    videos = set(VIDEO_URL.findall(text))
+    rest = VIDEO_URL.sub(' ', text)
+    if not videos and 'video' in words:
+        videos = {v for v in BARE_VIDEO_ID.findall(rest) if _looks_like_video_id(v)}
+        rest = BARE_VIDEO_ID.sub(lambda m: ' ' if m.group(1) in videos else m.group(0), rest)
+
+    channels = set()
+    for groups in CHANNEL_URL.findall(rest):
+        channels.add(next(g for g in groups if g))
+    rest = CHANNEL_URL.sub(' ', rest)
+    channels.update(CHANNEL_ID.findall(rest))
+    rest = CHANNEL_ID.sub(' ', rest)
+    channels.update(HANDLE.findall(rest))
+    rest = HANDLE.sub(' ', rest)
+
+    if not videos and not channels:
+        return _match_keywords(text)
+    # Exactly one entity and nothing but intent words around it
+    if len(videos) + len(channels) != 1 or re.search(r'https?://|www\.', rest) or not _only_intent_words(rest):
+        return None
+
+    if videos:
+        video_id = videos.pop()
+        if words & SENTIMENT_WORDS:
+            return Route('video_sentiment', 'CommentSentiment', {'video_id': video_id})
+        return Route('video', 'VideoPerformance', {'video_id': video_id})
+
+    channel = channels.pop()
+    if words & SENTIMENT_WORDS:
+        return Route('channel_sentiment', 'ChannelSentiment', {'channel_input': channel})
+    if words & COMPETITOR_WORDS:
+        # CompetitorAnalysis only takes channel IDs
+        if not channel.startswith('UC'):
+            return None
+        return Route('competitor', 'CompetitorAnalysis', {'channel_id': channel})
+    if words & KEYWORD_WORDS:
+        return Route('channel_keywords', 'KeywordPerformance', {'channels': [channel]})
+    return Route('channel', 'ChannelAnalytics', {'channel_input': channel})
+
+
+class FastPathRouter:
+    """Runs matching requests on their tool directly and keeps hit-rate and latency statistics"""
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stats = {
+            'routed': 0, 'no_match': 0, 'tool_error': 0, 'fast_seconds': 0.0,
+            'llm_turns': 0, 'llm_seconds': 0.0, 'rules': {},
+        }
+
+    def try_handle(self, message: str) -> Optional[Tuple[str, str]]:
+        """(tool name, tool output) for a fast-path request, or None to use the LLM"""
+        if not self.enabled:
+            return None
+        route = match(message)
+        if route is None:
+            self._count('no_match')
+            return None
+
+        started = time.perf_counter()
+        try:
+            with tracing.span(route.tool, 'fast_path', rule=route.rule):
+                output = str(load_tool(route.tool)(**route.args).run())
+        except Exception as e:
+            output = f"Error: {e}"
+        elapsed = time.perf_counter() - started
+
+        if is_error_output(plain_output(output)):
+            # e.g. a handle the search could not resolve; the LLM may still make sense of it
+            self._count('tool_error', route.rule)
+            return None
+
+        with self._lock:
+            self.stats['routed'] += 1
+            self.stats['fast_seconds'] += elapsed
+            self.stats['rules'][route.rule] = self.stats['rules'].get(route.rule, 0) + 1
+        tracing.incr('fast_path_requests_total', result='routed', rule=route.rule)
+        tracing.observe('fast_path_seconds', elapsed, rule=route.rule)
+        tracing.set_gauge('fast_path_latency_saved_seconds', self.latency_saved())
+        return route.tool, output
+
+    def record_llm_turn(self, seconds: float):
+        """Time of a request that went to the LLM, used to estimate the latency saved"""
+        with self._lock:
+            self.stats['llm_turns'] += 1
+            self.stats['llm_seconds'] += seconds
+
+    def _count(self, result: str, rule: str = 'none'):
+        with self._lock:
+            self.stats[result] += 1
+        tracing.incr('fast_path_requests_total', result=result, rule=rule)
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            total = self.stats['routed'] + self.stats['no_match'] + self.stats['tool_error']
+            return self.stats['routed'] / total if total else 0.0
+
+    def latency_saved(self) -> float:
+        """Seconds saved so far: routed requests x average LLM turn time - time spent on the fast path"""
+        with self._lock:
+            stats = dict(self.stats)
+        llm_average = stats['llm_seconds'] / stats['llm_turns'] if stats['llm_turns'] else LLM_LATENCY_ESTIMATE
+        return max(0.0, stats['routed'] * llm_average - stats['fast_seconds'])
+
+    def report(self) -> str:
+        with self._lock:
+            stats = dict(self.stats, rules=dict(self.stats['rules']))
+        total = stats['routed'] + stats['no_match'] + stats['tool_error']
+        fast_average = stats['fast_seconds'] / stats['routed'] if stats['routed'] else 0.0
+        llm_average = stats['llm_seconds'] / stats['llm_turns'] if stats['llm_turns'] else None
+        lines = [
+            f"Fast path: {stats['routed']} of {total} requests routed ({self.hit_rate():.0%}), "
+            f"{stats['no_match']} without a match, {stats['tool_error']} sent on to the LLM after a tool error",
+            f"Average time: fast path {fast_average:.2f}s, LLM "
+            + (f"{llm_average:.2f}s" if llm_average is not None else f"~{LLM_LATENCY_ESTIMATE:g}s (estimate)"),
+            f"Latency saved: {self.latency_saved():.1f}s",
+        ]
+        if stats['rules']:
+            lines.append("By rule: " + ", ".join(f"{rule} {count}" for rule, count in sorted(stats['rules'].items())))
+        return "\n".join(lines)
+
+
+def _stream_answer(event_handler, thread, output: str):
+    """Deliver a fast-path answer through the event handler's callbacks, as one text delta"""
+    text = Text(value=output, annotations=[])
+    # The full answer, not the compacted copy that went into the thread
+    message = Message.model_construct(role="assistant", content=[TextContentBlock(type="text", text=text)])
+    event_handler.set_agent(thread.agent if thread else None)
+    event_handler.set_recipient_agent(thread.recipient_agent if thread else None)
+    handler = event_handler()
+    handler.on_message_created(message)
+    handler.on_text_created(text)
+    handler.on_text_delta(TextDelta(value=output, annotations=[]), text)
+    handler.on_text_done(text)
+    handler.on_message_done(message)
+    event_handler.on_all_streams_end()
+
+
+def route_agency(agency, router: FastPathRouter):
+    """
+    Answer fast-path requests sent to agency.get_completion / get_completion_stream without the LLM.
+    Generator completions, file attachments and explicit recipients always use the LLM.
+    """
+    if not router.enabled:
+        return agency
+    get_completion = agency.get_completion
+    get_completion_stream = agency.get_completion_stream
+
+    def routable(message_files, recipient_agent, kwargs) -> bool:
+        return not message_files and recipient_agent is None and not kwargs.get('attachments')
+
+    def timed(complete, *args, **kwargs):
+        started = time.perf_counter()
+        result = complete(*args, **kwargs)
+        router.record_llm_turn(time.perf_counter() - started)
+        return result
+
+    def record(message: str, tool: str, output: str):
+        """Add the routed exchange to the main thread, compacted like any other tool output"""
+        try:
+            thread = agency.main_thread
+            thread.init_thread()
+            thread.create_message(message=message, role="user")
+            thread.create_message(message=context_budget.compact(tool, plain_output(output)), role="assistant")
+        except Exception:
+            # The answer is still returned; only the next LLM turn misses this exchange
+            tracing.incr('fast_path_thread_errors_total')
+
+    def routed_completion(message, message_files=None, yield_messages=False, recipient_agent=None, **kwargs):
+        if yield_messages:
+            return get_completion(message, message_files, yield_messages, recipient_agent, **kwargs)
+        if routable(message_files, recipient_agent, kwargs):
+            routed = router.try_handle(message)
+            if routed is not None:
+                tool, output = routed
+                record(message, tool, output)
+                return output
+        return timed(get_completion, message, message_files, yield_messages, recipient_agent, **kwargs)
+
+    def routed_completion_stream(message, event_handler, message_files=None, recipient_agent=None, **kwargs):
+        if routable(message_files, recipient_agent, kwargs):
+            routed = router.try_handle(message)
+            if routed is not None:
+                tool, output = routed
+                record(message, tool, output)
+                # Nothing streams on the fast path; the handler gets the whole answer as one delta
+                _stream_answer(event_handler, agency.main_thread, output)
+                return output
+        return timed(get_completion_stream, message, event_handler, message_files, recipient_agent, **kwargs)
+
+    agency.get_completion = routed_completion
+    agency.get_completion_stream = routed_completion_stream
+    return agency
@@ -1,12 +1,6 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from utils import llm
 
 class OpenAIContentGenerator(BaseTool):
     """
@@ -21,15 +15,15 @@ class OpenAIContentGenerator(BaseTool):
         Generates content ideas using OpenAI's API
         """
         try:
-            response = client.chat.completions.create(
-                model="gpt-4-0125-preview",
-                messages=[
+            request = {
+                "model": "gpt-4-0125-preview",
+                "messages": [
                     {"role": "system", "content": "You are a creative content strategist specialized in AI content."},
                     {"role": "user", "content": self.prompt}
                 ],
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+                "temperature": 0.7
+            }
+            return llm.chat(request, purpose="content")
         except Exception as e:
             return f"Error generating content: {str(e)}"
 
@@ -1,6 +1,7 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
+from utils import tracing
 
 class ScriptEditor(BaseTool):
     """
@@ -17,18 +18,19 @@ class ScriptEditor(BaseTool):
             if not os.path.exists(self.filename):
                 return f"Error: File {self.filename} not found"
             
-            # Read existing content
-            with open(self.filename, "r", encoding="utf-8") as f:
-                content = f.read()
-            
-            # Create backup
-            backup_file = f"{self.filename}.bak"
-            with open(backup_file, "w", encoding="utf-8") as f:
-                f.write(content)
-            
-            # Write new content
-            with open(self.filename, "w", encoding="utf-8") as f:
-                f.write(f"{content}\n\n## Edits\n{self.edits}")
+            with tracing.span("script.edit", "disk", edit_chars=len(self.edits)):
+                # Read existing content
+                with open(self.filename, "r", encoding="utf-8") as f:
+                    content = f.read()
+                
+                # Create backup
+                backup_file = f"{self.filename}.bak"
+                with open(backup_file, "w", encoding="utf-8") as f:
+                    f.write(content)
+                
+                # Write new content
+                with open(self.filename, "w", encoding="utf-8") as f:
+                    f.write(f"{content}\n\n## Edits\n{self.edits}")
             
             return f"Script edited successfully. Backup saved as {backup_file}"
         except Exception as e:
@@ -0,0 +1,221 @@
+from agency_swarm.tools import BaseTool
+from pydantic import Field
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+import json
+import os
+import re
+import time
+from utils import llm, tracing
+from utils.script_store import ScriptDraft
+
+# Model for the outline, the sections and the transitions
+SCRIPT_MODEL = os.getenv('SCRIPT_MODEL', 'gpt-4-0125-preview')
+# Sections written at the same time
+SECTION_WORKERS = int(os.getenv('SCRIPT_SECTION_WORKERS', '6'))
+# Spoken words per minute of video
+WORDS_PER_MINUTE = 150
+
+SYSTEM_PROMPT = "You are a scriptwriter for an AI and technology YouTube channel. You write spoken, engaging, accurate scripts."
+
+class ScriptPipeline(BaseTool):
+    """
+    Writes a long video script in sections: an outline first, then every
+    section at the same time (each with the whole outline as shared context),
+    then short transitions that stitch them together. Finished sections are
+    saved to the script file as soon as they are ready. Use it for scripts
+    longer than a few minutes; ScriptWriter saves a script you already have.
+    """
+    title: str = Field(..., description="Title of the video")
+    brief: str = Field(
+        ..., description="What the video should cover: audience, angle, key points, research findings and data to use"
+    )
+    duration_minutes: int = Field(
+        default=15, ge=2, le=60, description="Target length of the video in minutes"
+    )
+    sections: Optional[int] = Field(
+        default=None, ge=2, le=20,
+        description="Number of sections including intro and outro (defaults to about one per 2.5 minutes)"
+    )
+    style: str = Field(
+        default="conversational and energetic, with concrete examples",
+        description="Tone and style of the narration"
+    )
+
+    def _complete(self, prompt: str, max_tokens: int, json_mode: bool = False) -> str:
+        request = {
+            "model": SCRIPT_MODEL,
+            "messages": [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+            "temperature": 0.7,
+            "max_tokens": max_tokens,
+        }
+        if json_mode:
+            request["response_format"] = {"type": "json_object"}
+        return llm.chat(request, purpose="script")
+
+    def _section_count(self) -> int:
+        return self.sections or min(20, max(3, round(self.duration_minutes / 2.5)))
+
+    def _outline(self) -> Dict:
+        """Sections with heading, goal, key points and minutes; a plain intro/body/outro split if the reply is unusable"""
+        count = self._section_count()
+        prompt = (
+            f"Plan a {self.duration_minutes}-minute video titled \"{self.title}\".\n"
+            f"Brief: {self.brief}\nStyle: {self.style}\n\n"
+            f"Return JSON: {{\"through_line\": one sentence tying the video together, \"sections\": a list of exactly {count} "
+            f"objects with \"heading\", \"goal\", \"key_points\" (list of strings) and \"minutes\" (number)}}. "
+            f"The first section is the hook and intro, the last the recap and call to action, and the minutes add up to "
+            f"{self.duration_minutes}. Each key point belongs to exactly one section."
+        )
+        try:
+            outline = json.loads(self._complete(prompt, max_tokens=1500, json_mode=True))
+            sections = [s for s in outline.get("sections", []) if isinstance(s, dict) and s.get("heading")]
+            if len(sections) >= 2:
+                for s in sections:
+                    s.setdefault("goal", "")
+                    s["key_points"] = [str(p) for p in s.get("key_points") or []]
+                    s["minutes"] = float(s.get("minutes") or self.duration_minutes / len(sections))
+                return {"through_line": str(outline.get("through_line", "")), "sections": sections}
+        except (ValueError, TypeError, AttributeError):
+            pass
+        minutes = self.duration_minutes / count
+        headings = ["Intro"] + [f"Part {i}" for i in range(1, count - 1)] + ["Recap and Next Steps"]
+        return {
+            "through_line": self.brief,
+            "sections": [{"heading": h, "goal": "", "key_points": [], "minutes": minutes} for h in headings],
+        }
+
+    def _write_section(self, outline: Dict, index: int) -> str:
+        sections = outline["sections"]
+        section = sections[index]
+        plan = "\n".join(
+            f"{i + 1}. {s['heading']}: {s['goal']}" + (" <- this section" if i == index else "")
+            for i, s in enumerate(sections)
+        )
+        words = int(section["minutes"] * WORDS_PER_MINUTE)
+        position = "the opening" if index == 0 else "the closing" if index == len(sections) - 1 else "a middle"
+        prompt = (
+            f"Video: \"{self.title}\" ({self.duration_minutes} minutes). Through-line: {outline['through_line']}\n"
+            f"Brief: {self.brief}\nStyle: {self.style}\n\nFull outline:\n{plan}\n\n"
+            f"Write only section {index + 1}, \"{section['heading']}\", {position} section, as spoken narration of about "
+            f"{words} words. Goal: {section['goal']}\nKey points: {'; '.join(section['key_points']) or 'as the outline suggests'}\n"
+            f"Other sections are written separately: do not cover their points, do not greet the viewer unless this is the "
+            f"opening, do not sign off unless this is the closing, and do not repeat the heading. You may add [B-ROLL: ...] cues."
+        )
+        with tracing.span("script.section", "tool", index=index, words=words):
+            return self._complete(prompt, max_tokens=int(words * 2) + 200)
+
+    def _transitions(self, headings: List[str], bodies: List[str]) -> List[str]:
+        """One bridging sentence per section boundary, in a single short call"""
+        boundaries = [
+            f"{i + 1}. From \"{headings[i]}\" ending: ...{bodies[i][-300:]}\n   To \"{headings[i + 1]}\" starting: {bodies[i + 1][:300]}..."
+            for i in range(len(bodies) - 1)
+        ]
+        prompt = (
+            "These script sections were written separately. For each boundary write one short spoken sentence that "
+            "carries the viewer from one section to the next without repeating either.\n\n"
+            + "\n".join(boundaries)
+            + f"\n\nReturn JSON: {{\"transitions\": a list of exactly {len(boundaries)} strings}}"
+        )
+        try:
+            transitions = json.loads(self._complete(prompt, max_tokens=60 * len(boundaries) + 100, json_mode=True))["transitions"]
+            if isinstance(transitions, list) and len(transitions) == len(boundaries):
+                return [str(t).strip() for t in transitions]
+        except Exception as e:
+            print(f"Error writing transitions: {str(e)}")
+        return [""] * len(boundaries)
+
+    def _clean(self, heading: str, body: str) -> str:
+        """Drop headings or a repeated title the model put at the top of a section (the pipeline adds its own)"""
+        plain = lambda line: re.sub(r'[#*\s:]', '', line).lower()
+        lines = body.strip().splitlines()
+        while lines and (not lines[0].strip() or lines[0].lstrip().startswith('#')
+                         or plain(lines[0]) in (plain(heading), plain(self.title))):
+            lines.pop(0)
+        return "\n".join(lines).strip()
+
+    def run(self):
+        """
+        Outline, sections in parallel, then stitching; returns where the script was saved
+        """
+        try:
+            started = time.perf_counter()
+            outline = self._outline()
+            outline_seconds = time.perf_counter() - started
+
+            headings = [s["heading"] for s in outline["sections"]]
+            draft = ScriptDraft(self.title, headings)
+            bodies: List[Optional[str]] = [None] * len(headings)
+            section_seconds = []
+
+            sections_started = time.perf_counter()
+            failed: Dict[int, Exception] = {}
+            with ThreadPoolExecutor(max_workers=max(1, min(SECTION_WORKERS, len(headings))), thread_name_prefix="script-section") as executor:
+                futures = {executor.submit(self._timed_section, outline, i): i for i in range(len(headings))}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        body, seconds = future.result()
+                    except Exception as e:
+                        # One failed section doesn't stop the others; it is retried below
+                        failed[i] = e
+                        continue
+                    bodies[i] = self._clean(headings[i], body)
+                    section_seconds.append(seconds)
+                    # Readable in the script file while the other sections are still being written
+                    draft.write_section(i, bodies[i])
+            sections_wall = time.perf_counter() - sections_started
+
+            # One more try for each failed section, one after another
+            retried = sorted(failed)
+            for i in retried:
+                try:
+                    body, seconds = self._timed_section(outline, i)
+                except Exception as e:
+                    failed[i] = e
+                    draft.write_section(i, f"_(could not be written: {str(e)})_")
+                    continue
+                del failed[i]
+                bodies[i] = self._clean(headings[i], body)
+                section_seconds.append(seconds)
+                draft.write_section(i, bodies[i])
+            if failed:
+                sections = "; ".join(f"{i + 1}. {headings[i]} ({str(e)})" for i, e in sorted(failed.items()))
+                return (
+                    f"Error writing script: {len(failed)} of {len(headings)} sections failed twice: {sections}. "
+                    f"The other sections are saved in the draft at {draft.path}"
+                )
+
+            transitions = self._transitions(headings, bodies)
+            parts = [f"# {self.title}"]
+            for i, (heading, body) in enumerate(zip(headings, bodies)):
+                text = body
+                if i < len(transitions) and transitions[i]:
+                    text = f"{body}\n\n{transitions[i]}"
+                parts.append(f"## {heading}\n\n{text}")
+            path = draft.finish("\n\n".join(parts) + "\n")
+
+            words = sum(len(b.split()) for b in bodies)
+            return "\n".join([
+                f"Script saved successfully to {path}",
+                f"Sections: {len(headings)} ({', '.join(headings)})",
+                f"Length: {words} words, about {words / WORDS_PER_MINUTE:.1f} minutes of narration",
+                f"Time: outline {outline_seconds:.1f}s, sections {sections_wall:.1f}s in parallel "
+                f"(longest {max(section_seconds):.1f}s, {sum(section_seconds):.1f}s if written one after another), "
+                f"total {time.perf_counter() - started:.1f}s",
+            ] + ([f"Retried sections: {', '.join(str(i + 1) for i in retried)} (failed once, written on the second try)"] if retried else []))
+        except Exception as e:
+            return f"Error writing script: {str(e)}"
+
+    def _timed_section(self, outline: Dict, index: int):
+        started = time.perf_counter()
+        body = self._write_section(outline, index)
+        return body, time.perf_counter() - started
+
+if __name__ == "__main__":
+    tool = ScriptPipeline(
+        title="How AI Agents Actually Work",
+        brief="For developers new to agents: what an agent loop is, tool calling, memory, and where agents fail today.",
+        duration_minutes=12
+    )
+    print(tool.run())
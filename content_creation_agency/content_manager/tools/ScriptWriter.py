@@ -1,7 +1,6 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
-import os
-from datetime import datetime
+from utils.script_store import save_script
 
 class ScriptWriter(BaseTool):
     """
@@ -15,17 +14,7 @@ class ScriptWriter(BaseTool):
         Writes the script to a markdown file in the scripts folder
         """
         try:
-            # Create scripts directory if it doesn't exist
-            os.makedirs("scripts", exist_ok=True)
-            
-            # Create filename from title and timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"scripts/{timestamp}_{self.title.lower().replace(' ', '_')}.md"
-            
-            # Write content to file
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(f"# {self.title}\n\n{self.content}")
-            
+            filename = save_script(self.title, self.content)
             return f"Script saved successfully to {filename}"
         except Exception as e:
             return f"Error saving script: {str(e)}"
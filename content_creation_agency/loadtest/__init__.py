@@ -0,0 +1 @@
+"""Load testing against a local stub backend. See loadtest/run.py."""
@@ -0,0 +1,189 @@
+"""
+Headless load generator for the agency.
+
+Starts the local stub backend (loadtest/stub_server.py), points the OpenAI,
+YouTube and Tavily clients at it, builds one agency per simulated user with
+create_agency() from agency.py and runs the conversations concurrently.
+
+Run from the content_creation_agency directory:
+
+    python -m loadtest.run --users 1,5,10,25 --turns 3
+    python -m loadtest.run --users 20 --llm-latency-ms 800 --script my_script.json
+
+For every concurrency level it reports throughput, p50/p95/p99 turn latency,
+errors and the time spent in each agent (split into tool time and the rest,
+which is model latency plus orchestration).
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from loadtest.stub_server import DEFAULT_SCRIPT, start_stub_server
+
+
+def _point_clients_at(base_url: str):
+    """Route every external client to the stub; real keys in .env are never used"""
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+    os.environ["OPENAI_API_KEY"] = "stub"
+    # Discovery paths already start with youtube/v3/
+    os.environ["YOUTUBE_API_ENDPOINT"] = f"{base_url}/"
+    os.environ["YOUTUBE_API_KEY"] = "stub"
+    os.environ["YOUTUBE_API_KEYS"] = "stub"
+    os.environ["TAVILY_API_BASE_URL"] = f"{base_url}/tavily"
+    os.environ["TAVILY_API_KEY"] = "stub"
+    os.environ["DEFAULT_CHANNEL_ID"] = "UCstubchannel0000000000001"
+    os.environ["API_REPLAY_MODE"] = "off"
+    # Measure the full LLM path, not the deterministic shortcut
+    os.environ["FAST_PATH_ROUTER"] = "0"
+    os.environ["AGENCY_WARMUP"] = "0"
+    # The stub has no rate limits to protect, so only limit if asked to
+    os.environ.setdefault("API_RATE_LIMITS", "")
+    # The per-agent breakdown is computed from the tracing spans
+    os.environ["AGENCY_TRACING"] = "1"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Rank ceil(pct/100 * n); pct * n first, so whole-number percentiles have no float error (7 * 100 / 100, not 0.07 * 100)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return ordered[index]
+
+
+def _conversation(agency, messages: List[str]) -> List[dict]:
+    turns = []
+    for message in messages:
+        start = time.perf_counter()
+        try:
+            agency.get_completion(message)
+            error = None
+        except Exception as e:
+            error = str(e)
+        turns.append({"latency": time.perf_counter() - start, "error": error})
+    return turns
+
+
+def agent_breakdown(spans: List[dict], entry_agent: str) -> Dict[str, dict]:
+    """
+    Seconds spent per agent. Sub-agent time comes from the dispatch spans of
+    SendMessageParallel; the entry agent owns the whole turn. Tool time is
+    taken from the tool spans, and the remainder is model latency plus
+    orchestration (including time the entry agent waits for sub-agents).
+    """
+    breakdown: Dict[str, dict] = {}
+
+    def entry(agent):
+        return breakdown.setdefault(agent, {"calls": 0, "total": 0.0, "tools": 0.0})
+
+    for event in spans:
+        seconds = event["dur"] / 1e6
+        if event["cat"] == "turn":
+            entry(entry_agent)["calls"] += 1
+            entry(entry_agent)["total"] += seconds
+        elif event["cat"] == "agent":
+            entry(event["name"])["calls"] += 1
+            entry(event["name"])["total"] += seconds
+        elif event["cat"] == "tool":
+            entry(event["args"].get("agent", "unknown"))["tools"] += seconds
+    for stats in breakdown.values():
+        stats["other"] = max(0.0, stats["total"] - stats["tools"])
+    return breakdown
+
+
+def run_level(create_agency, tracing, users: int, turns: int, messages: List[str], settings_path: str) -> dict:
+    """Run one concurrency level and return its statistics"""
+    agencies = [create_agency(settings_path=settings_path) for _ in range(users)]
+    conversation = [messages[i % len(messages)] for i in range(turns)]
+
+    tracing.reset()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        results = list(executor.map(lambda agency: _conversation(agency, conversation), agencies))
+    elapsed = time.perf_counter() - start
+
+    latencies = [t["latency"] for turns_ in results for t in turns_ if not t["error"]]
+    errors = [t["error"] for turns_ in results for t in turns_ if t["error"]]
+    entry_agent = agencies[0].ceo.name
+    return {
+        "users": users,
+        "turns": len(latencies) + len(errors),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "elapsed_s": elapsed,
+        "throughput_turns_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "agents": agent_breakdown(tracing.spans(), entry_agent),
+    }
+
+
+def print_report(levels: List[dict]):
+    print(f"\n{'users':>6} {'turns':>6} {'errors':>6} {'turns/s':>9} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}")
+    print("-" * 58)
+    for level in levels:
+        print(f"{level['users']:>6} {level['turns']:>6} {level['errors']:>6} {level['throughput_turns_per_s']:>9.2f} "
+              f"{level['p50_s']:>8.2f} {level['p95_s']:>8.2f} {level['p99_s']:>8.2f}")
+        if level["first_error"]:
+            print(f"       first error: {level['first_error'][:200]}")
+
+    for level in levels:
+        print(f"\nTime per agent with {level['users']} concurrent user(s):")
+        print(f"  {'agent':<20} {'calls':>6} {'total s':>9} {'tools s':>9} {'other s':>9}")
+        for agent, stats in sorted(level["agents"].items()):
+            print(f"  {agent:<20} {stats['calls']:>6} {stats['total']:>9.2f} {stats['tools']:>9.2f} {stats['other']:>9.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the agency against a local stub backend")
+    parser.add_argument("--users", default="1,5,10", help="Comma-separated concurrency levels to run")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per simulated conversation")
+    parser.add_argument("--message", action="append", help="User message(s) to send, cycled per turn")
+    parser.add_argument("--script", help="JSON file with the stub's per-agent script (see stub_server.DEFAULT_SCRIPT)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Simulated latency of each model step")
+    parser.add_argument("--api-latency-ms", type=float, default=50, help="Simulated latency of each YouTube/Tavily call")
+    parser.add_argument("--output", help="Write the full report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+
+    server = start_stub_server(script, args.llm_latency_ms / 1000, args.api_latency_ms / 1000)
+    _point_clients_at(server.base_url)
+
+    # Imported only now so that the clients pick up the stub configuration
+    from agency import create_agency
+    from utils import tracing
+
+    messages = args.message or ["Compare my channel with current AI trends"]
+    levels = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Separate settings file so the real assistant ids are never overwritten
+        settings_path = os.path.join(tmp, "settings.json")
+        create_agency(settings_path=settings_path)
+        for users in [int(u) for u in args.users.split(",") if u.strip()]:
+            print(f"Running {users} concurrent conversation(s) x {args.turns} turn(s)...")
+            levels.append(run_level(create_agency, tracing, users, args.turns, messages, settings_path))
+
+    server.shutdown()
+    print_report(levels)
+    print(f"\nStub served {server.state.requests} requests")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(levels, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
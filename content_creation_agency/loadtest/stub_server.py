@@ -0,0 +1,396 @@
+"""
+Local stand-in for the OpenAI Assistants API, the YouTube Data API and Tavily.
+
+The OpenAI part implements the subset of the Assistants v2 API that
+agency-swarm uses (assistants, threads, messages, runs, tool outputs) plus
+chat completions. Instead of calling a model, every run follows a script: a
+list of steps per agent name, where a step either requests tool calls or
+replies with a message. Each run starts at the first step and moves to the
+next one whenever tool outputs are submitted.
+
+YouTube and Tavily endpoints return small synthetic payloads shaped like the
+real ones. Every endpoint can add an artificial delay to model network and
+model latency.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from typing import Dict, List
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+
+# What each agent does for every user message
+DEFAULT_SCRIPT = {
+    "Content Manager": [
+        {"tool_calls": [{
+            "name": "SendMessage",
+            "arguments": {
+                "recipient": "YouTube Analyzer",
+                "my_primary_instructions": "1. Get channel analytics 2. Get AI trends 3. Combine both",
+                "message": "Analyze the recent videos of channel UCstubchannel0000000000001",
+                "parallel_tasks": [
+                    {"recipient": "Trend Analyzer", "message": "Find the current AI trends"}
+                ]
+            }
+        }]},
+        {"message": "Here is how your channel compares with the current AI trends."}
+    ],
+    "YouTube Analyzer": [
+        {"tool_calls": [{
+            "name": "ChannelAnalytics",
+            "arguments": {"channel_input": "UCstubchannel0000000000001", "metric_type": "videos"}
+        }]},
+        {"message": "The channel published 5 videos recently with steady engagement."}
+    ],
+    "Trend Analyzer": [
+        {"tool_calls": [{
+            "name": "WebSearchTool",
+            "arguments": {"query": "current AI trends"}
+        }]},
+        {"message": "Agents and small open models are trending."}
+    ],
+}
+
+
+class StubState:
+    """In-memory store of assistants, threads, messages and runs"""
+
+    def __init__(self, script: Dict[str, List[dict]], llm_latency: float, api_latency: float, comments_per_video: int):
+        self.script = script
+        self.llm_latency = llm_latency
+        self.api_latency = api_latency
+        self.comments_per_video = comments_per_video
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.assistants: Dict[str, dict] = {}
+        self.threads: Dict[str, dict] = {}
+        self.messages: Dict[str, List[dict]] = {}
+        self.runs: Dict[str, dict] = {}
+        self.requests = 0
+
+    def new_id(self, prefix: str) -> str:
+        with self.lock:
+            return f"{prefix}_stub{next(self.ids):08d}"
+
+
+def _stub_comment(i: int, published: str, reply: bool = False) -> dict:
+    text = f"I disagree with point {i}, this is wrong." if reply and i % 2 else f"Great video number {i}, really helpful!"
+    return {"textDisplay": text, "authorDisplayName": f"user{i % 50}", "publishedAt": published, "likeCount": i % 7}
+
+
+def _stub_reply_count(thread_id: str) -> int:
+    """Every 5th thread has a long reply chain, every 3rd a single reply"""
+    try:
+        i = int(thread_id.replace("thread", ""))
+    except ValueError:
+        return 0
+    return 12 if i % 5 == 0 else (1 if i % 3 == 0 else 0)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "AgencyStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    # HTTP plumbing
+
+    def _send(self, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        # Makes the OpenAI client poll runs quickly
+        self.send_header("openai-poll-after-ms", "20")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _not_found(self, what: str):
+        self._send(404, {"error": {"message": f"No {what} found", "type": "invalid_request_error", "code": None}})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        with self.state.lock:
+            self.state.requests += 1
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        body = self._body() if method in ("POST", "DELETE") else {}
+        path = parts.path
+        try:
+            if path.startswith("/youtube/v3/"):
+                return self._youtube(path[len("/youtube/v3/"):], query)
+            if path.startswith("/tavily/"):
+                return self._tavily(body)
+            if path.startswith("/v1/"):
+                return self._openai(method, path[len("/v1"):], query, body)
+            self._not_found("route")
+        except Exception as e:
+            self._send(500, {"error": {"message": f"Stub error: {e}", "type": "server_error", "code": None}})
+
+    # OpenAI
+
+    def _openai(self, method: str, path: str, query: dict, body: dict):
+        state = self.state
+        if path == "/chat/completions":
+            time.sleep(state.llm_latency)
+            return self._send(200, {
+                "id": state.new_id("chatcmpl"), "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "1. Stub idea one\n2. Stub idea two"}}],
+                "usage": {"prompt_tokens": 50, "completion_tokens": 20, "total_tokens": 70},
+            })
+
+        if path == "/assistants" and method == "POST":
+            assistant = dict(body, id=state.new_id("asst"), object="assistant", created_at=int(time.time()))
+            assistant.setdefault("tool_resources", {})
+            assistant.setdefault("metadata", {})
+            state.assistants[assistant["id"]] = assistant
+            return self._send(200, assistant)
+
+        match = re.fullmatch(r"/assistants/([\w-]+)", path)
+        if match:
+            assistant = state.assistants.get(match.group(1))
+            if assistant is None:
+                return self._not_found("assistant")
+            if method == "POST":
+                assistant.update(body)
+            return self._send(200, assistant)
+
+        if path == "/threads" and method == "POST":
+            thread = {"id": state.new_id("thread"), "object": "thread", "created_at": int(time.time()),
+                      "metadata": {}, "tool_resources": {}}
+            state.threads[thread["id"]] = thread
+            state.messages[thread["id"]] = []
+            return self._send(200, thread)
+
+        match = re.fullmatch(r"/threads/([\w-]+)", path)
+        if match:
+            thread = state.threads.get(match.group(1))
+            return self._send(200, thread) if thread else self._not_found("thread")
+
+        match = re.fullmatch(r"/threads/([\w-]+)/messages", path)
+        if match:
+            thread_id = match.group(1)
+            if thread_id not in state.messages:
+                return self._not_found("thread")
+            if method == "POST":
+                content = body.get("content", "")
+                text = content if isinstance(content, str) else json.dumps(content)
+                return self._send(200, self._add_message(thread_id, body.get("role", "user"), text))
+            return self._send(200, self._list_messages(thread_id, query))
+
+        match = re.fullmatch(r"/threads/([\w-]+)/runs", path)
+        if match and method == "POST":
+            thread_id = match.group(1)
+            assistant = state.assistants.get(body.get("assistant_id"))
+            if thread_id not in state.threads or assistant is None:
+                return self._not_found("thread or assistant")
+            run = {
+                "id": state.new_id("run"), "object": "thread.run", "created_at": int(time.time()),
+                "thread_id": thread_id, "assistant_id": assistant["id"], "status": "queued",
+                "model": assistant.get("model", "stub"), "instructions": "", "tools": [], "metadata": {},
+                "required_action": None, "last_error": None, "incomplete_details": None, "usage": None,
+                "parallel_tool_calls": True, "tool_choice": "auto", "response_format": "auto",
+                "truncation_strategy": {"type": "auto", "last_messages": None},
+                "max_prompt_tokens": None, "max_completion_tokens": None,
+                "_agent": assistant.get("name"), "_step": 0,
+            }
+            state.runs[run["id"]] = run
+            self._advance(run)
+            return self._send(200, self._public_run(run))
+
+        match = re.fullmatch(r"/threads/([\w-]+)/runs/([\w-]+)(/submit_tool_outputs|/cancel)?", path)
+        if match:
+            run = state.runs.get(match.group(2))
+            if run is None:
+                return self._not_found("run")
+            action = match.group(3)
+            if action == "/submit_tool_outputs":
+                run["_step"] += 1
+                self._advance(run)
+            elif action == "/cancel":
+                run["status"] = "cancelled"
+            return self._send(200, self._public_run(run))
+
+        self._not_found("route")
+
+    def _advance(self, run: dict):
+        """Simulate model latency, then move the run to the state of its current script step"""
+        time.sleep(self.state.llm_latency)
+        steps = self.state.script.get(run["_agent"], [])
+        step = steps[run["_step"]] if run["_step"] < len(steps) else {"message": "Done."}
+        if "tool_calls" in step:
+            run["status"] = "requires_action"
+            run["required_action"] = {
+                "type": "submit_tool_outputs",
+                "submit_tool_outputs": {"tool_calls": [
+                    {"id": self.state.new_id("call"), "type": "function",
+                     "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}}
+                    for call in step["tool_calls"]
+                ]},
+            }
+        else:
+            run["status"] = "completed"
+            run["required_action"] = None
+            run["usage"] = {"prompt_tokens": 500, "completion_tokens": 50, "total_tokens": 550}
+            self._add_message(run["thread_id"], "assistant", step["message"], run)
+
+    def _public_run(self, run: dict) -> dict:
+        return {k: v for k, v in run.items() if not k.startswith("_")}
+
+    def _add_message(self, thread_id: str, role: str, text: str, run: dict = None) -> dict:
+        message = {
+            "id": self.state.new_id("msg"), "object": "thread.message", "created_at": int(time.time()),
+            "thread_id": thread_id, "role": role, "status": "completed", "attachments": [], "metadata": {},
+            "assistant_id": run["assistant_id"] if run else None, "run_id": run["id"] if run else None,
+            "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+        }
+        with self.state.lock:
+            self.state.messages[thread_id].append(message)
+        return message
+
+    def _list_messages(self, thread_id: str, query: dict) -> dict:
+        with self.state.lock:
+            messages = list(self.state.messages[thread_id])
+        if query.get("order", "desc") == "desc":
+            messages.reverse()
+        if query.get("after"):
+            ids = [m["id"] for m in messages]
+            messages = messages[ids.index(query["after"]) + 1:] if query["after"] in ids else []
+        limit = int(query.get("limit", 20))
+        page = messages[:limit]
+        return {"object": "list", "data": page, "has_more": len(messages) > limit,
+                "first_id": page[0]["id"] if page else None, "last_id": page[-1]["id"] if page else None}
+
+    # YouTube
+
+    def _youtube(self, resource: str, query: dict):
+        time.sleep(self.state.api_latency)
+        published = "2024-01-15T12:00:00Z"
+        if resource == "channels":
+            channel_id = query.get("id", "UCstubchannel0000000000001").split(",")[0]
+            return self._send(200, {"items": [{
+                "id": channel_id,
+                "snippet": {"title": "Stub Channel", "description": "A synthetic channel", "publishedAt": published},
+                "statistics": {"subscriberCount": "12000", "viewCount": "1500000", "videoCount": "120"},
+                "contentDetails": {"relatedPlaylists": {"uploads": "UU" + channel_id[2:]}},
+                "brandingSettings": {"channel": {}},
+            }]})
+        if resource == "search":
+            return self._send(200, {"items": [{"snippet": {"channelId": "UCstubchannel0000000000001"}}]})
+        if resource == "playlistItems":
+            count = int(query.get("maxResults", 5))
+            return self._send(200, {"items": [{
+                "snippet": {"title": f"Stub video {i}", "description": "Synthetic video", "publishedAt": published},
+                "contentDetails": {"videoId": f"stubvid{i:04d}"},
+            } for i in range(count)]})
+        if resource == "videos":
+            return self._send(200, {"items": [{
+                "id": video_id,
+                "snippet": {"title": f"Video {video_id}", "channelTitle": "Stub Channel", "description": "Synthetic",
+                            "publishedAt": published, "tags": ["ai", "stub"]},
+                "statistics": {"viewCount": "10000", "likeCount": "500", "commentCount": "40"},
+                "contentDetails": {"duration": "PT10M5S"},
+            } for video_id in query.get("id", "").split(",") if video_id]})
+        if resource == "playlists":
+            return self._send(200, {"items": [{
+                "id": f"PLstub{i}", "snippet": {"title": f"Playlist {i}", "description": "Synthetic"},
+                "contentDetails": {"itemCount": 10},
+            } for i in range(int(query.get("maxResults", 3)))]})
+        if resource in ("commentThreads", "comments"):
+            # Page tokens are offsets, so pages stay consistent when maxResults changes
+            start = int(query.get("pageToken") or 0)
+            size = min(int(query.get("maxResults", 100)), 100)
+            parent_id = query.get("parentId")
+            # Replies of a thread are listed through comments?parentId=...
+            total = _stub_reply_count(parent_id) if parent_id else self.state.comments_per_video
+            remaining = max(0, total - start)
+            items = []
+            for i in range(start, start + min(size, remaining)):
+                snippet = _stub_comment(i, published, reply=bool(parent_id))
+                if parent_id:
+                    snippet["parentId"] = parent_id
+                    items.append({"id": f"{parent_id}.reply{i}", "snippet": snippet})
+                elif resource == "commentThreads":
+                    thread_id = f"thread{i}"
+                    reply_count = _stub_reply_count(thread_id)
+                    item = {"id": thread_id, "snippet": {"topLevelComment": {"id": thread_id, "snippet": snippet},
+                                                         "totalReplyCount": reply_count}}
+                    if reply_count and "replies" in query.get("part", ""):
+                        # Like the real API, only a few replies are returned inline
+                        item["replies"] = {"comments": [
+                            {"id": f"{thread_id}.reply{r}",
+                             "snippet": dict(_stub_comment(r, published, reply=True), parentId=thread_id)}
+                            for r in range(min(reply_count, 5))
+                        ]}
+                    items.append(item)
+                else:
+                    items.append({"id": f"comment{i}", "snippet": snippet})
+            payload = {"items": items}
+            if start + size < total:
+                payload["nextPageToken"] = str(start + size)
+            return self._send(200, payload)
+        self._not_found("resource")
+
+    # Tavily
+
+    def _tavily(self, body: dict):
+        time.sleep(self.state.api_latency)
+        self._send(200, {
+            "query": body.get("query", ""),
+            "answer": "AI agents and efficient small models are trending.",
+            "results": [{"title": f"Stub article {i}", "url": f"https://example.com/{i}",
+                         "content": "Synthetic article content about AI trends.", "score": 0.9 - i / 10}
+                        for i in range(5)],
+            "response_time": self.state.api_latency,
+        })
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, state: StubState):
+        super().__init__(address, StubHandler)
+        self.state = state
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-response are expected under load
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(script: Dict[str, List[dict]] = None, llm_latency: float = 0.3, api_latency: float = 0.05,
+                      comments_per_video: int = 100, port: int = 0) -> StubServer:
+    """Start the stub on a background thread and return the server (use .base_url and .shutdown())"""
+    state = StubState(script or DEFAULT_SCRIPT, llm_latency, api_latency, comments_per_video)
+    server = StubServer(("127.0.0.1", port), state)
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server
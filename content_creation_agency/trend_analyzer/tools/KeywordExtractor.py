@@ -1,12 +1,7 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
-import os
-from dotenv import load_dotenv
-import requests
 from datetime import datetime
 
-load_dotenv()
-
 class KeywordExtractor(BaseTool):
     """
     Extracts and analyzes trending keywords and topics.
@@ -1,34 +1,57 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
-from dotenv import load_dotenv
-from tavily import TavilyClient
+from utils import cache, replay, resilience, tracing
+from utils.clients import tavily
+from utils.env import load_env
+from utils.summarize import summarize_results
 
-load_dotenv()
+load_env()
 
-tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+# Whether searches return a cited brief instead of the raw results unless the caller says otherwise
+SUMMARIZE_DEFAULT = os.getenv('SEARCH_SUMMARIZE', '1').lower() not in ('0', 'false', 'no')
 
 class WebSearchTool(BaseTool):
     """
     Searches the web for AI trends using Tavily API
     """
     query: str = Field(..., description="Search query for AI trends")
+    summarize: bool = Field(
+        default=SUMMARIZE_DEFAULT,
+        description="Return a short brief of the results with numbered sources instead of the raw search response"
+    )
     
     def run(self):
         """
         Performs a web search using Tavily API
         """
         try:
-            response = tavily.search(
-                query=self.query,
-                search_depth="advanced",
-                include_answer=True,
-                include_domains=["techcrunch.com", "wired.com", "venturebeat.com", "ai.gov"]
-            )
-            return str(response)
+            params = {
+                "query": self.query,
+                "search_depth": "advanced",
+                "include_answer": True,
+                "include_domains": ["techcrunch.com", "wired.com", "venturebeat.com", "ai.gov"]
+            }
+            with tracing.span("tavily.search", "api", query_chars=len(self.query)) as span:
+                response = cache.call("tavily", params, lambda: replay.call(
+                    "tavily", params, lambda: resilience.call("tavily", lambda: tavily.search(**params), endpoint="tavily.search")
+                ))
+                output = str(response)
+                span.set(response_bytes=len(output.encode("utf-8")), results=len(response.get("results", [])))
+            tracing.incr("tavily_requests_total")
+            if not self.summarize:
+                return output
+            return self._brief(response)
         except Exception as e:
             return f"Error performing web search: {str(e)}"
 
+    def _brief(self, response: dict) -> str:
+        """The search results condensed into one cited brief (see utils.summarize)"""
+        brief, sources = summarize_results(self.query, response.get("results", []), response.get("answer") or "")
+        lines = [f"Search brief: {self.query}", "", brief, "", "Sources:"]
+        lines.extend(f"[{number}] {title} - {url}" for number, title, url in sources)
+        return "\n".join(lines)
+
 if __name__ == "__main__":
     tool = WebSearchTool(query="latest developments in artificial intelligence")
     print(tool.run()) 
\ No newline at end of file
@@ -1,5 +1,7 @@
 from agency_swarm import Agent
 
+from utils.context_budget import FetchStoredResult
+
 class TrendAnalyzer(Agent):
     def __init__(self):
         super().__init__(
@@ -7,5 +9,6 @@ class TrendAnalyzer(Agent):
             description="Analyzes trends and patterns in AI and tech content",
             instructions="./instructions.md",
             tools_folder="./tools",
+            tools=[FetchStoredResult],  # Reads long tool results that were shortened in the thread
             temperature=0.7
         ) 
\ No newline at end of file
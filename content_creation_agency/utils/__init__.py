@@ -0,0 +1,6 @@
+"""
+Shared helpers used by the agents and tools of the Content Creation Agency.
+
+Modules in this package live outside the agents' tools folders on purpose:
+agency-swarm imports every file in a tools folder as a tool.
+"""
@@ -0,0 +1,56 @@
+"""
+Quota and wall-time budgets for long-running tool calls.
+
+A RunBudget is shared by all worker threads of one tool run. Every YouTube
+request is charged to it before it is sent; once the quota or the deadline
+is used up, spend() returns False and the workers stop fetching, so the tool
+can report what it has so far instead of failing.
+"""
+import threading
+import time
+from typing import Optional
+
+
+class RunBudget:
+    """Thread-safe quota-unit and deadline budget for one tool run"""
+
+    def __init__(self, quota_units: Optional[int] = None, seconds: Optional[float] = None):
+        self.quota_units = quota_units
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds if seconds is not None else None
+        self.used = 0
+        # 'quota' or 'time' once the budget is exhausted
+        self.reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def spend(self, units: int = 1) -> bool:
+        """Charge units for a request that is about to be sent; False means do not send it"""
+        with self._lock:
+            if self.reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+                self.reason = 'time'
+            if self.reason is None and self.quota_units is not None and self.used + units > self.quota_units:
+                self.reason = 'quota'
+            if self.reason is not None:
+                return False
+            self.used += units
+            return True
+
+    @property
+    def exhausted(self) -> bool:
+        if self.reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            with self._lock:
+                self.reason = self.reason or 'time'
+        return self.reason is not None
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def describe(self) -> str:
+        """Why the run stopped early, in words"""
+        if self.reason == 'quota':
+            return f"quota budget of {self.quota_units} units reached"
+        if self.reason == 'time':
+            return f"time budget of {self.seconds:g} seconds reached"
+        return "within budget"
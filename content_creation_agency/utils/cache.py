@@ -0,0 +1,184 @@
+"""
+Shared on-disk cache of YouTube and Tavily responses.
+
+When API_CACHE_FILE is set, every successful response is stored in a SQLite
+database under the same canonical request key as the replay fixtures (the API
+key is not part of it) and served from there for API_CACHE_TTL seconds. The
+database runs in WAL mode, so several processes - e.g. the workers of the
+batch runner - can share one file and a channel that appears in many jobs is
+fetched only once. Within a process, callers that ask for the same request at
+the same time share one fetch. OpenAI responses are never cached.
+
+Without API_CACHE_FILE nothing is cached, with one exception: requests made
+inside prefetching() (the startup warm-up, utils.warmup) are kept in memory
+for PREFETCH_TTL seconds, and the first later request for the same data takes
+that response. Each prefetched response is served once, so only the first
+answer after startup can read data fetched before it was asked. The flag
+belongs to the thread that entered prefetching(); tools that fetch on a
+worker pool wrap the submitted function with carry() to pass it on.
+"""
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils import replay, tracing
+
+CACHE_FILE = os.getenv('API_CACHE_FILE')
+TTL = float(os.getenv('API_CACHE_TTL', '21600'))
+PREFETCH_TTL = float(os.getenv('AGENCY_WARMUP_TTL', '300'))
+
+_local = threading.local()
+
+# Requests being fetched right now in this process, so a second caller waits instead of fetching too
+_inflight: Dict[Tuple[str, str], threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+# Responses fetched inside prefetching() while no cache file is set: (service, key) -> (stored_at, response)
+_prefetched: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+_prefetch_lock = threading.Lock()
+_MISS = object()
+
+
+def configure(path: Optional[str], ttl: Optional[float] = None):
+    """Switch the cache file (None disables caching) and optionally the TTL at runtime"""
+    global CACHE_FILE, TTL
+    CACHE_FILE = path
+    if ttl is not None:
+        TTL = ttl
+
+
+def enabled() -> bool:
+    return bool(CACHE_FILE)
+
+
+def in_use() -> bool:
+    """Whether call() can serve or store anything (a cache file, or prefetched responses)"""
+    return bool(CACHE_FILE) or bool(_prefetched) or getattr(_local, 'prefetching', False)
+
+
+@contextmanager
+def prefetching():
+    """Keep the responses of requests made on this thread for the next caller, even without a cache file"""
+    previous = getattr(_local, 'prefetching', False)
+    _local.prefetching = True
+    try:
+        yield
+    finally:
+        _local.prefetching = previous
+
+
+def carry(fn: Callable) -> Callable:
+    """fn wrapped to run with the calling thread's prefetching() state, for handing work to other threads"""
+    if not getattr(_local, 'prefetching', False):
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with prefetching():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def _connection() -> sqlite3.Connection:
+    """One connection per thread and process (sqlite3 connections cannot be shared)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid() or _local.path != CACHE_FILE:
+        directory = os.path.dirname(CACHE_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(CACHE_FILE, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'service TEXT, key TEXT, stored_at REAL, response TEXT, PRIMARY KEY (service, key))'
+        )
+        conn.commit()
+        _local.conn, _local.pid, _local.path = conn, os.getpid(), CACHE_FILE
+    return conn
+
+
+def _lookup(service: str, key: str) -> Any:
+    if CACHE_FILE:
+        try:
+            row = _connection().execute(
+                'SELECT stored_at, response FROM responses WHERE service = ? AND key = ?', (service, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading API cache: {str(e)}")
+            return _MISS
+        return json.loads(row[1]) if row is not None and time.time() - row[0] < TTL else _MISS
+    with _prefetch_lock:
+        if getattr(_local, 'prefetching', False):
+            entry = _prefetched.get((service, key))
+        else:
+            entry = _prefetched.pop((service, key), None)
+    return entry[1] if entry is not None and time.time() - entry[0] < PREFETCH_TTL else _MISS
+
+
+def _store(service: str, key: str, response: Any):
+    if CACHE_FILE:
+        try:
+            conn = _connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (service, key, stored_at, response) VALUES (?, ?, ?, ?)',
+                (service, key, time.time(), json.dumps(response, default=str))
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing API cache: {str(e)}")
+    elif getattr(_local, 'prefetching', False):
+        now = time.time()
+        with _prefetch_lock:
+            for stale in [k for k, (stored_at, _) in _prefetched.items() if now - stored_at >= PREFETCH_TTL]:
+                del _prefetched[stale]
+            _prefetched[(service, key)] = (now, response)
+
+
+def call(service: str, request: Dict[str, Any], fetch: Callable[[], Any]) -> Any:
+    """
+    Return the cached response for a request if it is younger than TTL (or a
+    prefetched one, see prefetching()), otherwise fetch() it and store it.
+    fetch must return a JSON-serializable value.
+    """
+    if not in_use():
+        return fetch()
+    key = replay.fixture_key(request)
+    response = _lookup(service, key)
+    if response is not _MISS:
+        tracing.record_cache(f"api.{service}", True)
+        return response
+
+    with _inflight_lock:
+        pending = _inflight.get((service, key))
+        if pending is None:
+            _inflight[(service, key)] = threading.Event()
+    if pending is not None:
+        # Another thread (e.g. the warm-up) is fetching the same request; read its response when it is stored
+        pending.wait()
+        return call(service, request, fetch)
+
+    tracing.record_cache(f"api.{service}", False)
+    try:
+        response = fetch()
+        _store(service, key, response)
+    finally:
+        with _inflight_lock:
+            _inflight.pop((service, key)).set()
+    return response
+
+
+def purge(older_than: Optional[float] = None) -> int:
+    """Delete entries older than older_than seconds (default: the TTL); returns how many"""
+    if not CACHE_FILE:
+        return 0
+    conn = _connection()
+    deleted = conn.execute('DELETE FROM responses WHERE stored_at < ?',
+                           (time.time() - (TTL if older_than is None else older_than),)).rowcount
+    conn.commit()
+    return deleted
@@ -0,0 +1,71 @@
+"""
+Lazily constructed API clients shared by all tools.
+
+Tools import the proxies below at module scope. The client libraries
+(googleapiclient, tavily, openai) are imported and the clients are built the
+first time an attribute is used, i.e. when a tool first runs, so importing a
+tool module stays cheap.
+"""
+import os
+import threading
+
+from utils import tracing
+from utils.env import load_env
+
+
+class LazyClient:
+    """Proxy that builds the real client on first attribute access"""
+
+    def __init__(self, name: str, factory):
+        self._name = name
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the real client, building it if needed"""
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    with tracing.span(f"{self._name}.build", "startup"):
+                        self._client = self._factory()
+                client = self._client
+        return client
+
+    def reset(self):
+        """Drop the client so the next use rebuilds it (e.g. after changing settings)"""
+        with self._lock:
+            self._client = None
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+
+def _build_youtube():
+    load_env()
+    from utils.youtube_api import build_youtube
+    return build_youtube()
+
+
+def _build_tavily():
+    load_env()
+    from tavily import TavilyClient
+    # TAVILY_API_BASE_URL points the client at another server (e.g. the load-test stub)
+    base_url = os.getenv("TAVILY_API_BASE_URL")
+    return TavilyClient(
+        api_key=os.getenv("TAVILY_API_KEY"),
+        **({"api_base_url": base_url} if base_url else {})
+    )
+
+
+def _build_openai():
+    load_env()
+    from openai import OpenAI
+    # Retries are handled by utils.resilience so they are not stacked on the SDK's own
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+
+youtube = LazyClient("youtube", _build_youtube)
+tavily = LazyClient("tavily", _build_tavily)
+openai_client = LazyClient("openai", _build_openai)
@@ -0,0 +1,157 @@
+"""
+Collapsing of duplicate and spam comments before sentiment scoring.
+
+Popular videos collect copy-paste comments, bot floods and emoji-only
+reactions. CommentDeduper sees each comment once, in stream order:
+
+- obvious spam (empty, only emoji and links, link or contact promotion) is
+  dropped and counted by reason; short texts such as "10/10" or "100%" are
+  kept;
+- the text is normalized (case, accents, punctuation, stretched letters) and
+  an exact hash of it finds verbatim copies;
+- texts of MIN_SIMHASH_WORDS or more words also get a 64-bit SimHash of their
+  words and word pairs; a text within SIMHASH_DISTANCE bits of an earlier one
+  joins its group. Four 16-bit bands index the hashes (two hashes at most 3
+  bits apart share at least one band), so a lookup compares only a handful of
+  candidates instead of every group.
+
+The first comment of a group is its representative: only it is scored, and
+CommentTable weights the group in the aggregates.
+"""
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Near-duplicates differ in at most this many SimHash bits
+SIMHASH_DISTANCE = 3
+# Shorter texts are only collapsed when identical ("great video" is not a copy of "great audio")
+MIN_SIMHASH_WORDS = 5
+
+BANDS = 4
+BAND_BITS = 64 // BANDS
+
+_BITS = np.arange(64, dtype=np.uint64)
+_URL = re.compile(r'https?://|www\.|\b[\w-]+\.(?:com|net|org|io|ly|me|xyz|site|shop)/', re.IGNORECASE)
+_SELF_PROMO = re.compile(
+    r'\b(?:sub(?:scribe)? to (?:me|my channel)|check (?:out )?my (?:channel|profile|page|videos?)|'
+    r'visit my (?:channel|profile|page)|sub ?(?:4|for) ?sub|onlyfans)\b',
+    re.IGNORECASE
+)
+# Investment and "hacker" scams send people to a messenger
+_CONTACT = re.compile(r'\b(?:whats\s?app|telegram|signal|instagram|dm me|message me|contact (?:him|her|them|me))\b', re.IGNORECASE)
+_HANDLE = re.compile(r'(?:^|\s)@\w{3,}|\+\d[\d\s-]{8,}\d')
+_LINK = re.compile(r'(?:https?://|www\.)\S+', re.IGNORECASE)
+# Emoji, symbols, emoji modifiers, joiners and variation selectors
+_EMOJI_CATEGORIES = {'So', 'Sk', 'Cf', 'Mn', 'Me'}
+_WORD = re.compile(r'[^\W_]+')
+_STRETCHED = re.compile(r'(.)\1{2,}')
+
+
+def _emoji_only(text: str) -> bool:
+    """Nothing but whitespace, emoji and links"""
+    return all(c.isspace() or unicodedata.category(c) in _EMOJI_CATEGORIES for c in _LINK.sub('', text))
+
+
+def spam_reason(text: str) -> Optional[str]:
+    """Why a comment is obvious spam, or None"""
+    if _emoji_only(text):
+        return 'no text'
+    if _SELF_PROMO.search(text) or (_CONTACT.search(text) and (_HANDLE.search(text) or _URL.search(text))):
+        return 'promotion'
+    if _URL.search(text) and len(_WORD.findall(_URL.sub(' ', text))) < 3:
+        return 'bare link'
+    return None
+
+
+def normalize(text: str) -> List[str]:
+    """Words of a comment with case, accents, punctuation and stretched letters ("sooooo") removed"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _WORD.findall(_STRETCHED.sub(r'\1\1', text))
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(words: List[str]) -> int:
+    """64-bit SimHash over the words and adjacent word pairs"""
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    hashes = np.fromiter((_feature_hash(f) for f in features), dtype=np.uint64, count=len(features))
+    bits = (hashes[:, None] >> _BITS) & np.uint64(1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    return int(np.packbits((votes > 0)[::-1].astype(np.uint8)).view('>u8')[0])
+
+
+def _bands(value: int) -> List[Tuple[int, int]]:
+    mask = (1 << BAND_BITS) - 1
+    return [(band, (value >> (band * BAND_BITS)) & mask) for band in range(BANDS)]
+
+
+class CommentDeduper:
+    """Assigns each comment of a stream to a group of (near-)identical texts"""
+
+    def __init__(self, max_distance: int = SIMHASH_DISTANCE):
+        self.max_distance = max_distance
+        self.spam: Counter = Counter()
+        self.comments = 0
+        self.groups = 0
+        self._exact: Dict[str, int] = {}
+        self._hashes: List[int] = []
+        self._hash_groups: List[int] = []
+        self._bands: Dict[Tuple[int, int], List[int]] = {}
+
+    def add(self, text: str) -> Tuple[Optional[int], bool]:
+        """(group, is_new) for a comment; group is None for spam"""
+        self.comments += 1
+        reason = spam_reason(text)
+        if reason:
+            self.spam[reason] += 1
+            return None, False
+
+        words = normalize(text)
+        # Texts without words ("!!!", "??") are only grouped with the same characters
+        key = ' '.join(words) or text.strip()
+        group = self._exact.get(key)
+        if group is not None:
+            return group, False
+
+        value = simhash(words) if len(words) >= MIN_SIMHASH_WORDS else None
+        if value is not None:
+            group = self._near(value)
+        is_new = group is None
+        if is_new:
+            group = self.groups
+            self.groups += 1
+        self._exact[key] = group
+        if value is not None and is_new:
+            index = len(self._hashes)
+            self._hashes.append(value)
+            self._hash_groups.append(group)
+            for band in _bands(value):
+                self._bands.setdefault(band, []).append(index)
+        return group, is_new
+
+    def _near(self, value: int) -> Optional[int]:
+        seen = set()
+        for band in _bands(value):
+            for index in self._bands.get(band, ()):
+                if index in seen:
+                    continue
+                seen.add(index)
+                if bin(value ^ self._hashes[index]).count('1') <= self.max_distance:
+                    return self._hash_groups[index]
+        return None
+
+    @property
+    def spam_total(self) -> int:
+        return sum(self.spam.values())
+
+    @property
+    def collapsed(self) -> int:
+        """Comments that joined an existing group instead of being scored"""
+        return self.comments - self.spam_total - self.groups
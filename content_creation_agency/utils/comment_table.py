@@ -0,0 +1,222 @@
+"""
+Array-backed storage for scored comments.
+
+CommentSentiment used to keep one dict per comment, including the full text,
+and sorted the whole list to find the top comments. CommentTable stores the
+numeric fields in growable NumPy columns and interns author names and thread
+ids, so a comment costs a few dozen bytes. Running aggregates are updated on
+append, and TopK keeps only the k best comments (with their text) of a stream.
+
+Comments that utils.comment_dedup put in one group of (near-)identical texts
+share one sentiment score. In the average sentiment a group of n copies
+counts as 1 + ln(n) comments, so a copy-paste flood still registers without
+outweighing everyone else; the positive / neutral / negative counts are
+counts of distinct texts.
+"""
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Sentiment above / below these polarities counts as positive / negative
+POSITIVE_THRESHOLD = 0.3
+NEGATIVE_THRESHOLD = -0.3
+
+# Characters kept from each top-level comment for thread listings
+PREVIEW_CHARS = 100
+
+# Rows buffered before they are converted into the NumPy columns
+FLUSH_ROWS = 4096
+
+
+class TopK:
+    """Keeps the k items with the largest keys seen in a stream (earlier items win ties)"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple] = []
+        self._order = itertools.count()
+
+    def push(self, key: float, item):
+        # The heap root is the weakest entry; -order makes later items weaker on ties
+        entry = (key, -next(self._order), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> list:
+        """Items from the largest key down"""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+
+class CommentTable:
+    """Columnar table of scored comments with running aggregates"""
+
+    COLUMNS = {
+        'sentiment': np.float32,
+        'subjectivity': np.float32,
+        'likes': np.int64,
+        'published': 'datetime64[s]',
+        'author': np.int32,
+        'thread': np.int32,
+        'is_reply': np.bool_,
+        'group': np.int32,
+    }
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        # Rows not yet copied into the columns; converting in bulk is much cheaper than per row
+        self._pending: List[tuple] = []
+        self.authors: List[str] = []
+        self._author_ids: Dict[str, int] = {}
+        self.thread_ids: List[str] = []
+        self.thread_previews: List[str] = []
+        self._thread_index: Dict[str, int] = {}
+        # Sentiment and size of each group of identical texts, in group order
+        self.group_sentiment: List[float] = []
+        self.group_sizes: List[int] = []
+        # Running aggregates
+        self.replies = 0
+        self.reply_sentiment_sum = 0.0
+        # Comments dropped as spam before scoring, by reason
+        self.spam: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size + len(self._pending)
+
+    def _intern_thread(self, thread_id: str) -> int:
+        index = self._thread_index.get(thread_id)
+        if index is None:
+            index = self._thread_index[thread_id] = len(self.thread_ids)
+            self.thread_ids.append(thread_id)
+            self.thread_previews.append('')
+        return index
+
+    def _flush(self):
+        """Copy pending rows into the columns, doubling their capacity when needed"""
+        if not self._pending:
+            return
+        end = self._size + len(self._pending)
+        capacity = len(self._columns['sentiment'])
+        if end > capacity:
+            capacity = max(end, 2 * capacity)
+            for name, column in self._columns.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:self._size] = column[:self._size]
+                self._columns[name] = grown
+        for name, values in zip(self.COLUMNS, zip(*self._pending)):
+            self._columns[name][self._size:end] = values
+        self._size = end
+        self._pending.clear()
+
+    def append(self, text: str, sentiment: float, subjectivity: float, likes: int, published: str,
+               author: str, thread_id: str, is_reply: bool, group: Optional[int] = None) -> int:
+        """
+        Add one scored comment and return its row; only a preview of top-level
+        texts is kept. Without a group the comment is a group of its own.
+        """
+        row = len(self)
+        if group is None or group == len(self.group_sizes):
+            group = len(self.group_sizes)
+            self.group_sentiment.append(sentiment)
+            self.group_sizes.append(1)
+        else:
+            self.group_sizes[group] += 1
+        author_id = self._author_ids.get(author)
+        if author_id is None:
+            author_id = self._author_ids[author] = len(self.authors)
+            self.authors.append(author)
+        thread = self._intern_thread(thread_id)
+
+        # Same order as COLUMNS; API timestamps look like 2024-01-31T12:00:00Z, maybe with fractions
+        self._pending.append((sentiment, subjectivity, likes, published[:19], author_id, thread, is_reply, group))
+        if len(self._pending) >= FLUSH_ROWS:
+            self._flush()
+
+        if is_reply:
+            self.replies += 1
+            self.reply_sentiment_sum += sentiment
+        else:
+            self.thread_previews[thread] = text[:PREVIEW_CHARS]
+        return row
+
+    def column(self, name: str) -> np.ndarray:
+        """View of a column trimmed to the rows in use"""
+        self._flush()
+        return self._columns[name][:self._size]
+
+    def group_weights(self) -> np.ndarray:
+        """Weight of each group in the sentiment aggregates: 1 + ln(copies)"""
+        return 1.0 + np.log(np.asarray(self.group_sizes, dtype=np.float64))
+
+    def row_weights(self) -> np.ndarray:
+        """Weight of each row: its group's weight shared among the group's comments"""
+        sizes = np.asarray(self.group_sizes, dtype=np.float64)
+        return (self.group_weights() / sizes)[self.column('group')] if len(sizes) else np.empty(0)
+
+    @property
+    def duplicates(self) -> int:
+        """Comments that repeat an earlier text of their group"""
+        return len(self) - len(self.group_sizes)
+
+    @property
+    def weight(self) -> float:
+        """Total weight of the groups in the average sentiment (not a comment count)"""
+        return float(self.group_weights().sum())
+
+    def _texts_where(self, mask_of) -> int:
+        return int(np.count_nonzero(mask_of(np.asarray(self.group_sentiment, dtype=np.float64))))
+
+    @property
+    def positive(self) -> int:
+        """Distinct texts (duplicate groups collapsed) scored positive"""
+        return self._texts_where(lambda s: s > POSITIVE_THRESHOLD)
+
+    @property
+    def negative(self) -> int:
+        """Distinct texts scored negative"""
+        return self._texts_where(lambda s: s < NEGATIVE_THRESHOLD)
+
+    @property
+    def neutral(self) -> int:
+        """Distinct texts scored neither positive nor negative"""
+        return len(self.group_sizes) - self.positive - self.negative
+
+    @property
+    def average_sentiment(self) -> float:
+        if not self.group_sizes:
+            return 0.0
+        weights = self.group_weights()
+        return float(np.dot(weights, self.group_sentiment) / weights.sum())
+
+    def top_k(self, values: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+        """Indices of the k largest (or smallest) values, best first, via argpartition"""
+        if len(values) == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64)
+        keyed = -values if largest else values
+        k = min(k, len(values))
+        candidates = np.argpartition(keyed, k - 1)[:k]
+        return candidates[np.argsort(keyed[candidates], kind='stable')]
+
+    def thread_stats(self) -> Dict[str, np.ndarray]:
+        """Per-thread top-level sentiment, reply count and reply sentiment sum, indexed by thread"""
+        threads = self.column('thread')
+        is_reply = self.column('is_reply')
+        sentiment = self.column('sentiment').astype(np.float64)
+        n = len(self.thread_ids)
+        top_level = np.zeros(n)
+        top_level[threads[~is_reply]] = sentiment[~is_reply]
+        return {
+            'top_level': top_level,
+            'has_top_level': np.bincount(threads[~is_reply], minlength=n) > 0,
+            'reply_count': np.bincount(threads[is_reply], minlength=n),
+            'reply_sum': np.bincount(threads[is_reply], weights=sentiment[is_reply], minlength=n),
+        }
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns"""
+        self._flush()
+        return sum(column.nbytes for column in self._columns.values())
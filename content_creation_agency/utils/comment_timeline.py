@@ -0,0 +1,105 @@
+"""
+Comment timeline of a video, computed on CommentTable columns.
+
+Comments are binned by time since the video was published into equal
+buckets (the smallest of BUCKET_HOURS that gives at most MAX_BUCKETS) with
+np.bincount, so the cost is a few passes over the columns whatever the number
+of comments. Per bucket: comment count and velocity (comments per hour),
+sentiment weighted like the table's aggregates (duplicate groups collapsed),
+and like-weighted sentiment, where a comment counts once plus once per like.
+
+A burst is a bucket whose count is BURST_Z standard deviations above the
+mean of the BURST_WINDOW buckets before it (the standard deviation is at
+least the Poisson noise of that mean, and at least 1). Rolling sums come from
+cumulative sums, so there is no loop over buckets either.
+"""
+from typing import Dict
+
+import numpy as np
+
+from utils.comment_table import CommentTable
+
+BUCKET_HOURS = (1, 3, 6, 12, 24, 72, 168, 720)
+MAX_BUCKETS = 60
+
+BURST_WINDOW = 6
+BURST_Z = 3.0
+# Buckets compared against fewer earlier buckets than this are never bursts
+BURST_MIN_HISTORY = 3
+BURST_MIN_COMMENTS = 5
+
+
+def _weighted_mean(values: np.ndarray, weights: np.ndarray) -> float:
+    total = weights.sum()
+    return float(np.dot(values, weights) / total) if total > 0 else 0.0
+
+
+def comment_timeline(table: CommentTable, video_published: str) -> Dict:
+    """
+    Buckets and summary figures of a table's comments relative to the video's
+    publishedAt timestamp. Ages are in hours; comments dated before the video
+    (premieres, clock skew) count as age 0.
+    """
+    start = np.datetime64(video_published[:19], 's')
+    ages = (table.column('published') - start).astype(np.float64) / 3600.0
+    np.maximum(ages, 0.0, out=ages)
+    sentiment = table.column('sentiment').astype(np.float64)
+    likes = table.column('likes').astype(np.float64)
+    weights = table.row_weights()
+    like_weights = weights * (1.0 + np.maximum(likes, 0.0))
+
+    span = float(ages.max()) if len(ages) else 0.0
+    width = next((hours for hours in BUCKET_HOURS if span / hours < MAX_BUCKETS), BUCKET_HOURS[-1])
+    buckets = int(span // width) + 1
+    index = (ages // width).astype(np.int64)
+
+    counts = np.bincount(index, minlength=buckets)
+    weight_sum = np.bincount(index, weights=weights, minlength=buckets)
+    like_sum = np.bincount(index, weights=like_weights, minlength=buckets)
+    bucket_sentiment = np.full(buckets, np.nan)
+    np.divide(np.bincount(index, weights=weights * sentiment, minlength=buckets), weight_sum,
+              out=bucket_sentiment, where=weight_sum > 0)
+    bucket_like_sentiment = np.full(buckets, np.nan)
+    np.divide(np.bincount(index, weights=like_weights * sentiment, minlength=buckets), like_sum,
+              out=bucket_like_sentiment, where=like_sum > 0)
+
+    # Mean and standard deviation of the BURST_WINDOW buckets before each bucket
+    c = counts.astype(np.float64)
+    cumulative = np.concatenate(([0.0], np.cumsum(c)))
+    cumulative_sq = np.concatenate(([0.0], np.cumsum(c * c)))
+    positions = np.arange(buckets)
+    lower = np.maximum(0, positions - BURST_WINDOW)
+    history = positions - lower
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (cumulative[positions] - cumulative[lower]) / history
+        variance = (cumulative_sq[positions] - cumulative_sq[lower]) / history - mean * mean
+        std = np.maximum(np.sqrt(np.maximum(variance, 0.0)), np.maximum(np.sqrt(mean), 1.0))
+        z = (c - mean) / std
+    bursts = np.flatnonzero((history >= BURST_MIN_HISTORY) & (counts >= BURST_MIN_COMMENTS) & (z >= BURST_Z))
+
+    # Drift: fitted change of bucket sentiment per day, buckets weighted by their comments
+    valid = weight_sum > 0
+    drift = None
+    if np.count_nonzero(valid) >= 3:
+        centers_days = (positions[valid] + 0.5) * width / 24.0
+        drift = float(np.polyfit(centers_days, bucket_sentiment[valid], 1, w=np.sqrt(weight_sum[valid]))[0])
+    early_cut, late_cut = np.quantile(ages, [0.25, 0.75]) if len(ages) else (0.0, 0.0)
+    early, late = ages <= early_cut, ages >= late_cut
+
+    return {
+        'bucket_hours': width,
+        'counts': counts,
+        'velocity': c / width,
+        'sentiment': bucket_sentiment,
+        'like_sentiment': bucket_like_sentiment,
+        'z': z,
+        'bursts': bursts,
+        'span_hours': span,
+        'median_age_hours': float(np.median(ages)) if len(ages) else 0.0,
+        'first_day_share': float(np.count_nonzero(ages < 24.0) / len(ages)) if len(ages) else 0.0,
+        'drift_per_day': drift,
+        'early_sentiment': _weighted_mean(sentiment[early], weights[early]),
+        'late_sentiment': _weighted_mean(sentiment[late], weights[late]),
+        'sentiment_mean': _weighted_mean(sentiment, weights),
+        'like_weighted_sentiment': _weighted_mean(sentiment, like_weights),
+    }
@@ -0,0 +1,340 @@
+"""
+Keeps the prompt of every agency thread bounded in long sessions.
+
+Three parts, installed on an agency with manage_context():
+
+* Bulky tool results (full channel reports, sentiment dumps, raw search
+  responses) are not sent to the thread in full. The complete text goes into a
+  local result store (SQLite, CONTEXT_STORE_FILE) and the thread gets an
+  extract of it - headings and figures first - plus a reference the agent can
+  read more of with the FetchStoredResult tool.
+* Token usage reported by the API for every run is kept per thread
+  (ThreadBudget), along with the tokens compaction kept out of the thread.
+* When a thread's runs start using more than CONTEXT_PROMPT_BUDGET prompt
+  tokens, its next runs only see the most recent messages (OpenAI's
+  last_messages truncation). The window shrinks in proportion to the overrun
+  and grows back while the prompts stay well under the budget, so the prompt
+  size stays around the budget no matter how long the session gets.
+
+CONTEXT_BUDGET=0 turns all of this off.
+"""
+import functools
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from agency_swarm.tools import BaseTool
+from pydantic import Field
+
+from utils import tracing
+from utils.tool_registry import plain_output
+
+ENABLED = os.getenv('CONTEXT_BUDGET', '1').lower() not in ('0', 'false', 'no')
+STORE_FILE = os.getenv('CONTEXT_STORE_FILE', 'cache/results.sqlite')
+
+# Tool results larger than this (in tokens) are stored and replaced by an extract of this size
+TOOL_OUTPUT_TOKENS = int(os.getenv('CONTEXT_TOOL_OUTPUT_TOKENS', '1500'))
+# Prompt tokens a single run of a thread should stay under
+PROMPT_BUDGET = int(os.getenv('CONTEXT_PROMPT_BUDGET', '24000'))
+# Message window used once a thread goes over budget, and the smallest it may shrink to
+MAX_MESSAGES = int(os.getenv('CONTEXT_MAX_MESSAGES', '40'))
+MIN_MESSAGES = int(os.getenv('CONTEXT_MIN_MESSAGES', '4'))
+# Stored results older than this many days are deleted
+STORE_DAYS = float(os.getenv('CONTEXT_STORE_DAYS', '7'))
+
+# Text returned by FetchStoredResult is sent in parts of this many tokens
+FETCH_PART_TOKENS = 3000
+
+_SEPARATOR = re.compile(r'^[\s=\-_─━*#]*$')
+_HEADING = re.compile(r'^\s*(?:[^\w\s(]{1,3}\s*)?[A-Z][A-Z0-9 &/()\-]{3,}:?\s*$|^\s*#+ |:\s*$')
+_NUMBER = re.compile(r'\d')
+
+_local = threading.local()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (4 bytes per token) - close enough for budgeting, and needs no tokenizer download"""
+    return (len(text.encode('utf-8')) + 3) // 4
+
+
+def _connection() -> sqlite3.Connection:
+    """One connection per thread and process (sqlite3 connections cannot be shared)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid() or _local.path != STORE_FILE:
+        directory = os.path.dirname(STORE_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(STORE_FILE, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS results (id TEXT PRIMARY KEY, tool TEXT, stored_at REAL, text TEXT)'
+        )
+        conn.execute('DELETE FROM results WHERE stored_at < ?', (time.time() - STORE_DAYS * 86400,))
+        conn.commit()
+        _local.conn, _local.pid, _local.path = conn, os.getpid(), STORE_FILE
+    return conn
+
+
+def store_result(tool: str, text: str) -> str:
+    """Save a tool result and return its reference (the same text always gets the same reference)"""
+    result_id = 'res_' + hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+    conn = _connection()
+    conn.execute(
+        'INSERT OR REPLACE INTO results (id, tool, stored_at, text) VALUES (?, ?, ?, ?)',
+        (result_id, tool, time.time(), text),
+    )
+    conn.commit()
+    return result_id
+
+
+def fetch_result(result_id: str) -> Optional[str]:
+    row = _connection().execute('SELECT text FROM results WHERE id = ?', (result_id.strip(),)).fetchone()
+    return row[0] if row else None
+
+
+def extract(text: str, max_tokens: int) -> str:
+    """
+    The most informative lines of a report within max_tokens: headings first,
+    then the opening lines of every section (lines with figures before the
+    rest), kept in their original order with "..." where lines were left out.
+    """
+    lines = [line.rstrip() for line in text.splitlines()]
+    candidates = [i for i, line in enumerate(lines) if line.strip() and not _SEPARATOR.match(line)]
+    rank, position = {}, 0
+    for i in candidates:
+        if i == candidates[0] or _HEADING.search(lines[i]):
+            rank[i], position = (0, 0, i), 0
+        else:
+            rank[i] = (1, 2 * position + (0 if _NUMBER.search(lines[i]) else 1), i)
+            position += 1
+    ranked = sorted(candidates, key=rank.get)
+
+    kept, used = set(), 0
+    for i in ranked:
+        cost = estimate_tokens(lines[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        kept.add(i)
+        used += cost
+
+    out, skipped = [], False
+    for i in candidates:
+        if i in kept:
+            out.append(lines[i])
+            skipped = False
+        elif not skipped:
+            out.append('...')
+            skipped = True
+    return '\n'.join(out)
+
+
+def compact(tool: str, output: str, max_tokens: int = None) -> str:
+    """The output unchanged if it is small enough, otherwise an extract with a reference to the stored full text"""
+    max_tokens = max_tokens or TOOL_OUTPUT_TOKENS
+    if tool == 'FetchStoredResult' or estimate_tokens(output) <= max_tokens:
+        return output
+    text = plain_output(output)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    try:
+        result_id = store_result(tool, text)
+    except sqlite3.Error as e:
+        print(f"Error storing tool result: {str(e)}")
+        return output
+    total = estimate_tokens(text)
+    parts = -(-total // FETCH_PART_TOKENS)
+    return (
+        f"{extract(text, max_tokens)}\n\n"
+        f"[Extract of a {total}-token result from {tool}, stored as {result_id}. "
+        f"Call FetchStoredResult with result_id=\"{result_id}\" and a search term, "
+        f"or part 1-{parts}, to read the parts that were left out.]"
+    )
+
+
+class ThreadBudget:
+    """Token usage of one conversation thread and the message window its next run gets"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.runs = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.last_prompt_tokens = 0
+        self.compacted = 0
+        self.tokens_saved = 0
+        self.last_messages: Optional[int] = None  # None: the whole thread
+        self._seen_runs = set()
+        self._lock = threading.Lock()
+
+    def record_run(self, run):
+        usage = getattr(run, 'usage', None)
+        if usage is None or run.id in self._seen_runs:
+            return
+        with self._lock:
+            self._seen_runs.add(run.id)
+            self.runs += 1
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+            self.last_prompt_tokens = usage.prompt_tokens
+            self._adjust_window(usage.prompt_tokens)
+        tracing.observe('context_prompt_tokens', usage.prompt_tokens, thread=self.name)
+        tracing.incr('context_tokens_total', usage.prompt_tokens, thread=self.name, kind='prompt')
+        tracing.incr('context_tokens_total', usage.completion_tokens, thread=self.name, kind='completion')
+
+    def _adjust_window(self, prompt_tokens: int):
+        if prompt_tokens > PROMPT_BUDGET:
+            window = self.last_messages or MAX_MESSAGES
+            self.last_messages = max(MIN_MESSAGES, int(window * PROMPT_BUDGET / prompt_tokens))
+        elif self.last_messages is not None and prompt_tokens < PROMPT_BUDGET / 2:
+            self.last_messages = min(MAX_MESSAGES, self.last_messages + 2)
+
+    def record_compaction(self, before: str, after: str):
+        saved = estimate_tokens(before) - estimate_tokens(after)
+        with self._lock:
+            self.compacted += 1
+            self.tokens_saved += saved
+        tracing.incr('context_tokens_saved_total', saved, thread=self.name)
+
+    def truncation_strategy(self) -> Optional[dict]:
+        if self.last_messages is None:
+            return None
+        return {'type': 'last_messages', 'last_messages': self.last_messages}
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                'thread': self.name, 'runs': self.runs, 'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens, 'last_prompt_tokens': self.last_prompt_tokens,
+                'compacted_results': self.compacted, 'tokens_saved': self.tokens_saved,
+                'message_window': self.last_messages,
+            }
+
+
+def _tool_names(run) -> Dict[str, str]:
+    try:
+        return {call.id: call.function.name for call in run.required_action.submit_tool_outputs.tool_calls}
+    except AttributeError:
+        return {}
+
+
+def _manage_thread(thread, name: str) -> ThreadBudget:
+    budget = getattr(thread, 'context_budget', None)
+    if budget is not None:
+        return budget
+    budget = thread.context_budget = ThreadBudget(name)
+    submit, run_until_done, create_run = thread._submit_tool_outputs, thread._run_until_done, thread._create_run
+
+    @functools.wraps(submit)
+    def compacting_submit(tool_outputs: List[dict], *args, **kwargs):
+        names = _tool_names(thread._run)
+        for tool_output in tool_outputs:
+            output = tool_output.get('output')
+            if isinstance(output, str):
+                compacted = compact(names.get(tool_output.get('tool_call_id'), 'tool'), output)
+                if compacted is not output:
+                    budget.record_compaction(output, compacted)
+                    tool_output['output'] = compacted
+        return submit(tool_outputs, *args, **kwargs)
+
+    @functools.wraps(run_until_done)
+    def recording_run_until_done():
+        result = run_until_done()
+        if thread._run is not None:
+            budget.record_run(thread._run)
+        return result
+
+    @functools.wraps(create_run)
+    def windowed_create_run(recipient_agent, *args, **kwargs):
+        configured = recipient_agent.truncation_strategy
+        window = budget.truncation_strategy()
+        if configured is not None or window is None:
+            return create_run(recipient_agent, *args, **kwargs)
+        # Only this call sees the window; each agent is the recipient of a single thread
+        recipient_agent.truncation_strategy = window
+        try:
+            return create_run(recipient_agent, *args, **kwargs)
+        finally:
+            recipient_agent.truncation_strategy = None
+
+    thread._submit_tool_outputs = compacting_submit
+    thread._run_until_done = recording_run_until_done
+    thread._create_run = windowed_create_run
+    return budget
+
+
+def manage_context(agency) -> Dict[str, ThreadBudget]:
+    """
+    Install compaction, usage tracking and the message window on every thread
+    of the agency. Call it after the Agency is created. Returns the budgets by
+    thread name ("User -> Content Manager", ...).
+    """
+    budgets = {}
+    if not ENABLED:
+        return budgets
+    threads = [agency.main_thread]
+    for recipients in agency.agents_and_threads.values():
+        if isinstance(recipients, dict):
+            threads.extend(recipients.values())
+    for thread in threads:
+        if not hasattr(thread, '_submit_tool_outputs'):
+            continue
+        name = f"{getattr(thread.agent, 'name', 'User')} -> {thread.recipient_agent.name}"
+        budgets[name] = _manage_thread(thread, name)
+    agency.context_budgets = budgets
+    return budgets
+
+
+class FetchStoredResult(BaseTool):
+    """
+    Reads a tool result that was too long to include in full. Long results are
+    shown as an extract ending with a reference like res_1a2b3c4d5e6f; pass it
+    here with a search term to get the matching lines, or a part number to read
+    the result page by page.
+    """
+    result_id: str = Field(
+        ...,
+        description="Reference of the stored result, e.g. res_1a2b3c4d5e6f"
+    )
+    search: Optional[str] = Field(
+        default=None,
+        description="Only return lines containing this text (case-insensitive), with one line of context"
+    )
+    part: int = Field(
+        default=1,
+        ge=1,
+        description="Part of the result to return when not searching"
+    )
+
+    def run(self):
+        try:
+            text = fetch_result(self.result_id)
+            if text is None:
+                return f"Error: no stored result {self.result_id} (results are kept for {STORE_DAYS:g} days)"
+
+            lines = text.splitlines()
+            if self.search:
+                needle = self.search.lower()
+                hits = [i for i, line in enumerate(lines) if needle in line.lower()]
+                if not hits:
+                    return f"No lines of {self.result_id} contain '{self.search}'"
+                keep = sorted({j for i in hits for j in (i - 1, i, i + 1) if 0 <= j < len(lines)})
+                return "\n".join(lines[i] for i in keep)[:FETCH_PART_TOKENS * 4]
+
+            parts, current, size = [], [], 0
+            for line in lines:
+                cost = estimate_tokens(line) + 1
+                if current and size + cost > FETCH_PART_TOKENS:
+                    parts.append(current)
+                    current, size = [], 0
+                current.append(line)
+                size += cost
+            parts.append(current)
+            if self.part > len(parts):
+                return f"Error: {self.result_id} has only {len(parts)} parts"
+            return f"Part {self.part} of {len(parts)}:\n" + "\n".join(parts[self.part - 1])
+        except Exception as e:
+            return f"Error reading stored result: {str(e)}"
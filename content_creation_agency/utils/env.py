@@ -0,0 +1,22 @@
+"""
+Loads the .env file once per process.
+
+Every tool used to call load_dotenv() at import time; they now call
+load_env(), which only reads the file the first time.
+"""
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env():
+    """Load variables from .env into the environment (existing variables win)"""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _loaded = True
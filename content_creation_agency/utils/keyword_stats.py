@@ -0,0 +1,125 @@
+"""
+Keyword to performance statistics over a set of videos.
+
+Title and tag keywords (the stemmed unigrams and bigrams of
+utils.similarity_index) form a sparse keyword x video presence matrix in
+coordinate form. Every statistic is a bincount over its non-zeros, so a few
+thousand videos take milliseconds:
+
+- lift: geometric mean of the metric for videos with the keyword divided by
+  that of the videos without it
+- r: point-biserial correlation between keyword presence and the log metric
+- p: two-sided p-value of r (normal approximation of the t statistic),
+  filtered with the Benjamini-Hochberg procedure across all keywords tested
+
+Views and engagement are heavy-tailed, so the statistics use log1p(metric).
+"""
+import math
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.similarity_index import terms
+
+METRICS = ('views_per_day', 'engagement_rate')
+
+_erfc = np.vectorize(math.erfc, otypes=[np.float64])
+
+
+def video_metrics(videos: List[Dict], now: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+    """Views per day since publishing and (likes + comments) / views per video"""
+    now = now or datetime.now(timezone.utc)
+    views = np.array([v.get('views', 0) for v in videos], dtype=np.float64)
+    interactions = np.array([v.get('likes', 0) + v.get('comments', 0) for v in videos], dtype=np.float64)
+    ages = np.array([
+        (now - datetime.strptime(v['published'][:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)).total_seconds() / 86400
+        for v in videos
+    ])
+    return {
+        'views_per_day': views / np.maximum(ages, 1.0),
+        'engagement_rate': np.divide(interactions, views, out=np.zeros_like(views), where=views > 0),
+    }
+
+
+class KeywordMatrix:
+    """Binary keyword x video matrix stored as (keyword, video) coordinate pairs"""
+
+    def __init__(self, texts: Iterable[str]):
+        self.vocabulary: Dict[str, int] = {}
+        # Most frequent spelling of each stemmed keyword, for display
+        spellings: List[Dict[str, int]] = []
+        keyword_ids, video_ids = [], []
+        self.videos = 0
+        for video, text in enumerate(texts):
+            self.videos += 1
+            for term, written in dict(terms(text)).items():
+                column = self.vocabulary.setdefault(term, len(self.vocabulary))
+                if column == len(spellings):
+                    spellings.append({})
+                spellings[column][written] = spellings[column].get(written, 0) + 1
+                keyword_ids.append(column)
+                video_ids.append(video)
+        self.keywords = np.array(keyword_ids, dtype=np.int32)
+        self.video_ids = np.array(video_ids, dtype=np.int32)
+        self.labels = [max(s, key=s.get) for s in spellings]
+        self.support = np.bincount(self.keywords, minlength=len(self.labels))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def keyword_sums(self, values: np.ndarray) -> np.ndarray:
+        """Sum of values over the videos that contain each keyword"""
+        return np.bincount(self.keywords, weights=values[self.video_ids], minlength=len(self.labels))
+
+    def videos_with(self, column: int) -> np.ndarray:
+        return self.video_ids[self.keywords == column]
+
+
+def benjamini_hochberg(p_values: np.ndarray, alpha: float) -> np.ndarray:
+    """Mask of the p-values that pass at false discovery rate alpha"""
+    m = len(p_values)
+    if not m:
+        return np.zeros(0, dtype=bool)
+    order = np.argsort(p_values)
+    below = p_values[order] <= alpha * np.arange(1, m + 1) / m
+    passed = np.zeros(m, dtype=bool)
+    if below.any():
+        passed[order[:np.flatnonzero(below)[-1] + 1]] = True
+    return passed
+
+
+def keyword_performance(matrix: KeywordMatrix, metric: np.ndarray, min_videos: int = 3,
+                        alpha: float = 0.05) -> List[Dict]:
+    """
+    Lift, correlation and significance of every keyword used by at least
+    min_videos videos (and not by all of them), strongest correlation first
+    """
+    n = matrix.videos
+    y = np.log1p(np.maximum(metric, 0))
+    tested = np.flatnonzero((matrix.support >= min_videos) & (matrix.support <= n - min_videos))
+    if n < 2 * min_videos or not len(tested) or y.std() == 0:
+        return []
+
+    count = matrix.support[tested].astype(np.float64)
+    mean_with = matrix.keyword_sums(y)[tested] / count
+    mean_without = (y.sum() - mean_with * count) / (n - count)
+    share = count / n
+    r = (mean_with - mean_without) * np.sqrt(share * (1 - share)) / y.std()
+    r = np.clip(r, -0.999999, 0.999999)
+    t = r * np.sqrt((n - 2) / (1 - r ** 2))
+    p = _erfc(np.abs(t) / math.sqrt(2))
+    significant = benjamini_hochberg(p, alpha)
+
+    raw_with = matrix.keyword_sums(metric)[tested] / count
+    results = [{
+        'keyword': matrix.labels[column],
+        'videos': int(count[i]),
+        'lift': float(np.expm1(mean_with[i]) / max(np.expm1(mean_without[i]), 1e-12)),
+        'r': float(r[i]),
+        'p': float(p[i]),
+        'mean': float(raw_with[i]),
+        'significant': bool(significant[i]),
+    } for i, column in enumerate(tested)]
+    results.sort(key=lambda row: row['r'], reverse=True)
+    return results
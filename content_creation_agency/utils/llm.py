@@ -0,0 +1,29 @@
+"""
+Chat completion calls made by tools (not by the agents themselves).
+
+chat() goes through the same layers as every other external call: fixtures
+(utils.replay), retries and rate limits (utils.resilience) and a tracing span
+with the token usage.
+"""
+from typing import Any, Dict
+
+from utils import replay, resilience, tracing
+from utils.clients import openai_client as client
+
+
+def chat(request: Dict[str, Any], purpose: str) -> str:
+    """Content of the reply to a chat.completions request; purpose labels the span (e.g. 'summary')"""
+    prompt_chars = sum(len(m.get('content') or '') for m in request.get('messages', []))
+
+    def create() -> str:
+        with tracing.span("openai.chat.completions", "llm", prompt_chars=prompt_chars, purpose=purpose) as span:
+            response = resilience.call(
+                "openai", lambda: client.chat.completions.create(**request), endpoint="openai.chat.completions"
+            )
+            if response.usage:
+                span.set(prompt_tokens=response.usage.prompt_tokens, completion_tokens=response.usage.completion_tokens)
+                tracing.incr("openai_tokens_total", response.usage.prompt_tokens, kind="prompt")
+                tracing.incr("openai_tokens_total", response.usage.completion_tokens, kind="completion")
+        return response.choices[0].message.content
+
+    return replay.call("openai", request, create)
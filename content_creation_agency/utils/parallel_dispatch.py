@@ -0,0 +1,126 @@
+from agency_swarm.tools.send_message import SendMessage
+from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Optional
+import os
+import time
+
+from utils import tracing
+
+# Default time limit for a single branch of a parallel dispatch, in seconds
+DEFAULT_BRANCH_TIMEOUT = int(os.getenv('PARALLEL_BRANCH_TIMEOUT', '300'))
+
+
+class ParallelTask(BaseModel):
+    """A sub-task that is sent to another agent at the same time as the main message"""
+    recipient: str = Field(
+        ...,
+        description="Name of the agent that should handle this sub-task"
+    )
+    message: str = Field(
+        ...,
+        description="The sub-task for the recipient agent. It must not depend on the result of any other sub-task."
+    )
+    additional_instructions: Optional[str] = Field(
+        default=None,
+        description="Additional context or instructions needed by the recipient agent to complete the sub-task."
+    )
+    timeout_seconds: Optional[int] = Field(
+        default=None,
+        description=f"Time limit for this sub-task in seconds (defaults to {DEFAULT_BRANCH_TIMEOUT})"
+    )
+
+
+class SendMessageParallel(SendMessage):
+    """Use this tool to send tasks to the specialized agents of your agency and receive their responses. Send the main task to the recipient agent with the message parameter. When the request needs work from several agents and the sub-tasks are independent of each other (for example channel analytics and trend research), list the other sub-tasks in parallel_tasks: every agent then works at the same time and all responses come back together, in the order they were listed. Each agent can receive only one task per call. If a sub-task depends on another agent's answer, send it in a separate call after you receive that answer. You are responsible for relaying the responses back to the user, as the user does not have direct access to them."""
+
+    parallel_tasks: Optional[List[ParallelTask]] = Field(
+        default=None,
+        description="Independent sub-tasks for other agents that should run at the same time as the main message. Leave empty for a single-agent request."
+    )
+    timeout_seconds: Optional[int] = Field(
+        default=None,
+        description=f"Time limit for the main task in seconds when parallel_tasks are used (defaults to {DEFAULT_BRANCH_TIMEOUT})"
+    )
+
+    def _branch_completion(self, recipient: str, message: str, additional_instructions: Optional[str], message_files: Optional[List[str]]) -> str:
+        """Runs one branch on its own agent thread and returns the final response"""
+        thread = self._agents_and_threads[self._caller_agent.name][recipient]
+        with tracing.span(recipient, "agent", caller=self._caller_agent.name, parallel=True):
+            completion = thread.get_completion(
+                message=message,
+                message_files=message_files,
+                additional_instructions=additional_instructions,
+                yield_messages=False,
+            )
+            # Thread.get_completion is a generator; its return value is the response
+            while True:
+                try:
+                    next(completion)
+                except StopIteration as e:
+                    return e.value
+
+    def _cancel_branch(self, recipient: str):
+        """Best-effort cancel of the OpenAI run of a branch that timed out"""
+        try:
+            self._agents_and_threads[self._caller_agent.name][recipient]._cancel_run()
+        except Exception:
+            pass
+
+    def run(self):
+        if not self.parallel_tasks:
+            # instrument_agency already traces this run like any other tool
+            return super().run()
+
+        branches = [
+            (self.recipient.value, self.message, self.additional_instructions, self.message_files, self.timeout_seconds)
+        ]
+        for task in self.parallel_tasks:
+            branches.append((task.recipient, task.message, task.additional_instructions, None, task.timeout_seconds))
+
+        # Validate recipients before anything is sent
+        valid_recipients = self._agents_and_threads[self._caller_agent.name]
+        seen = set()
+        for recipient, *_ in branches:
+            if recipient not in valid_recipients:
+                return f"Error: Recipient {recipient} is not valid. Valid recipients are: {list(valid_recipients)}"
+            if recipient in seen:
+                return f"Error: Agent {recipient} received more than one task. Send only one task per agent in a parallel dispatch."
+            seen.add(recipient)
+
+        executor = ThreadPoolExecutor(max_workers=len(branches), thread_name_prefix="parallel-dispatch")
+        start = time.monotonic()
+        futures = [
+            executor.submit(self._branch_completion, recipient, message, instructions, files)
+            for recipient, message, instructions, files, _ in branches
+        ]
+
+        # Join in submission order so the combined output is deterministic
+        results = []
+        try:
+            for (recipient, _, _, _, timeout), future in zip(branches, futures):
+                timeout = timeout or DEFAULT_BRANCH_TIMEOUT
+                remaining = max(0.0, start + timeout - time.monotonic())
+                try:
+                    response = future.result(timeout=remaining)
+                    status = f"completed in {time.monotonic() - start:.1f}s"
+                except FutureTimeoutError:
+                    self._cancel_branch(recipient)
+                    response = f"No response: the task did not finish within {timeout} seconds."
+                    status = "timed out"
+                except Exception as e:
+                    response = f"Error: {str(e)}"
+                    status = "failed"
+                results.append((recipient, status, response))
+        finally:
+            # Timed out branches must not hold up the caller
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        output = []
+        for i, (recipient, status, response) in enumerate(results, 1):
+            output.extend([
+                f"=== [{i}/{len(results)}] {recipient} ({status}) ===",
+                str(response),
+                ""
+            ])
+        return "\n".join(output).rstrip()
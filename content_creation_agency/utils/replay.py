@@ -0,0 +1,99 @@
+"""
+Record and replay of external API responses (YouTube, Tavily, OpenAI).
+
+API_REPLAY_MODE selects the behaviour:
+    off     - call the real API (default)
+    record  - call the real API and save each response as a JSON fixture
+    replay  - serve responses from the fixtures only, never touching the network
+
+Fixtures live in API_FIXTURES_DIR/<service>/<key>.json where the key is a hash
+of the canonical request, so the same request always maps to the same file.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict
+
+MODES = ('off', 'record', 'replay')
+
+MODE = os.getenv('API_REPLAY_MODE', 'off').lower()
+FIXTURES_DIR = os.getenv('API_FIXTURES_DIR', 'fixtures/api')
+
+_lock = threading.Lock()
+_calls = Counter()
+_misses = Counter()
+
+
+class FixtureMissingError(LookupError):
+    """Raised in replay mode when no fixture was recorded for a request"""
+
+
+def set_mode(mode: str, fixtures_dir: str = None):
+    """Switch the replay mode (and optionally the fixture directory) at runtime"""
+    global MODE, FIXTURES_DIR
+    if mode not in MODES:
+        raise ValueError(f"Unknown replay mode '{mode}'. Use one of {MODES}")
+    MODE = mode
+    if fixtures_dir:
+        FIXTURES_DIR = fixtures_dir
+
+
+def fixture_key(request: Dict[str, Any]) -> str:
+    """Stable key of a request description"""
+    canonical = json.dumps(request, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+
+
+def fixture_path(service: str, request: Dict[str, Any]) -> str:
+    return os.path.join(FIXTURES_DIR, service, f"{fixture_key(request)}.json")
+
+
+def call(service: str, request: Dict[str, Any], fetch: Callable[[], Any]) -> Any:
+    """
+    Return the response for a request, going through the fixtures when
+    recording or replaying. fetch performs the real call and must return a
+    JSON-serializable value.
+    """
+    with _lock:
+        _calls[service] += 1
+
+    if MODE == 'off':
+        return fetch()
+
+    path = fixture_path(service, request)
+    if MODE == 'replay':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['response']
+        except FileNotFoundError:
+            with _lock:
+                _misses[service] += 1
+            raise FixtureMissingError(f"No {service} fixture for request {request}")
+
+    response = fetch()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'service': service, 'request': request, 'response': response}, f, ensure_ascii=False, indent=1, default=str)
+    os.replace(tmp_path, path)
+    return response
+
+
+def call_counts() -> Dict[str, int]:
+    """Number of API calls per service since the last reset_counts()"""
+    with _lock:
+        return dict(_calls)
+
+
+def miss_counts() -> Dict[str, int]:
+    """Number of replayed requests that had no fixture, per service"""
+    with _lock:
+        return dict(_misses)
+
+
+def reset_counts():
+    with _lock:
+        _calls.clear()
+        _misses.clear()
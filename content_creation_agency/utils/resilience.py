@@ -0,0 +1,280 @@
+"""
+Retries, rate limiting and circuit breaking for calls to external APIs.
+
+Every YouTube, Tavily and OpenAI call made by the tools goes through call():
+
+- a token bucket per endpoint keeps the request rate under API_RATE_LIMITS
+- transient failures (429, 5xx, rate-limit 403s, timeouts and dropped
+  connections) are retried with jittered exponential backoff, waiting at
+  least as long as the server's Retry-After asks for
+- a circuit breaker per service opens when the quota is exhausted
+  (quotaExceeded, insufficient_quota, Tavily usage limit) or after repeated
+  failures, so later calls fail immediately instead of spending more time
+  and quota until the cooldown has passed
+
+Retries, waits and breaker state are exported through utils.tracing.
+"""
+import os
+import random
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from utils import tracing
+
+MAX_ATTEMPTS = int(os.getenv('API_RETRY_MAX_ATTEMPTS', '4'))
+BASE_DELAY = float(os.getenv('API_RETRY_BASE_DELAY', '0.5'))
+# Longest single wait; a Retry-After above this is not worth blocking a tool call for
+MAX_DELAY = float(os.getenv('API_RETRY_MAX_DELAY', '30'))
+
+# Consecutive transient failures that open a service's breaker, and how long it stays open
+FAILURE_THRESHOLD = int(os.getenv('API_BREAKER_FAILURES', '5'))
+FAILURE_COOLDOWN = float(os.getenv('API_BREAKER_COOLDOWN', '30'))
+QUOTA_COOLDOWN = float(os.getenv('API_BREAKER_QUOTA_COOLDOWN', '900'))
+
+# Requests per second per service or endpoint, e.g. "youtube=20,youtube.search.list=1";
+# endpoints without their own entry share the service's bucket, 0 disables limiting
+DEFAULT_RATE_LIMITS = 'youtube=20,tavily=5,openai=10'
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+QUOTA_MARKERS = ('quotaExceeded', 'dailyLimitExceeded', 'insufficient_quota')
+RATE_LIMIT_MARKERS = ('rateLimitExceeded', 'userRateLimitExceeded')
+RETRY_EXCEPTION_NAMES = {
+    'APIConnectionError', 'APITimeoutError', 'ServerNotFoundError', 'TimeoutError',
+    'ConnectionError', 'ConnectTimeout', 'ReadTimeout', 'Timeout',
+}
+
+# Breaker states as exported in the api_circuit_state gauge
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a service whose circuit breaker is open"""
+
+
+def parse_rate_limits(spec: str) -> Dict[str, float]:
+    limits = {}
+    for pair in spec.split(','):
+        if '=' in pair:
+            name, rate = pair.split('=', 1)
+            limits[name.strip()] = float(rate)
+    return limits
+
+
+RATE_LIMITS = parse_rate_limits(os.getenv('API_RATE_LIMITS', DEFAULT_RATE_LIMITS))
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """Closed -> open on quota exhaustion or repeated failures -> half-open after the cooldown"""
+
+    def __init__(self, service: str):
+        self.service = service
+        self.state = CLOSED
+        self.failures = 0
+        self.reason = ''
+        self._opened_at = 0.0
+        self._cooldown = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: int):
+        self.state = state
+        tracing.set_gauge('api_circuit_state', state, service=self.service)
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self._opened_at + self._cooldown - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._trial_running:
+                # Let a single trial call find out whether the service has recovered
+                self._trial_running = True
+                return
+            raise CircuitOpenError(
+                f"{self.service} calls are paused after {self.reason}; "
+                f"retry in {max(0, int(remaining))} seconds"
+            )
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= FAILURE_THRESHOLD:
+                self._open(f"{self.failures} failed calls", FAILURE_COOLDOWN)
+
+    def trip(self, reason: str, cooldown: float = QUOTA_COOLDOWN):
+        """Open the breaker right away, e.g. when the quota is exhausted"""
+        with self._lock:
+            self._trial_running = False
+            self._open(reason, cooldown)
+
+    def _open(self, reason: str, cooldown: float):
+        self.reason = reason
+        self._opened_at = time.monotonic()
+        self._cooldown = cooldown
+        self._set_state(OPEN)
+        tracing.incr('api_circuit_trips_total', service=self.service)
+
+
+_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_buckets: Dict[str, Optional[TokenBucket]] = {}
+
+
+def breaker(service: str) -> CircuitBreaker:
+    with _lock:
+        if service not in _breakers:
+            _breakers[service] = CircuitBreaker(service)
+        return _breakers[service]
+
+
+def _bucket(service: str, endpoint: Optional[str]) -> Optional[TokenBucket]:
+    """The endpoint's own bucket if it has a limit, otherwise the service-wide bucket"""
+    key = endpoint if endpoint in RATE_LIMITS else service
+    with _lock:
+        if key not in _buckets:
+            rate = RATE_LIMITS.get(key, 0)
+            _buckets[key] = TokenBucket(rate) if rate > 0 else None
+        return _buckets[key]
+
+
+def reset():
+    """Forget all breaker and rate-limit state (e.g. after changing settings)"""
+    global RATE_LIMITS
+    with _lock:
+        _breakers.clear()
+        _buckets.clear()
+        RATE_LIMITS = parse_rate_limits(os.getenv('API_RATE_LIMITS', DEFAULT_RATE_LIMITS))
+
+
+def _status_and_headers(exc: Exception) -> Tuple[Optional[int], dict]:
+    """HTTP status and headers of googleapiclient, openai and requests errors"""
+    resp = getattr(exc, 'resp', None)  # googleapiclient.errors.HttpError
+    if resp is not None and hasattr(resp, 'status'):
+        return int(resp.status), dict(resp)
+    status = getattr(exc, 'status_code', None)  # openai.APIStatusError
+    response = getattr(exc, 'response', None)  # openai and requests errors
+    if status is None and response is not None:
+        status = getattr(response, 'status_code', None)
+    headers = getattr(response, 'headers', None) or {}
+    return status, {k.lower(): v for k, v in dict(headers).items()}
+
+
+def _retry_after(headers: dict) -> Optional[float]:
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form
+        from email.utils import parsedate_to_datetime
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def classify(exc: Exception) -> Tuple[str, Optional[float]]:
+    """
+    'quota' (stop calling the service), 'retry' (transient) or 'fail', plus
+    the server's Retry-After in seconds if it sent one
+    """
+    status, headers = _status_and_headers(exc)
+    text = str(exc)
+    content = getattr(exc, 'content', None)
+    if isinstance(content, bytes):
+        text += content.decode('utf-8', 'replace')
+
+    if any(marker in text for marker in QUOTA_MARKERS) or type(exc).__name__ == 'UsageLimitExceededError':
+        return 'quota', None
+    if status in RETRY_STATUSES or (status == 403 and any(m in text for m in RATE_LIMIT_MARKERS)):
+        return 'retry', _retry_after(headers)
+    if status is None and (isinstance(exc, (ConnectionError, socket.timeout))
+                           or type(exc).__name__ in RETRY_EXCEPTION_NAMES):
+        return 'retry', None
+    return 'fail', None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+    delay = random.uniform(0, min(MAX_DELAY, BASE_DELAY * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def call(service: str, fetch: Callable, endpoint: Optional[str] = None):
+    """
+    Run fetch() under the service's rate limit and circuit breaker, retrying
+    transient failures. The last error is raised when the retries run out.
+    """
+    service_breaker = breaker(service)
+    bucket = _bucket(service, endpoint)
+    labels = {'service': service, 'endpoint': endpoint or service}
+    attempt = 0
+    while True:
+        service_breaker.before_call()
+        if bucket is not None:
+            waited = bucket.acquire()
+            if waited:
+                tracing.observe('api_rate_limit_wait_seconds', waited, **labels)
+        try:
+            result = fetch()
+        except Exception as e:
+            kind, retry_after = classify(e)
+            if kind == 'quota':
+                service_breaker.trip('quotaExceeded')
+                raise
+            if kind == 'fail':
+                # The service answered (bad request, not found, ...), so it is healthy
+                service_breaker.record_success()
+                raise
+            service_breaker.record_failure()
+            attempt += 1
+            if attempt >= MAX_ATTEMPTS or (retry_after is not None and retry_after > MAX_DELAY):
+                tracing.incr('api_retries_exhausted_total', **labels)
+                raise
+            delay = backoff_delay(attempt - 1, retry_after)
+            tracing.incr('api_retries_total', **labels)
+            time.sleep(delay)
+            continue
+        service_breaker.record_success()
+        return result
@@ -0,0 +1,75 @@
+"""
+Where scripts are saved: one Markdown file per script in SCRIPTS_DIR.
+
+ScriptWriter saves a finished script in one go. ScriptDraft is used by the
+sectioned pipeline (ScriptPipeline): the file is created as soon as the
+outline exists and rewritten every time a section finishes, so the finished
+sections can be read while the rest are still being written. Every write
+replaces the file atomically, so a reader never sees half a section.
+"""
+import os
+import re
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from utils import tracing
+
+SCRIPTS_DIR = os.getenv('SCRIPTS_DIR', 'scripts')
+
+PENDING = "_(being written)_"
+
+
+def script_path(title: str) -> str:
+    """scripts/<timestamp>_<title>.md"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    name = re.sub(r'[^\w\-]+', '_', title.lower().replace(' ', '_')).strip('_') or 'script'
+    return os.path.join(SCRIPTS_DIR, f"{timestamp}_{name}.md")
+
+
+def _write(path: str, text: str, operation: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with tracing.span(operation, "disk", bytes=len(text.encode("utf-8"))):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+def save_script(title: str, content: str) -> str:
+    """Save a whole script and return its path"""
+    path = script_path(title)
+    _write(path, f"# {title}\n\n{content}", "script.write")
+    return path
+
+
+class ScriptDraft:
+    """A script file filled in section by section, in any order"""
+
+    def __init__(self, title: str, headings: List[str], path: Optional[str] = None):
+        self.title = title
+        self.headings = headings
+        self.sections: List[Optional[str]] = [None] * len(headings)
+        self.path = path or script_path(title)
+        self._lock = threading.Lock()
+        self._flush()
+
+    def _render(self) -> str:
+        parts = [f"# {self.title}"]
+        for heading, body in zip(self.headings, self.sections):
+            parts.append(f"## {heading}\n\n{body if body is not None else PENDING}")
+        return "\n\n".join(parts) + "\n"
+
+    def _flush(self):
+        _write(self.path, self._render(), "script.write_section")
+
+    def write_section(self, index: int, body: str):
+        with self._lock:
+            self.sections[index] = body.strip()
+            self._flush()
+
+    def finish(self, text: str) -> str:
+        """Replace the draft with the final script and return its path"""
+        with self._lock:
+            _write(self.path, text, "script.write")
+        return self.path
@@ -0,0 +1,342 @@
+"""
+Vector index over YouTube videos for similarity and content-gap queries.
+
+Each video (title, tags and the start of the description) is turned into word
+unigrams and bigrams, hashed into HASH_SPACE features and weighted by TF-IDF.
+The weighted features are projected into DIM dimensions with signed feature
+hashing and L2-normalised, so cosine similarity against every video is a
+single matrix-vector product (a few milliseconds for 100k videos). Unrelated
+videos score around 0 +/- 1/sqrt(DIM); a larger SIMILARITY_DIM lowers that
+noise at DIM * 4 bytes per video.
+
+Videos are added incrementally. New rows use the current IDF; when the index
+has grown by REBUILD_GROWTH since the last full build, all rows are
+re-weighted in one vectorised pass, which keeps adds amortised O(1). The
+sparse features and metadata are saved to SIMILARITY_INDEX_PATH(.npz/.json)
+and the dense matrix is rebuilt on load.
+"""
+import atexit
+import functools
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+HASH_SPACE = 1 << 20
+DIM = int(os.getenv('SIMILARITY_DIM', '512'))
+INDEX_PATH = os.getenv('SIMILARITY_INDEX_PATH', 'data/video_index')
+
+# Re-weight every row once the index is this many times larger than at the last full build
+REBUILD_GROWTH = 1.5
+
+# Rows projected per chunk during a full build and compared per chunk in coverage queries
+CHUNK_ROWS = 8192
+
+# Term weight per field; titles say most about the topic of a video
+TITLE_WEIGHT = 3.0
+TAG_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+DESCRIPTION_CHARS = 500
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can do does for from get got has have how i if in
+into is it its just let lets me more most my new no not now of on one or our out so than that the their them
+then there these they this to up us vs was we what when where which who why will with you your video videos
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+# Fixed projection so vectors stay comparable across processes and restarts
+_rng = np.random.default_rng(20240601)
+_BUCKET = _rng.integers(0, DIM, HASH_SPACE, dtype=np.int32)
+_SIGN = np.where(_rng.random(HASH_SPACE) < 0.5, -1.0, 1.0).astype(np.float32)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def stem(word: str) -> str:
+    """Crude suffix stripping so that e.g. tune, tuned and tuning share a feature"""
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if word.endswith('e') and len(word) >= 4 else word
+
+
+def terms(text: str) -> List[Tuple[str, str]]:
+    """(stemmed term, term as written) word unigrams and bigrams without stopwords or bare numbers"""
+    words = [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS and not t.isdigit() and len(t) > 1]
+    tokens = [(stem(w), w) for w in words]
+    return tokens + [(f"{a} {b}", f"{x} {y}") for (a, x), (b, y) in zip(tokens, tokens[1:])]
+
+
+@functools.lru_cache(maxsize=1 << 18)
+def feature_id(term: str) -> int:
+    """Stable hash of a term (Python's hash() changes between processes)"""
+    return zlib.crc32(term.encode('utf-8')) & (HASH_SPACE - 1)
+
+
+def video_features(title: str, tags: Iterable[str] = (), description: str = '') -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted unique feature ids and their weighted term counts"""
+    counts: Dict[int, float] = {}
+    for text, weight in ((title, TITLE_WEIGHT), (' , '.join(tags), TAG_WEIGHT),
+                         (description[:DESCRIPTION_CHARS], DESCRIPTION_WEIGHT)):
+        for term, _ in terms(text):
+            fid = feature_id(term)
+            counts[fid] = counts.get(fid, 0.0) + weight
+    ids = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    order = np.argsort(ids)
+    return ids[order], values[order]
+
+
+class VideoIndex:
+    """Incremental hashed TF-IDF index with dense projected vectors"""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+        self.meta: List[Dict] = []
+        self.rows: Dict[str, int] = {}
+        self._features: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._df = np.zeros(HASH_SPACE, dtype=np.int32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._matrix = np.zeros((1024, dim), dtype=np.float32)
+        self._count = 0
+        self._built_rows = 0
+        self.dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # Weighting and projection
+
+    def _idf(self, ids: np.ndarray) -> np.ndarray:
+        n = len(self)
+        return np.log((1.0 + n) / (1.0 + self._df[ids])).astype(np.float32) + 1.0
+
+    def _project(self, ids: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        vector = np.bincount(_BUCKET[ids] % self.dim, weights=_SIGN[ids] * counts * self._idf(ids),
+                             minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _rebuild(self):
+        """Re-weight every row with the current IDF"""
+        n = len(self.meta)
+        for start in range(0, n, CHUNK_ROWS):
+            end = min(n, start + CHUNK_ROWS)
+            chunk = self._features[start:end]
+            lengths = np.array([len(ids) for ids, _ in chunk])
+            if not lengths.sum():
+                self._matrix[start:end] = 0
+                continue
+            ids = np.concatenate([ids for ids, _ in chunk])
+            counts = np.concatenate([c for _, c in chunk])
+            rows = np.repeat(np.arange(end - start), lengths)
+            flat = rows * self.dim + _BUCKET[ids] % self.dim
+            block = np.bincount(flat, weights=_SIGN[ids] * counts * self._idf(ids), minlength=(end - start) * self.dim)
+            block = block.reshape(end - start, self.dim).astype(np.float32)
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            self._matrix[start:end] = block / np.where(norms == 0, 1, norms)
+        self._built_rows = max(1, len(self))
+
+    def _grow(self, rows: int):
+        if rows <= len(self._alive):
+            return
+        capacity = max(rows, 2 * len(self._alive))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:len(self._matrix)] = self._matrix
+        self._alive, self._matrix = alive, matrix
+
+    # Updates
+
+    def add_video(self, video_id: str, channel_id: str, title: str, tags: Iterable[str] = (), description: str = '',
+                  channel_title: str = '', views: int = 0, published: str = '') -> int:
+        """Add or replace a video and return its row"""
+        tags = list(tags or [])
+        ids, counts = video_features(title, tags, description)
+        meta = {'id': video_id, 'channel_id': channel_id, 'channel_title': channel_title,
+                'title': title, 'tags': tags[:30], 'views': int(views or 0), 'published': published}
+        with self._lock:
+            old = self.rows.get(video_id)
+            if old is not None:
+                stored = self.meta[old]
+                # Same title and no new tags (callers without videos().list have none): keep
+                # the stored vector and only refresh the statistics that were given
+                if stored['title'] == title and (not tags or stored['tags'] == meta['tags']):
+                    if views and stored['views'] != meta['views']:
+                        stored['views'] = meta['views']
+                        self.dirty = True
+                    return old
+                self._remove_row(old)
+            row = len(self.meta)
+            self._grow(row + 1)
+            self.meta.append(meta)
+            self._features.append((ids, counts))
+            self.rows[video_id] = row
+            self._alive[row] = True
+            self._count += 1
+            self._df[ids] += 1
+            self._matrix[row] = self._project(ids, counts)
+            self.dirty = True
+            if len(self) >= REBUILD_GROWTH * self._built_rows:
+                self._rebuild()
+            return row
+
+    def _remove_row(self, row: int):
+        ids, _ = self._features[row]
+        self._df[ids] -= 1
+        self._alive[row] = False
+        self._count -= 1
+        self._matrix[row] = 0
+        self._features[row] = (ids[:0], np.zeros(0, dtype=np.float32))
+
+    def add_videos(self, videos: Iterable[Dict]) -> int:
+        """Add videos given as dicts of add_video() arguments; returns how many were new"""
+        new = 0
+        for video in videos:
+            with self._lock:
+                known = video['video_id'] in self.rows
+            self.add_video(**video)
+            new += not known
+        return new
+
+    # Queries
+
+    def vector(self, text: str) -> np.ndarray:
+        """Query vector for free text, weighted like a title"""
+        with self._lock:
+            return self._project(*video_features(text))
+
+    def channels(self) -> Dict[str, str]:
+        """Title of every indexed channel by channel id"""
+        with self._lock:
+            return {m['channel_id']: m['channel_title'] for m in self.meta}
+
+    def channel_mask(self, channel_ids: Iterable[str], exclude: bool = False) -> np.ndarray:
+        channel_ids = set(channel_ids)
+        n = len(self.meta)
+        mask = np.fromiter((m['channel_id'] in channel_ids for m in self.meta), dtype=bool, count=n)
+        return (~mask if exclude else mask) & self._alive[:n]
+
+    def nearest(self, query: np.ndarray, k: int = 10, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """(row, cosine similarity) of the k most similar videos"""
+        with self._lock:
+            n = len(self.meta)
+            scores = self._matrix[:n] @ query
+            allowed = self._alive[:n] if mask is None else mask & self._alive[:n]
+            scores = np.where(allowed, scores, -np.inf)
+            k = min(k, int(allowed.sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(int(row), float(scores[row])) for row in top]
+
+    def coverage(self, rows: np.ndarray, reference: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """For each row, the highest similarity to any reference row and which reference row it is"""
+        with self._lock:
+            if not len(rows) or not len(reference):
+                return np.zeros(len(rows), dtype=np.float32), np.full(len(rows), -1)
+            ref = self._matrix[reference]
+            best = np.empty(len(rows), dtype=np.float32)
+            match = np.empty(len(rows), dtype=np.int64)
+            for start in range(0, len(rows), CHUNK_ROWS):
+                sims = self._matrix[rows[start:start + CHUNK_ROWS]] @ ref.T
+                arg = sims.argmax(axis=1)
+                best[start:start + CHUNK_ROWS] = sims[np.arange(len(arg)), arg]
+                match[start:start + CHUNK_ROWS] = reference[arg]
+            return best, match
+
+    def gap_terms(self, gap_rows: Iterable[int], own_rows: Iterable[int], top_n: int = 10) -> List[Dict]:
+        """
+        Terms that recur in the gap videos but never appear in our own videos,
+        ranked by how many gap videos use them times their IDF
+        """
+        with self._lock:
+            own_features = set()
+            for row in own_rows:
+                own_features.update(self._features[row][0].tolist())
+            found: Dict[str, Dict] = {}
+            for row in gap_rows:
+                meta = self.meta[row]
+                for term, written in dict(terms(meta['title'] + ' , ' + ' , '.join(meta['tags']))).items():
+                    fid = feature_id(term)
+                    if fid in own_features:
+                        continue
+                    entry = found.setdefault(term, {'term': written, 'videos': 0, 'views': 0, 'example': meta['title'],
+                                                    'idf': float(self._idf(np.array([fid]))[0])})
+                    entry['videos'] += 1
+                    entry['views'] += meta['views']
+            ranked = sorted(found.values(), key=lambda e: (e['videos'] * e['idf'], e['views']), reverse=True)
+            # Prefer terms shared by several videos; single-video terms fill up the list
+            shared = [e for e in ranked if e['videos'] > 1]
+            return (shared + [e for e in ranked if e['videos'] == 1])[:top_n]
+
+    # Persistence
+
+    def save(self, path: str = INDEX_PATH):
+        with self._lock:
+            lengths = np.array([len(ids) for ids, _ in self._features], dtype=np.int64)
+            indptr = np.concatenate([[0], np.cumsum(lengths)])
+            ids = np.concatenate([ids for ids, _ in self._features]) if self._features else np.zeros(0, np.int32)
+            counts = np.concatenate([c for _, c in self._features]) if self._features else np.zeros(0, np.float32)
+            alive = self._alive[:len(self.meta)].copy()
+            meta = list(self.meta)
+            self.dirty = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(f"{path}.tmp.npz", indptr=indptr, ids=ids, counts=counts, alive=alive)
+        with open(f"{path}.tmp.json", 'w', encoding='utf-8') as f:
+            json.dump({'dim': self.dim, 'videos': meta}, f)
+        os.replace(f"{path}.tmp.npz", f"{path}.npz")
+        os.replace(f"{path}.tmp.json", f"{path}.json")
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> 'VideoIndex':
+        index = cls()
+        if not (os.path.exists(f"{path}.npz") and os.path.exists(f"{path}.json")):
+            return index
+        with open(f"{path}.json", 'r', encoding='utf-8') as f:
+            index.meta = json.load(f)['videos']
+        data = np.load(f"{path}.npz")
+        indptr, ids, counts, alive = data['indptr'], data['ids'], data['counts'], data['alive']
+        index._features = [(ids[indptr[i]:indptr[i + 1]], counts[indptr[i]:indptr[i + 1]]) for i in range(len(index.meta))]
+        index._grow(len(index.meta))
+        index._alive[:len(index.meta)] = alive
+        index._count = int(alive.sum())
+        index.rows = {m['id']: row for row, m in enumerate(index.meta) if alive[row]}
+        live_ids = ids[np.repeat(alive, np.diff(indptr))]
+        index._df = np.bincount(live_ids, minlength=HASH_SPACE).astype(np.int32)
+        index._rebuild()
+        return index
+
+
+_shared: Optional[VideoIndex] = None
+_shared_lock = threading.Lock()
+
+
+def shared_index() -> VideoIndex:
+    """Process-wide index, loaded from SIMILARITY_INDEX_PATH on first use and saved at exit if changed"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = VideoIndex.load(INDEX_PATH)
+                atexit.register(_save_at_exit)
+    return _shared
+
+
+def _save_at_exit():
+    if _shared is not None and _shared.dirty:
+        try:
+            _shared.save(INDEX_PATH)
+        except Exception as e:
+            print(f"Error saving video index: {str(e)}")
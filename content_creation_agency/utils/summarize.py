@@ -0,0 +1,203 @@
+"""
+Map-reduce summaries of web search results.
+
+The content of every result is split into chunks of at most CHUNK_CHARS at
+paragraph or sentence boundaries. Each chunk is summarized on its own (map),
+on at most SUMMARY_WORKERS threads, and the notes are then condensed into one
+brief about the query that cites its sources as [n] (reduce). Map summaries do
+not depend on the query and are cached by a hash of the model and the chunk
+text in SUMMARY_CACHE_FILE, so a source that comes back in a later search is
+never summarized again. Briefs are cached by a hash of the query and notes.
+
+If a summary call fails, the chunk's opening text stands in for its summary,
+so the search still returns something useful.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from utils import llm, tracing
+
+MODEL = os.getenv('SUMMARY_MODEL', 'gpt-4o-mini')
+WORKERS = int(os.getenv('SUMMARY_WORKERS', '4'))
+CACHE_FILE = os.getenv('SUMMARY_CACHE_FILE', 'cache/summaries.sqlite')
+
+CHUNK_CHARS = 6000
+# Chunks shorter than this are passed to the reduce step as they are
+MIN_SUMMARY_CHARS = 600
+# Notes longer than this are reduced in groups first
+REDUCE_INPUT_CHARS = 24000
+# Stand-in for a summary that could not be generated
+FALLBACK_CHARS = 500
+
+MAP_PROMPT = (
+    "Summarize this excerpt of a web article in at most 5 short bullet points. Keep concrete facts: "
+    "names of companies, products and people, figures, dates and claims. Leave out navigation text, ads and opinions "
+    "without substance. If the excerpt has no real content, answer 'No content'."
+)
+REDUCE_PROMPT = (
+    "You write research briefs for a YouTube content team. Using only the numbered source notes, write a brief "
+    "about the query in at most 200 words: the main developments first, then notable figures and dates. Cite every "
+    "statement with its source number in brackets, e.g. [2]. Do not invent facts or sources."
+)
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_local = threading.local()
+
+
+def _connection() -> sqlite3.Connection:
+    """One connection per thread and process (sqlite3 connections cannot be shared)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid() or _local.path != CACHE_FILE:
+        directory = os.path.dirname(CACHE_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(CACHE_FILE, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, stored_at REAL, summary TEXT)')
+        conn.commit()
+        _local.conn, _local.pid, _local.path = conn, os.getpid(), CACHE_FILE
+    return conn
+
+
+def _cache_key(*parts: str) -> str:
+    return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _cached(key: str) -> Optional[str]:
+    try:
+        row = _connection().execute('SELECT summary FROM summaries WHERE key = ?', (key,)).fetchone()
+    except sqlite3.Error as e:
+        print(f"Error reading summary cache: {str(e)}")
+        return None
+    return row[0] if row else None
+
+
+def _store(key: str, summary: str):
+    try:
+        conn = _connection()
+        conn.execute('INSERT OR REPLACE INTO summaries (key, stored_at, summary) VALUES (?, ?, ?)',
+                     (key, time.time(), summary))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Error writing summary cache: {str(e)}")
+
+
+def split_chunks(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Split text into chunks of at most max_chars, at paragraph, then sentence, then hard boundaries"""
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+
+    chunks, current = [], ''
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _complete(system: str, user: str, max_tokens: int) -> str:
+    return llm.chat({
+        "model": MODEL,
+        "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}],
+        "temperature": 0.2,
+        "max_tokens": max_tokens,
+    }, purpose="summary").strip()
+
+
+def summarize_chunk(chunk: str) -> str:
+    """Query-independent summary of one chunk, from the cache when the same text was summarized before"""
+    if len(chunk) < MIN_SUMMARY_CHARS:
+        return chunk
+    key = _cache_key('map', MODEL, chunk)
+    summary = _cached(key)
+    tracing.record_cache('summary.map', summary is not None)
+    if summary is not None:
+        return summary
+    try:
+        summary = _complete(MAP_PROMPT, chunk, max_tokens=250)
+    except Exception as e:
+        print(f"Error summarizing search result: {str(e)}")
+        return chunk[:FALLBACK_CHARS]
+    _store(key, summary)
+    return summary
+
+
+def _reduce(query: str, notes: str, context: str = '') -> str:
+    key = _cache_key('reduce', MODEL, query, context, notes)
+    brief = _cached(key)
+    tracing.record_cache('summary.reduce', brief is not None)
+    if brief is not None:
+        return brief
+    prompt = f"Query: {query}\n\n" + (f"Search engine answer: {context}\n\n" if context else '') + f"Source notes:\n{notes}"
+    brief = _complete(REDUCE_PROMPT, prompt, max_tokens=400)
+    _store(key, brief)
+    return brief
+
+
+def summarize_results(query: str, results: List[Dict], answer: str = '') -> Tuple[str, List[Tuple[int, str, str]]]:
+    """
+    (brief, sources) for Tavily results: sources are (number, title, url) in
+    the order the results were returned, and the brief cites those numbers.
+    """
+    sources, jobs = [], []
+    for result in results:
+        content = (result.get('raw_content') or result.get('content') or '').strip()
+        if not content:
+            continue
+        number = len(sources) + 1
+        sources.append((number, result.get('title', 'Untitled'), result.get('url', '')))
+        jobs.extend((number, chunk) for chunk in split_chunks(content))
+    if not jobs:
+        return (answer or "No results with content"), sources
+
+    # Sites often syndicate the same text; summarize each distinct chunk once
+    unique = list(dict.fromkeys(chunk for _, chunk in jobs))
+    with ThreadPoolExecutor(max_workers=max(1, min(WORKERS, len(unique))), thread_name_prefix="summarize") as executor:
+        summaries = dict(zip(unique, executor.map(summarize_chunk, unique)))
+
+    notes_by_source: Dict[int, List[str]] = {}
+    for number, chunk in jobs:
+        summary = summaries[chunk]
+        if summary.strip().lower().rstrip('.') != 'no content':
+            notes_by_source.setdefault(number, []).append(summary)
+    notes = [f"[{number}] " + "\n".join(parts) for number, parts in notes_by_source.items()]
+
+    try:
+        # Very long notes are condensed in groups (keeping their source numbers) before the final brief
+        while len(notes) > 1 and sum(len(n) for n in notes) > REDUCE_INPUT_CHARS:
+            groups, current = [], []
+            for note in notes:
+                if current and sum(len(n) for n in current) + len(note) > REDUCE_INPUT_CHARS:
+                    groups.append(current)
+                    current = []
+                current.append(note)
+            groups.append(current)
+            if len(groups) == len(notes):
+                break
+            notes = [_reduce(query, "\n\n".join(group)) for group in groups]
+        brief = _reduce(query, "\n\n".join(notes), answer)
+    except Exception as e:
+        print(f"Error writing search brief: {str(e)}")
+        brief = "\n\n".join(notes)[:REDUCE_INPUT_CHARS]
+    return brief, sources
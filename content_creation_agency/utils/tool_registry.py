@@ -0,0 +1,62 @@
+"""
+Lightweight registry of the agency's tools.
+
+agency-swarm requires every tool file to be named after its class, so the
+tools can be listed from the file names in each agent's tools folder without
+importing anything. A tool module is imported only when load_tool() asks for it.
+"""
+import importlib
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Type
+
+# Agent name -> tools folder, relative to the content_creation_agency directory
+AGENT_TOOL_FOLDERS = {
+    "Content Manager": "content_manager/tools",
+    "YouTube Analyzer": "youtube_analyzer/tools",
+    "Trend Analyzer": "trend_analyzer/tools",
+}
+
+AGENCY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tools report failures as text starting with one of these (after colour codes are removed)
+ERROR_PREFIXES = ('❌', 'Error')
+
+_ANSI = re.compile(r'\x1b\[[0-9;]*m')
+
+
+@lru_cache(maxsize=None)
+def tool_index() -> Dict[str, dict]:
+    """Tool name -> {'agent', 'module', 'path'} for every tool of every agent"""
+    index = {}
+    for agent, folder in AGENT_TOOL_FOLDERS.items():
+        directory = os.path.join(AGENCY_ROOT, folder)
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith(".py") or file_name.startswith(("_", ".")):
+                continue
+            name = file_name[:-3]
+            index[name] = {
+                "agent": agent,
+                "module": f"{folder.replace('/', '.')}.{name}",
+                "path": os.path.join(directory, file_name),
+            }
+    return index
+
+
+def load_tool(name: str) -> Type:
+    """Import and return the tool class with the given name"""
+    entry = tool_index().get(name)
+    if entry is None:
+        raise KeyError(f"Unknown tool '{name}'. Available tools: {sorted(tool_index())}")
+    return getattr(importlib.import_module(entry["module"]), name)
+
+
+def plain_output(text: str) -> str:
+    """Tool output without the ANSI colour codes used for the terminal"""
+    return _ANSI.sub('', text)
+
+
+def is_error_output(text: str) -> bool:
+    """Whether a tool's plain output reports a failure"""
+    return text.lstrip().startswith(ERROR_PREFIXES)
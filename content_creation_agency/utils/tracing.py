@@ -0,0 +1,328 @@
+"""
+Timed spans, counters and latency histograms for tools, API calls and LLM hops.
+
+Tracing is off unless AGENCY_TRACING=1 is set. When it is off, span() returns a
+shared no-op object and the metric helpers return immediately, so instrumented
+call sites cost one attribute lookup and one function call.
+
+When it is on, spans are collected in memory and written at exit to
+AGENCY_TRACE_FILE in Chrome trace format (open it in chrome://tracing or
+https://ui.perfetto.dev). Counters and histograms are available as Prometheus
+text through prometheus_text() and are written to AGENCY_METRICS_FILE if set.
+"""
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+ENABLED = os.getenv('AGENCY_TRACING', '').lower() in ('1', 'true', 'yes')
+TRACE_FILE = os.getenv('AGENCY_TRACE_FILE', 'traces/agency_trace.json')
+METRICS_FILE = os.getenv('AGENCY_METRICS_FILE')
+
+# Keeps memory bounded in long sessions; later spans still feed the metrics
+MAX_EVENTS = int(os.getenv('AGENCY_TRACE_MAX_EVENTS', '200000'))
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_lock = threading.Lock()
+_events: List[Dict] = []
+_counters: Dict[Tuple, float] = {}
+_gauges: Dict[Tuple, float] = {}
+_histograms: Dict[Tuple, List] = {}
+_pid = os.getpid()
+_epoch_ns = time.perf_counter_ns()
+
+
+def _key(name: str, labels: Dict) -> Tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+class _NullSpan:
+    """Stand-in returned by span() while tracing is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed section of work that is recorded as a Chrome trace 'complete' event"""
+    __slots__ = ('name', 'category', 'args', 'start_ns')
+
+    def __init__(self, name: str, category: str, args: Dict):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start_ns = 0
+
+    def set(self, **args):
+        """Attach extra attributes (payload sizes, counts, ...) to the span"""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        _record_span(self, end_ns)
+        return False
+
+
+def _record_span(span: Span, end_ns: int):
+    duration = (end_ns - span.start_ns) / 1e9
+    event = {
+        'name': span.name,
+        'cat': span.category,
+        'ph': 'X',
+        'ts': (span.start_ns - _epoch_ns) / 1000,
+        'dur': (end_ns - span.start_ns) / 1000,
+        'pid': _pid,
+        'tid': threading.get_ident(),
+        'args': span.args,
+    }
+    labels = {'category': span.category, 'name': span.name}
+    with _lock:
+        if len(_events) < MAX_EVENTS:
+            _events.append(event)
+        _incr_locked('agency_span_calls_total', 1, labels)
+        if 'error' in span.args:
+            _incr_locked('agency_span_errors_total', 1, labels)
+        _observe_locked('agency_span_duration_seconds', duration, labels)
+
+
+def span(name: str, category: str = 'tool', **args):
+    """Context manager timing a block of work; a no-op when tracing is disabled"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(name, category, args)
+
+
+def _incr_locked(name: str, value: float, labels: Dict):
+    key = _key(name, labels)
+    _counters[key] = _counters.get(key, 0) + value
+
+
+def _observe_locked(name: str, value: float, labels: Dict):
+    key = _key(name, labels)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        # [bucket counts..., sum, count]
+        histogram = _histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if value <= bound:
+            histogram[i] += 1
+            break
+    histogram[-2] += value
+    histogram[-1] += 1
+
+
+def incr(name: str, value: float = 1, **labels):
+    """Increment a counter, e.g. incr('youtube_quota_units_total', 100, method='youtube.search.list')"""
+    if not ENABLED:
+        return
+    with _lock:
+        _incr_locked(name, value, labels)
+
+
+def observe(name: str, value: float, **labels):
+    """Record a value (in seconds) in a latency histogram"""
+    if not ENABLED:
+        return
+    with _lock:
+        _observe_locked(name, value, labels)
+
+
+def set_gauge(name: str, value: float, **labels):
+    """Set a gauge to its current value"""
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def record_cache(cache: str, hit: bool):
+    """Count a cache lookup as a hit or a miss"""
+    incr('agency_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+
+def _format_labels(labels: Tuple, extra: Tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    body = ','.join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return '{' + body + '}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text() -> str:
+    """Render all counters, gauges and histograms in Prometheus text exposition format"""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+
+    lines = []
+    typed = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in typed:
+            lines.append(f'# TYPE {name} counter')
+            typed.add(name)
+        lines.append(f'{name}{_format_labels(labels)} {value:g}')
+    for (name, labels), value in sorted(gauges.items()):
+        if name not in typed:
+            lines.append(f'# TYPE {name} gauge')
+            typed.add(name)
+        lines.append(f'{name}{_format_labels(labels)} {value:g}')
+    for (name, labels), histogram in sorted(histograms.items()):
+        if name not in typed:
+            lines.append(f'# TYPE {name} histogram')
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labels, (("le", f"{bound:g}"),))} {cumulative}')
+        lines.append(f'{name}_bucket{_format_labels(labels, (("le", "+Inf"),))} {histogram[-1]}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {histogram[-2]:.6f}')
+        lines.append(f'{name}_count{_format_labels(labels)} {histogram[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def export_chrome_trace(path: str = None) -> str:
+    """Write the collected spans as a Chrome trace / Perfetto JSON file and return its path"""
+    path = path or TRACE_FILE
+    with _lock:
+        events = list(_events)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+    return path
+
+
+def spans() -> List[Dict]:
+    """Copy of the spans collected so far, as Chrome trace events"""
+    with _lock:
+        return list(_events)
+
+
+def reset():
+    """Drop all collected spans and metrics"""
+    with _lock:
+        _events.clear()
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def _close_when_exhausted(generator, s):
+    try:
+        result = yield from generator
+    except BaseException as e:
+        s.__exit__(type(e), e, e.__traceback__)
+        raise
+    s.__exit__(None, None, None)
+    return result
+
+
+def finish_span(s, result):
+    """
+    Close an entered span once result is complete. Agent hops return generators
+    that do the actual work while they are consumed, so for those the span
+    stays open until the generator is exhausted.
+    """
+    if inspect.isgenerator(result):
+        return _close_when_exhausted(result, s)
+    if isinstance(result, str):
+        s.set(output_bytes=len(result.encode('utf-8')))
+    s.__exit__(None, None, None)
+    return result
+
+
+def _traced_tool_run(run, tool_name: str, agent_name: str, category: str):
+    @functools.wraps(run)
+    def wrapper(self):
+        args = {'agent': agent_name}
+        if category == 'llm_hop':
+            args['recipient'] = getattr(getattr(self, 'recipient', None), 'value', None)
+        s = span(tool_name, category, **args).__enter__()
+        try:
+            result = run(self)
+        except BaseException as e:
+            s.__exit__(type(e), e, e.__traceback__)
+            raise
+        return finish_span(s, result)
+    wrapper._traced = True
+    return wrapper
+
+
+def _traced_completion(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if kwargs.get('yield_messages'):
+            return method(*args, **kwargs)
+        with span(method.__name__, 'turn'):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def instrument_agency(agency):
+    """
+    Wrap the run method of every tool of every agent in a span, including the
+    SendMessage tools that represent LLM hops between agents, and time each
+    top-level turn. Call it after the Agency is created. Does nothing when
+    tracing is disabled.
+    """
+    if not ENABLED:
+        return agency
+
+    for agent in agency.agents:
+        for tool in agent.tools:
+            run = getattr(tool, 'run', None)
+            if run is None or getattr(run, '_traced', False):
+                continue
+            category = 'llm_hop' if tool.__name__.startswith('SendMessage') else 'tool'
+            tool.run = _traced_tool_run(run, tool.__name__, agent.name, category)
+
+    agency.get_completion = _traced_completion(agency.get_completion)
+    agency.get_completion_stream = _traced_completion(agency.get_completion_stream)
+    return agency
+
+
+def _export_at_exit():
+    if not _events and not _counters:
+        return
+    try:
+        export_chrome_trace()
+        if METRICS_FILE:
+            directory = os.path.dirname(METRICS_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(METRICS_FILE, 'w', encoding='utf-8') as f:
+                f.write(prometheus_text())
+    except Exception as e:
+        print(f"Error exporting traces: {str(e)}")
+
+
+if ENABLED:
+    atexit.register(_export_at_exit)
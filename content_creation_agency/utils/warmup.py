@@ -0,0 +1,140 @@
+"""
+Background warm-up of the API cache at agency startup.
+
+Most sessions start with questions about DEFAULT_CHANNEL_ID, so while the
+user types the first message the channel's statistics, latest uploads with
+their statistics and playlists are fetched ahead of time by running the same
+tools the agents call (ChannelAnalytics in its videos and playlists modes),
+so the fetched requests are exactly the ones those calls will make. Channels
+listed in COMPETITOR_WATCHLIST are warmed up for CompetitorAnalysis and
+ContentGapAnalysis as well. When the first question arrives, its tool reads
+from the cache instead of waiting on YouTube.
+
+The responses go into the API cache when API_CACHE_FILE is set. Otherwise
+they are only kept in memory (utils.cache.prefetching) for AGENCY_WARMUP_TTL
+seconds and each one is served once, so warm-up never turns on caching for
+the rest of the session. AGENCY_WARMUP=0 skips it, and cancel_warmup() stops
+it before the next tool run (e.g. when startup must stay minimal or quota is
+tight). A question that arrives while its request is still being fetched
+waits for that response instead of sending the request again (see
+utils.cache).
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils import cache, tracing
+from utils.env import load_env
+from utils.tool_registry import is_error_output, load_tool, plain_output
+
+load_env()
+
+ENABLED = os.getenv('AGENCY_WARMUP', '1').lower() not in ('0', 'false', 'no')
+WORKERS = int(os.getenv('AGENCY_WARMUP_WORKERS', '2'))
+
+# Same default as ContentGapAnalysis.videos_per_channel
+GAP_VIDEOS_PER_CHANNEL = 50
+# Playlists prefetched: the first page of playlists.list, the same request a default playlists run starts with
+PLAYLISTS = 50
+
+
+def _tool_task(tool: str, **args) -> Callable[[], Optional[str]]:
+    def task():
+        output = plain_output(str(load_tool(tool)(**args).run()))
+        return output.splitlines()[0] if is_error_output(output) else None
+    return task
+
+
+def _gap_task(channel: str) -> Callable[[], Optional[str]]:
+    def task():
+        from youtube_analyzer.tools.ContentGapAnalysis import fetch_channel_videos
+        return None if fetch_channel_videos(channel, GAP_VIDEOS_PER_CHANNEL) else f"Channel {channel} not found"
+    return task
+
+
+def plan(default_channel: Optional[str], watchlist: List[str]) -> List[Tuple[str, Callable[[], Optional[str]]]]:
+    """(name, task) pairs in the order they run; a task returns None or an error message"""
+    tasks = []
+    if default_channel:
+        tasks += [
+            ('channel', _tool_task('ChannelAnalytics', channel_input=default_channel)),
+            ('playlists', _tool_task('ChannelAnalytics', channel_input=default_channel, metric_type='playlists', max_playlists=PLAYLISTS)),
+            ('competitor', _tool_task('CompetitorAnalysis', channel_id=default_channel)),
+        ]
+    for channel in watchlist:
+        if channel.startswith('UC'):
+            tasks.append((f'competitor:{channel}', _tool_task('CompetitorAnalysis', channel_id=channel)))
+        tasks.append((f'gap:{channel}', _gap_task(channel)))
+    if default_channel and watchlist:
+        tasks.append(('gap', _gap_task(default_channel)))
+    return tasks
+
+
+class Warmup:
+    """Runs the warm-up tasks on a background thread; cancel() skips the ones not started yet"""
+
+    def __init__(self, tasks: List[Tuple[str, Callable[[], Optional[str]]]], workers: int = WORKERS):
+        self.tasks = tasks
+        self.workers = max(1, workers)
+        self.results: Dict[str, str] = {}
+        self.seconds = 0.0
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="agency-warmup", daemon=True)
+
+    def start(self) -> 'Warmup':
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """True once every task has finished or been skipped"""
+        return self._done.wait(timeout)
+
+    def _run_task(self, name: str, task: Callable[[], Optional[str]]):
+        if self._cancelled.is_set():
+            self.results[name] = 'cancelled'
+            return
+        try:
+            with tracing.span(name, 'warmup'), cache.prefetching():
+                error = task()
+        except Exception as e:
+            error = str(e)
+        self.results[name] = 'ok' if error is None else f"error: {error}"
+        tracing.incr('warmup_tasks_total', result='ok' if error is None else 'error')
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="agency-warmup") as executor:
+                for name, task in self.tasks:
+                    executor.submit(self._run_task, name, task)
+        finally:
+            self.seconds = time.perf_counter() - started
+            tracing.observe('warmup_seconds', self.seconds)
+            self._done.set()
+
+
+_warmup: Optional[Warmup] = None
+_lock = threading.Lock()
+
+
+def start_warmup() -> Optional[Warmup]:
+    """Start the warm-up once per process (later calls return the same one); None when disabled"""
+    global _warmup
+    if not ENABLED:
+        return None
+    with _lock:
+        if _warmup is None:
+            watchlist = [c.strip() for c in os.getenv('COMPETITOR_WATCHLIST', '').split(',') if c.strip()]
+            _warmup = Warmup(plan(os.getenv('DEFAULT_CHANNEL_ID'), watchlist)).start()
+        return _warmup
+
+
+def cancel_warmup():
+    if _warmup is not None:
+        _warmup.cancel()
@@ -0,0 +1,153 @@
+"""
+Shared construction of the YouTube Data API client.
+
+All tools build their client through build_youtube() so that every outbound
+request goes through InstrumentedHttpRequest, the single place where requests
+are timed, sized, charged against the daily quota of one of the pooled API
+keys (utils.youtube_keys), retried and rate limited (utils.resilience),
+cached (utils.cache) and recorded or replayed. It also adds the fields=
+projection of the calling code (utils.youtube_fields), so responses only
+carry the fields the tools read.
+"""
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest, build_http
+import os
+import sys
+import threading
+import urllib.parse
+
+from utils import cache, replay, resilience, tracing, youtube_fields, youtube_keys
+
+# Quota cost of each API method in units; everything not listed costs 1
+# https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+    'youtube.search.list': 100,
+}
+
+
+_local = threading.local()
+
+
+def quota_cost(method_id: str) -> int:
+    """Quota units charged for one call of the given API method"""
+    return QUOTA_COSTS.get(method_id, 1)
+
+
+def _thread_http():
+    """httplib2 is not thread-safe, so every thread gets its own connection object"""
+    http = getattr(_local, 'http', None)
+    if http is None:
+        http = _local.http = build_http()
+    return http
+
+
+def _with_param(uri: str, name: str, value: str) -> str:
+    """Set one query parameter of a request URI"""
+    parsed = urllib.parse.urlsplit(uri)
+    query = [(k, v) for k, v in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True) if k != name]
+    query.append((name, value))
+    return urllib.parse.urlunsplit(parsed._replace(query=urllib.parse.urlencode(query)))
+
+
+def _with_key(uri: str, key: str) -> str:
+    """Replace the key query parameter of a request URI"""
+    return _with_param(uri, 'key', key)
+
+
+class InstrumentedHttpRequest(HttpRequest):
+    """HttpRequest that records a span, payload size and quota units for every call"""
+
+    # Whether execute() added a fields= projection
+    _projected = False
+
+    def execute(self, http=None, num_retries=0):
+        http = http or _thread_http()
+        site = youtube_fields.call_site(sys._getframe(1))
+        self._projected = False
+        fields = youtube_fields.projection(site, self.methodId)
+        if fields and 'fields=' not in self.uri:
+            # Before the replay request is built, so cache entries and fixtures are per projection
+            self.uri = _with_param(self.uri, 'fields', fields)
+            self._projected = True
+        response = self._execute_cached(http)
+        if youtube_fields.MODE == 'audit':
+            return youtube_fields.audit_response(site, self.methodId, response)
+        return response
+
+    def _execute_cached(self, http):
+        # Retries are handled by utils.resilience, not by googleapiclient's num_retries
+        fetch = lambda: resilience.call('youtube', lambda: self._execute_with_pool(http), endpoint=self.methodId)
+        if replay.MODE == 'off' and not cache.in_use():
+            return fetch()
+        request = self._replay_request()
+        return cache.call('youtube', request, lambda: replay.call('youtube', request, fetch))
+
+    def _replay_request(self) -> dict:
+        """Canonical description of the request for fixture lookup (without the API key)"""
+        parsed = urllib.parse.urlsplit(self.uri)
+        query = sorted(
+            (k, v) for k, v in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True) if k != 'key'
+        )
+        return {'method': self.methodId, 'path': parsed.path, 'query': query, 'body': self.body}
+
+    def _execute_with_pool(self, http):
+        """Send the request with the key that has the most quota left, failing over on quotaExceeded"""
+        pool = youtube_keys.pool()
+        if not pool.keys:
+            return self._execute(http, 0)
+        units = quota_cost(self.methodId or 'youtube.unknown')
+        while True:
+            key = pool.acquire(units)
+            self.uri = _with_key(self.uri, key)
+            try:
+                return self._execute(http, 0)
+            except Exception as e:
+                if resilience.classify(e)[0] != 'quota':
+                    raise
+                pool.mark_exhausted(key)
+                # With every key exhausted the error reaches resilience, which opens the breaker
+                if not pool.available():
+                    raise
+                tracing.incr('youtube_key_failovers_total')
+
+    def _execute(self, http, num_retries):
+        if not tracing.ENABLED:
+            return super().execute(http=http, num_retries=num_retries)
+
+        method_id = self.methodId or 'youtube.unknown'
+        units = quota_cost(method_id)
+        payload = {'bytes': 0}
+        postproc = self.postproc
+
+        def measured_postproc(resp, content):
+            payload['bytes'] = len(content or b'')
+            return postproc(resp, content)
+
+        self.postproc = measured_postproc
+        try:
+            with tracing.span(method_id, 'youtube', quota_units=units, projected=self._projected) as span:
+                result = super().execute(http=http, num_retries=num_retries)
+                span.set(response_bytes=payload['bytes'])
+        finally:
+            self.postproc = postproc
+            tracing.incr('youtube_requests_total', method=method_id)
+            tracing.incr('youtube_quota_units_total', units, method=method_id)
+            tracing.incr('youtube_response_bytes_total', payload['bytes'], method=method_id,
+                         projected='yes' if self._projected else 'no')
+        return result
+
+
+def build_youtube():
+    """
+    Build a YouTube Data API v3 client. The key of every request is picked from
+    the pool in utils.youtube_keys (YOUTUBE_API_KEYS, or YOUTUBE_API_KEY).
+    YOUTUBE_API_ENDPOINT points the client at another server (e.g. the load-test stub).
+    """
+    endpoint = os.getenv('YOUTUBE_API_ENDPOINT')
+    keys = youtube_keys.pool().keys
+    return build(
+        'youtube', 'v3',
+        developerKey=keys[0] if keys else None,
+        requestBuilder=InstrumentedHttpRequest,
+        client_options={'api_endpoint': endpoint} if endpoint else None
+    )
@@ -0,0 +1,298 @@
+"""
+fields= projections for YouTube Data API requests.
+
+The tools ask for broad part= sets and read a handful of fields. PROJECTIONS
+lists, for every call site (tool module, calling function, API method), the
+response fields that code reads, and utils.youtube_api adds the matching
+fields= parameter to the request, so the API only sends those. A call site
+that is not listed, or a request that already has fields=, is sent unchanged.
+
+YOUTUBE_FIELDS selects the behaviour:
+    1      - apply the projections (default)
+    0      - send every request without fields=
+    audit  - send requests without fields= and record which fields each call
+             site actually reads; at exit, print per call site the derived
+             projection, fields read but missing from PROJECTIONS, and the
+             JSON bytes of the full responses against the projected ones
+
+Paths are dotted ('items.snippet.title'); list elements share their list's
+path. Run a tool once with YOUTUBE_FIELDS=audit after changing which fields it
+reads, and update its entry here; benchmarks.fields checks the table. Fields are only ever valid names from the
+API's schema: a name the API does not know makes the request fail.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MODES = ('0', '1', 'audit')
+
+MODE = os.getenv('YOUTUBE_FIELDS', '1').lower()
+
+COMMENT_FIELDS = ['textDisplay', 'likeCount', 'publishedAt', 'authorDisplayName', 'parentId']
+UPLOADS = 'items.contentDetails.relatedPlaylists.uploads'
+
+def _paths(prefix: str, names: Iterable[str]) -> List[str]:
+    return [f"{prefix}.{name}" for name in names]
+
+# (module, function, method id) -> response paths read by that code.
+# `python -m benchmarks.fields` fails when a youtube...execute() call in a tool
+# has no entry here or an entry matches no call; with --audit it also fails when
+# a call site reads a field its entry leaves out.
+PROJECTIONS: Dict[Tuple[str, str, str], List[str]] = {
+    ('CommentSentiment', 'get_thread_replies', 'youtube.comments.list'):
+        ['nextPageToken'] + _paths('items.snippet', COMMENT_FIELDS),
+    ('CommentSentiment', 'iter_comments', 'youtube.commentThreads.list'):
+        ['nextPageToken', 'items.id', 'items.snippet.totalReplyCount']
+        + _paths('items.snippet.topLevelComment.snippet', COMMENT_FIELDS)
+        + _paths('items.replies.comments.snippet', COMMENT_FIELDS),
+    ('CommentSentiment', 'run', 'youtube.videos.list'):
+        _paths('items.snippet', ['title', 'channelTitle', 'publishedAt'])
+        + _paths('items.statistics', ['viewCount', 'commentCount']),
+
+    ('ChannelAnalytics', '_extract_channel_id', 'youtube.search.list'): ['items.snippet.channelId'],
+    ('ChannelAnalytics', 'run', 'youtube.channels.list'):
+        _paths('items.snippet', ['title', 'publishedAt', 'country', 'defaultLanguage', 'description'])
+        + _paths('items.statistics', ['subscriberCount', 'videoCount', 'viewCount']) + [UPLOADS],
+    ('ChannelAnalytics', 'run', 'youtube.playlistItems.list'):
+        _paths('items.snippet', ['title', 'publishedAt', 'description']) + ['items.contentDetails.videoId'],
+    ('ChannelAnalytics', 'run', 'youtube.videos.list'):
+        ['items.id'] + _paths('items.statistics', ['viewCount', 'likeCount', 'commentCount']),
+    ('ChannelAnalytics', 'run', 'youtube.playlists.list'):
+        ['items.snippet.title', 'items.contentDetails.itemCount'],
+    ('ChannelAnalytics', '_playlist_analytics', 'youtube.playlists.list'):
+        ['nextPageToken', 'items.id', 'items.snippet.title'],
+    ('ChannelAnalytics', '_playlist_summary', 'youtube.playlistItems.list'):
+        ['nextPageToken', 'items.contentDetails.videoId'],
+    ('ChannelAnalytics', '_playlist_video_stats', 'youtube.videos.list'):
+        ['items.id', 'items.statistics.viewCount', 'items.statistics.likeCount'],
+
+    ('CompetitorAnalysis', '_extract_channel_id', 'youtube.search.list'): ['items.snippet.channelId'],
+    ('CompetitorAnalysis', 'run', 'youtube.channels.list'):
+        ['items.id', 'items.snippet.title', 'items.snippet.description', UPLOADS]
+        + _paths('items.statistics', ['subscriberCount', 'videoCount', 'viewCount']),
+    ('CompetitorAnalysis', 'run', 'youtube.playlistItems.list'):
+        _paths('items.snippet', ['title', 'publishedAt', 'description', 'resourceId.videoId']),
+
+    ('ContentGapAnalysis', 'resolve_channel', 'youtube.channels.list'): ['items.snippet.title', UPLOADS],
+    ('ContentGapAnalysis', 'fetch_channel_videos', 'youtube.playlistItems.list'):
+        ['nextPageToken', 'items.contentDetails.videoId'],
+    ('ContentGapAnalysis', 'fetch_channel_videos', 'youtube.videos.list'):
+        ['items.id'] + _paths('items.snippet', ['title', 'tags', 'description', 'publishedAt'])
+        + _paths('items.statistics', ['viewCount', 'likeCount', 'commentCount']),
+
+    ('ChannelSentiment', '_uploads_playlist', 'youtube.channels.list'): ['items.snippet.title', UPLOADS],
+    ('ChannelSentiment', '_list_videos', 'youtube.playlistItems.list'):
+        ['nextPageToken', 'items.contentDetails.videoId', 'items.contentDetails.videoPublishedAt',
+         'items.snippet.title', 'items.snippet.publishedAt'],
+
+    ('VideoPerformance', 'run', 'youtube.videos.list'):
+        _paths('items.snippet', ['title', 'channelTitle', 'publishedAt', 'description', 'tags'])
+        + _paths('items.statistics', ['viewCount', 'likeCount', 'commentCount'])
+        + ['items.contentDetails.duration'],
+}
+
+# Paths the code reads that the API never returns for its request, so no projection can include them
+NEVER_RETURNED = {
+    # topicDetails is not in part= and brandingSettings has no customUrls field
+    ('ChannelAnalytics', 'run', 'youtube.channels.list'): {'items.topicDetails', 'items.brandingSettings.channel.customUrls'},
+}
+
+
+def set_mode(mode: str):
+    """Switch the mode at runtime"""
+    global MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown YOUTUBE_FIELDS mode '{mode}'. Use one of {MODES}")
+    MODE = mode
+
+
+def call_site(frame) -> Tuple[str, str]:
+    """(module, function) of the code that executes a request"""
+    code = frame.f_code
+    return os.path.splitext(os.path.basename(code.co_filename))[0], code.co_name
+
+
+def _tree(paths: Iterable[str]) -> Dict:
+    tree: Dict = {}
+    for path in paths:
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _render(tree: Dict) -> str:
+    parts = []
+    for name, children in tree.items():
+        if not children:
+            parts.append(name)
+        elif len(children) == 1:
+            parts.append(f"{name}/{_render(children)}")
+        else:
+            parts.append(f"{name}({_render(children)})")
+    return ','.join(parts)
+
+
+_rendered: Dict[Tuple[str, ...], str] = {}
+
+
+def fields_param(paths: List[str]) -> str:
+    """fields= value selecting the given paths, e.g. 'nextPageToken,items(id,snippet/title)'"""
+    key = tuple(paths)
+    value = _rendered.get(key)
+    if value is None:
+        value = _rendered[key] = _render(_tree(paths))
+    return value
+
+
+def projection(site: Tuple[str, str], method_id: str) -> Optional[str]:
+    """fields= value for a call site, or None to send the request unchanged"""
+    if MODE != '1':
+        return None
+    paths = PROJECTIONS.get((*site, method_id))
+    return fields_param(paths) if paths else None
+
+
+def project(value, tree: Dict):
+    """Local equivalent of a fields= projection (used to size projected responses in audit mode)"""
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if isinstance(value, dict) and tree:
+        return {k: project(v, tree[k]) for k, v in value.items() if k in tree}
+    return value
+
+
+# Audit mode: fields read per call site and response sizes
+
+class _Audit:
+    def __init__(self):
+        self.used = set()
+        self.whole = set()
+        self.requests = 0
+        self.full_bytes = 0
+        self.projected_bytes = 0
+
+
+_audits: Dict[Tuple[str, str, str], _Audit] = {}
+_audit_lock = threading.Lock()
+
+
+class _TrackedDict(dict):
+    """dict that records the paths read from it; iterating it counts as reading all of it"""
+
+    def __init__(self, data: Dict, path: str, audit: _Audit):
+        super().__init__((k, _track(v, f"{path}.{k}" if path else k, audit)) for k, v in data.items())
+        self._path = path
+        self._audit = audit
+
+    def _read(self, key):
+        self._audit.used.add(f"{self._path}.{key}" if self._path else key)
+
+    def _read_all(self):
+        if self._path:
+            self._audit.whole.add(self._path)
+
+    def __getitem__(self, key):
+        self._read(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self._read(key)
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        self._read(key)
+        return super().__contains__(key)
+
+    def __iter__(self):
+        self._read_all()
+        return super().__iter__()
+
+    def keys(self):
+        self._read_all()
+        return super().keys()
+
+    def values(self):
+        self._read_all()
+        return super().values()
+
+    def items(self):
+        self._read_all()
+        return super().items()
+
+
+def _track(value, path: str, audit: _Audit):
+    if isinstance(value, dict):
+        return _TrackedDict(value, path, audit)
+    if isinstance(value, list):
+        return [_track(item, path, audit) for item in value]
+    return value
+
+
+def audit_response(site: Tuple[str, str], method_id: str, response):
+    """Record the size of a full response and return a copy that records the fields read from it"""
+    key = (*site, method_id)
+    with _audit_lock:
+        audit = _audits.get(key)
+        if audit is None:
+            audit = _audits[key] = _Audit()
+            if len(_audits) == 1:
+                atexit.register(print_audit)
+    declared = PROJECTIONS.get(key)
+    full = len(json.dumps(response, separators=(',', ':')))
+    projected = len(json.dumps(project(response, _tree(declared)), separators=(',', ':'))) if declared else full
+    with _audit_lock:
+        audit.requests += 1
+        audit.full_bytes += full
+        audit.projected_bytes += projected
+    return _track(response, '', audit)
+
+
+def derived_paths(audit: _Audit) -> List[str]:
+    """Smallest set of paths covering everything read: the deepest reads, and whole objects that were iterated"""
+    used = audit.used | audit.whole
+    paths = []
+    for path in sorted(used):
+        if any(path.startswith(w + '.') for w in audit.whole):
+            continue
+        if path not in audit.whole and any(other.startswith(path + '.') for other in used):
+            continue
+        paths.append(path)
+    return paths
+
+
+def _covered(path: str, declared: List[str]) -> bool:
+    return any(path == d or path.startswith(d + '.') or d.startswith(path + '.') for d in declared)
+
+
+def audit_report() -> List[str]:
+    """Per call site: requests, bytes full vs. projected, derived fields= and fields missing from PROJECTIONS"""
+    lines = []
+    with _audit_lock:
+        audits = sorted(_audits.items())
+    for (module, function, method_id), audit in audits:
+        derived = derived_paths(audit)
+        declared = PROJECTIONS.get((module, function, method_id))
+        saved = 1 - audit.projected_bytes / audit.full_bytes if audit.full_bytes else 0.0
+        lines.append(f"{module}.{function} {method_id}: {audit.requests} requests, "
+                     f"{audit.full_bytes} JSON bytes, {audit.projected_bytes} projected ({saved:.0%} smaller)")
+        lines.append(f"    read:     {fields_param(derived) if derived else '(nothing)'}")
+        if declared is None:
+            lines.append("    declared: none, add this call site to PROJECTIONS")
+            continue
+        lines.append(f"    declared: {fields_param(declared)}")
+        absent = NEVER_RETURNED.get((module, function, method_id), set())
+        missing = [p for p in derived if not _covered(p, declared) and p not in absent]
+        if missing:
+            lines.append(f"    MISSING from the projection: {', '.join(missing)}")
+    return lines
+
+
+def print_audit():
+    lines = audit_report()
+    if lines:
+        print("\nYouTube fields audit", file=sys.stderr)
+        print("\n".join(lines), file=sys.stderr)
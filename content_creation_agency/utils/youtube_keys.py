@@ -0,0 +1,198 @@
+"""
+Pool of YouTube Data API keys with local per-key quota accounting.
+
+YOUTUBE_API_KEYS holds a comma-separated list of keys (usually from different
+Google Cloud projects); YOUTUBE_API_KEY alone still works as a pool of one.
+Every request is charged to the key with the most units left for the day.
+The local counts are estimates and only decide the order in which keys are
+used; a key leaves the rotation only when the API answers quotaExceeded, until
+the quota resets at midnight Pacific time. Set YOUTUBE_QUOTA_FILE to keep the counts
+across restarts.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from utils import tracing
+
+DAILY_QUOTA = int(os.getenv('YOUTUBE_DAILY_QUOTA', '10000'))
+QUOTA_FILE = os.getenv('YOUTUBE_QUOTA_FILE')
+
+# How often the quota file is rewritten at most, in seconds
+SAVE_INTERVAL = 5.0
+
+try:
+    from zoneinfo import ZoneInfo
+    _QUOTA_TZ = ZoneInfo('America/Los_Angeles')
+except Exception:
+    # No tz database available: Pacific standard time is close enough
+    _QUOTA_TZ = timezone(timedelta(hours=-8))
+
+
+class QuotaExhaustedError(RuntimeError):
+    """Raised when no key in the pool has quota left today"""
+
+
+def quota_day() -> str:
+    """The YouTube quota day (it resets at midnight Pacific time)"""
+    return datetime.now(_QUOTA_TZ).date().isoformat()
+
+
+def mask(key: str) -> str:
+    """Key label that is safe to show in logs and metrics"""
+    return f"...{key[-4:]}" if len(key) > 8 else "..."
+
+
+def fingerprint(key: str) -> str:
+    """Stable id of a key for the quota file, so the key itself is never written to disk"""
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+class KeyPool:
+    """Routes each request to the key with the most quota headroom"""
+
+    def __init__(self, keys: List[str], daily_quota: int = DAILY_QUOTA, state_file: Optional[str] = None):
+        self.keys = list(dict.fromkeys(k for k in keys if k))
+        self.daily_quota = daily_quota
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._day = quota_day()
+        self._used: Dict[str, int] = {key: 0 for key in self.keys}
+        self._exhausted = set()
+        self._saved_at = 0.0
+        self._load()
+
+    def _roll_over(self):
+        """Start a fresh quota day if midnight Pacific has passed"""
+        today = quota_day()
+        if today != self._day:
+            self._day = today
+            self._used = {key: 0 for key in self.keys}
+            self._exhausted.clear()
+
+    def remaining(self) -> Dict[str, int]:
+        """Estimated units left today per key (0 for keys out of rotation)"""
+        with self._lock:
+            self._roll_over()
+            return {
+                key: 0 if key in self._exhausted else max(0, self.daily_quota - self._used[key])
+                for key in self.keys
+            }
+
+    def available(self) -> int:
+        """Keys still in rotation today"""
+        with self._lock:
+            self._roll_over()
+            return len(self.keys) - len(self._exhausted)
+
+    def acquire(self, units: int) -> str:
+        """Charge units to the key with the most headroom and return it"""
+        with self._lock:
+            self._roll_over()
+            candidates = [key for key in self.keys if key not in self._exhausted]
+            if not candidates:
+                raise QuotaExhaustedError(
+                    f"quotaExceeded: all {len(self.keys)} YouTube API key(s) are out of quota until midnight Pacific time"
+                )
+            # Prefer keys that can pay for the whole request. Local counts are estimates,
+            # so a key that looks too low is still tried as a last resort
+            affordable = [k for k in candidates if self.daily_quota - self._used[k] >= units]
+            key = min(affordable or candidates, key=lambda k: self._used[k])
+            self._used[key] += units
+            remaining = self.daily_quota - self._used[key]
+        tracing.set_gauge('youtube_key_remaining_units', max(0, remaining), key=mask(key))
+        self._maybe_save()
+        return key
+
+    def mark_exhausted(self, key: str):
+        """Take a key out of rotation for the rest of the quota day"""
+        with self._lock:
+            self._roll_over()
+            self._exhausted.add(key)
+            available = len(self.keys) - len(self._exhausted)
+        tracing.set_gauge('youtube_key_remaining_units', 0, key=mask(key))
+        tracing.set_gauge('youtube_keys_available', available)
+        tracing.incr('youtube_key_exhausted_total', key=mask(key))
+        self._maybe_save(force=True)
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading YouTube quota file: {str(e)}")
+            return
+        if state.get('day') != self._day:
+            return
+        for key in self.keys:
+            entry = state.get('keys', {}).get(fingerprint(key), {})
+            self._used[key] = int(entry.get('used', 0))
+            if entry.get('exhausted'):
+                self._exhausted.add(key)
+
+    def _maybe_save(self, force: bool = False):
+        if not self.state_file:
+            return
+        now = time.monotonic()
+        if not force and now - self._saved_at < SAVE_INTERVAL:
+            return
+        self._saved_at = now
+        self.save()
+
+    def save(self):
+        """Write today's usage to the quota file"""
+        if not self.state_file:
+            return
+        with self._lock:
+            state = {
+                'day': self._day,
+                'keys': {fingerprint(k): {'used': self._used[k], 'exhausted': k in self._exhausted} for k in self.keys},
+            }
+        try:
+            directory = os.path.dirname(self.state_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.state_file}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=1)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            print(f"Error writing YouTube quota file: {str(e)}")
+
+
+def keys_from_env() -> List[str]:
+    keys = [k.strip() for k in os.getenv('YOUTUBE_API_KEYS', '').split(',') if k.strip()]
+    single = os.getenv('YOUTUBE_API_KEY')
+    if single and single not in keys:
+        keys.append(single)
+    return keys
+
+
+_pool: Optional[KeyPool] = None
+_pool_lock = threading.Lock()
+
+
+def pool() -> KeyPool:
+    """The process-wide key pool, created from the environment on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = KeyPool(keys_from_env(), state_file=QUOTA_FILE)
+                if QUOTA_FILE:
+                    atexit.register(_pool.save)
+    return _pool
+
+
+def reset():
+    """Rebuild the pool from the environment on next use"""
+    global _pool
+    with _pool_lock:
+        _pool = None
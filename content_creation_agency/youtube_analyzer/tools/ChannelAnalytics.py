@@ -1,10 +1,14 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
-from dotenv import load_dotenv
-from googleapiclient.discovery import build
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from utils import cache
+from utils.clients import youtube
+from utils.env import load_env
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, List, Optional
+import numpy as np
 import re
 
 # ANSI color codes for terminal output
@@ -16,12 +20,16 @@ ENDC = '\033[0m'
 BOLD = '\033[1m'
 UNDERLINE = '\033[4m'
 
-load_dotenv()
+load_env()
 
-# Initialize YouTube API and get default channel
-youtube = build('youtube', 'v3', developerKey=os.getenv('YOUTUBE_API_KEY'))
+# The YouTube client is built on first use (see utils.clients)
 default_channel = os.getenv('DEFAULT_CHANNEL_ID')  # Get channel ID from .env
 
+# Playlists fetched at the same time in playlists mode
+PLAYLIST_FETCH_WORKERS = int(os.getenv('PLAYLIST_FETCH_WORKERS', '4'))
+# Video statistics remembered across playlists (a video is often in several); cleared when full
+STATS_MEMO_LIMIT = 20000
+
 class ChannelAnalytics(BaseTool):
     """
     Analyzes YouTube channel statistics and public data
@@ -32,7 +40,12 @@ class ChannelAnalytics(BaseTool):
     )
     metric_type: str = Field(
         default="videos",
-        description="Type of analysis (statistics, videos, playlists)"
+        description="Type of analysis (statistics, videos, playlists). playlists analyzes every playlist: views per playlist and how viewing drops from the first episode to the last"
+    )
+    max_playlists: int = Field(
+        default=1000,
+        ge=1,
+        description="Most playlists analyzed in playlists mode"
     )
     
     def _format_number(self, num_str: str) -> str:
@@ -121,6 +134,172 @@ class ChannelAnalytics(BaseTool):
         
         return "\n".join(output)
 
+    def _playlist_video_stats(self, video_ids: List[str], memo: Dict[str, tuple], memo_lock) -> Dict[str, tuple]:
+        """(views, likes) per video, 50 ids per request; videos without statistics (private, deleted) are left out"""
+        with memo_lock:
+            known = {v: memo[v] for v in video_ids if v in memo}
+        missing = [v for v in video_ids if v not in known]
+        for start in range(0, len(missing), 50):
+            response = youtube.videos().list(
+                part="statistics",
+                id=",".join(missing[start:start + 50])
+            ).execute()
+            fetched = {
+                item['id']: (int(item['statistics'].get('viewCount', 0)), int(item['statistics'].get('likeCount', 0)))
+                for item in response.get('items', [])
+            }
+            known.update(fetched)
+            with memo_lock:
+                if len(memo) + len(fetched) > STATS_MEMO_LIMIT:
+                    memo.clear()
+                memo.update(fetched)
+        return known
+
+    def _playlist_summary(self, playlist: Dict, position: int, memo: Dict[str, tuple], memo_lock) -> Optional[Dict]:
+        """Totals, median and episode decay of one playlist; only the summary is kept, not its videos"""
+        views, likes = [], []
+        next_page_token = None
+        while True:
+            response = youtube.playlistItems().list(
+                part="contentDetails",
+                playlistId=playlist['id'],
+                maxResults=50,
+                pageToken=next_page_token
+            ).execute()
+            page_ids = [item['contentDetails']['videoId'] for item in response.get('items', [])]
+            stats = self._playlist_video_stats(page_ids, memo, memo_lock)
+            # Items come in playlist order, so position in these lists is the episode number
+            for video_id in page_ids:
+                if video_id in stats:
+                    views.append(stats[video_id][0])
+                    likes.append(stats[video_id][1])
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
+        if not views:
+            return None
+
+        v = np.asarray(views, dtype=np.float64)
+        summary = {
+            'title': playlist['snippet']['title'],
+            'id': playlist['id'],
+            'position': position,
+            'videos': len(v),
+            'total_views': int(v.sum()),
+            'median_views': float(np.median(v)),
+            'total_likes': int(np.sum(likes)),
+            'second_ratio': None,
+            'last_ratio': None,
+            'decay': None,
+        }
+        if len(v) >= 2 and v[0] > 0:
+            ratios = v / v[0]
+            summary['second_ratio'] = float(ratios[1])
+            summary['last_ratio'] = float(ratios[-1])
+            # Fitted share of viewers kept from one episode to the next: slope of log views over episode number
+            episodes = np.arange(len(v), dtype=np.float64)
+            slope = np.polyfit(episodes, np.log1p(v), 1)[0]
+            summary['decay'] = float(np.exp(slope))
+        return summary
+
+    def _playlist_analytics(self, channel_id: str) -> List[str]:
+        """Page through every playlist of the channel (up to max_playlists) and summarize each one"""
+        memo, memo_lock = {}, threading.Lock()
+        summaries, failed, listed, pending = [], [], 0, {}
+
+        def collect(done):
+            # One playlist that fails (deleted mid-run, API error) is reported; the others are still summarized
+            for future in done:
+                playlist, position = pending.pop(future)
+                try:
+                    summaries.append(future.result())
+                except Exception as e:
+                    # HttpError's reason without the request URL (which holds the API key)
+                    failed.append((position, playlist['snippet']['title'], getattr(e, 'reason', None) or str(e)))
+
+        executor = ThreadPoolExecutor(max_workers=PLAYLIST_FETCH_WORKERS, thread_name_prefix="playlist-analytics")
+        # Under the startup warm-up the pool threads must prefetch too
+        summarize = cache.carry(self._playlist_summary)
+        try:
+            next_page_token = None
+            while listed < self.max_playlists:
+                response = youtube.playlists().list(
+                    part="snippet,contentDetails",
+                    channelId=channel_id,
+                    maxResults=min(50, self.max_playlists - listed),
+                    pageToken=next_page_token
+                ).execute()
+                for playlist in response.get('items', []):
+                    listed += 1
+                    # Keep only a few playlists in flight so memory stays flat on channels with hundreds of them
+                    while len(pending) >= PLAYLIST_FETCH_WORKERS * 2:
+                        collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                    pending[executor.submit(summarize, playlist, listed, memo, memo_lock)] = (playlist, listed)
+                next_page_token = response.get('nextPageToken')
+                if not next_page_token:
+                    break
+            collect(wait(pending).done)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        # Back in the channel's playlist order, whatever order they finished in
+        summaries = sorted((summary for summary in summaries if summary), key=lambda summary: summary['position'])
+
+        output = [
+            "",
+            f"{BOLD}📑 PLAYLIST ANALYTICS{ENDC}",
+            f"{'─' * 30}",
+        ]
+        failures = [f"{RED}❌ {title}: {error}{ENDC}" for _, title, error in sorted(failed)]
+        if not summaries:
+            output.append("No playlists with public videos" if not failed else f"{RED}No playlist could be analyzed{ENDC}")
+            return output + failures
+
+        total_views = np.array([p['total_views'] for p in summaries], dtype=np.float64)
+        series = [p for p in summaries if p['decay'] is not None]
+        output.extend([
+            f"{BLUE}Playlists Analyzed:{ENDC} {len(summaries)}" + (f" (first {self.max_playlists})" if listed >= self.max_playlists else ""),
+            f"{BLUE}Videos in Playlists:{ENDC} {sum(p['videos'] for p in summaries)}",
+            f"{BLUE}Playlist Views:{ENDC}    {self._format_number(int(total_views.sum()))}",
+            f"{BLUE}Median Playlist:{ENDC}   {self._format_number(int(np.median(total_views)))} views",
+        ])
+        if failed:
+            output.append(f"{RED}Playlists Failed:{ENDC}  {len(failed)} (listed at the end)")
+        if series:
+            second = np.array([p['second_ratio'] for p in series])
+            last = np.array([p['last_ratio'] for p in series])
+            decay = np.array([p['decay'] for p in series])
+            output.extend([
+                "",
+                f"{YELLOW}Episode Decay (median over {len(series)} playlists with 2+ videos):{ENDC}",
+                f"   Episode 2 vs. 1:    {np.median(second):.0%} of the views",
+                f"   Last vs. episode 1: {np.median(last):.0%} of the views",
+                f"   Per episode:        {np.median(decay):.0%} of the previous episode's views (fitted)",
+            ])
+
+        output.extend(["", f"{BOLD}🏆 TOP PLAYLISTS BY VIEWS{ENDC}", f"{'─' * 30}"])
+        for i in np.argsort(-total_views, kind='stable')[:10]:
+            p = summaries[i]
+            output.extend([
+                f"\n{YELLOW}{p['title']}{ENDC}",
+                f"   🎥 Videos: {p['videos']} | 👀 Views: {self._format_number(p['total_views'])} | "
+                f"Median: {self._format_number(int(p['median_views']))} | 👍 {self._format_number(p['total_likes'])}",
+            ])
+            if p['decay'] is not None:
+                output.append(
+                    f"   📉 Episode 2: {p['second_ratio']:.0%} | Last: {p['last_ratio']:.0%} of episode 1 | "
+                    f"{p['decay']:.0%} kept per episode"
+                )
+            output.append(f"   🔗 https://youtube.com/playlist?list={p['id']}")
+
+        drop_offs = sorted((p for p in series if p['videos'] >= 3), key=lambda p: p['last_ratio'])[:5]
+        if drop_offs:
+            output.extend(["", f"{BOLD}⚠️ STEEPEST DROP-OFF{ENDC}", f"{'─' * 30}"])
+            for p in drop_offs:
+                output.append(f"• {p['title']}: last of {p['videos']} episodes has {p['last_ratio']:.0%} of episode 1's views")
+        if failures:
+            output.extend(["", f"{BOLD}❌ FAILED PLAYLISTS{ENDC}", f"{'─' * 30}"] + failures)
+        return output
+
     def _extract_channel_id(self, channel_input: str) -> str:
         """Extract channel ID from various input formats"""
         try:
@@ -241,18 +420,20 @@ class ChannelAnalytics(BaseTool):
                         f"{'─' * 30}"
                     ])
                     
+                    # Statistics of all listed videos in one request
+                    video_ids = [item['contentDetails']['videoId'] for item in videos_response['items']]
+                    stats_response = youtube.videos().list(
+                        part="statistics",
+                        id=",".join(video_ids)
+                    ).execute()
+                    video_stats = {v['id']: v['statistics'] for v in stats_response.get('items', [])}
+                    
                     for i, item in enumerate(videos_response['items'], 1):
                         video = item['snippet']
                         video_id = item['contentDetails']['videoId']
                         
-                        # Get video statistics
-                        video_stats = youtube.videos().list(
-                            part="statistics",
-                            id=video_id
-                        ).execute()
-                        
-                        if video_stats.get('items'):
-                            stats = video_stats['items'][0]['statistics']
+                        if video_id in video_stats:
+                            stats = video_stats[video_id]
                             views = self._format_number(int(stats.get('viewCount', 0)))
                             likes = self._format_number(int(stats.get('likeCount', 0)))
                             comments = self._format_number(int(stats.get('commentCount', 0)))
@@ -275,14 +456,17 @@ class ChannelAnalytics(BaseTool):
                                 f"   🔗 Watch: https://youtube.com/watch?v={video_id}"
                             ])
             
+            if self.metric_type == "playlists":
+                output.extend(self._playlist_analytics(channel_id))
+            
             # Add custom playlists if available
-            playlists_response = youtube.playlists().list(
+            playlists_response = None if self.metric_type == "playlists" else youtube.playlists().list(
                 part="snippet,contentDetails",
                 channelId=channel_id,
                 maxResults=3
             ).execute()
             
-            if playlists_response.get('items'):
+            if playlists_response and playlists_response.get('items'):
                 output.extend([
                     "",
                     f"{BOLD}📑 FEATURED PLAYLISTS{ENDC}",
@@ -0,0 +1,279 @@
+from agency_swarm.tools import BaseTool
+from pydantic import Field
+import os
+from utils.clients import youtube
+from utils.env import load_env
+from utils.budget import RunBudget
+from utils.youtube_api import quota_cost
+from utils import tracing
+from youtube_analyzer.tools.ChannelAnalytics import ChannelAnalytics
+from youtube_analyzer.tools.CommentSentiment import iter_comments, score_comments
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+
+# ANSI color codes
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+RED = '\033[91m'
+ENDC = '\033[0m'
+BOLD = '\033[1m'
+UNDERLINE = '\033[4m'
+
+load_env()
+
+default_channel = os.getenv('DEFAULT_CHANNEL_ID')  # Get channel ID from .env
+
+# Videos whose comments are fetched at the same time
+VIDEO_FETCH_WORKERS = int(os.getenv('CHANNEL_SENTIMENT_WORKERS', '6'))
+
+MAX_VIDEOS = 200
+
+class ChannelSentiment(BaseTool):
+    """
+    Analyzes comment sentiment across the latest videos of a YouTube channel or playlist
+    and shows how the audience's mood changes from video to video
+    """
+    channel_input: str = Field(
+        default=default_channel,
+        description="Channel URL, ID, or name to analyze (defaults to channel from .env). Ignored when playlist_id is set."
+    )
+    playlist_id: Optional[str] = Field(
+        default=None,
+        description="Analyze the videos of this playlist instead of the channel's uploads"
+    )
+    video_count: int = Field(
+        default=10,
+        description=f"Number of most recent videos to analyze (at most {MAX_VIDEOS})"
+    )
+    comments_per_video: int = Field(
+        default=100,
+        description="Maximum number of comments to analyze per video"
+    )
+    include_replies: bool = Field(
+        default=False,
+        description="Also analyze replies to comments (uses more API quota)"
+    )
+    quota_budget: int = Field(
+        default=1000,
+        description="Maximum YouTube API quota units to spend; the analysis stops early and reports partial results when reached"
+    )
+    time_budget_seconds: int = Field(
+        default=120,
+        description="Maximum time to spend fetching comments; the analysis stops early and reports partial results when reached"
+    )
+
+    def _uploads_playlist(self, budget: RunBudget) -> Optional[tuple]:
+        """Resolve the channel and return (channel title, uploads playlist id)"""
+        # Anything but a channel ID or a /channel/ URL is resolved with a search (100 units)
+        needs_search = not self.channel_input.startswith('UC') and '/channel/' not in self.channel_input
+        if needs_search and not budget.spend(quota_cost('youtube.search.list')):
+            return None
+        channel_id = ChannelAnalytics(channel_input=self.channel_input)._extract_channel_id(self.channel_input)
+        if not channel_id or not budget.spend(1):
+            return None
+        response = youtube.channels().list(part="snippet,contentDetails", id=channel_id).execute()
+        if not response.get('items'):
+            return None
+        channel = response['items'][0]
+        return channel['snippet']['title'], channel['contentDetails']['relatedPlaylists']['uploads']
+
+    def _list_videos(self, playlist_id: str, count: int, budget: RunBudget) -> List[Dict]:
+        """Latest videos of a playlist as {'id', 'title', 'published'} dicts"""
+        videos = []
+        next_page_token = None
+        while len(videos) < count and budget.spend(1):
+            response = youtube.playlistItems().list(
+                part="snippet,contentDetails",
+                playlistId=playlist_id,
+                maxResults=min(50, count - len(videos)),
+                pageToken=next_page_token
+            ).execute()
+            for item in response.get('items', []):
+                videos.append({
+                    'id': item['contentDetails']['videoId'],
+                    'title': item['snippet']['title'],
+                    'published': item['contentDetails'].get('videoPublishedAt') or item['snippet']['publishedAt'],
+                })
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token or not response.get('items'):
+                break
+        return videos[:count]
+
+    def _fetch_comments(self, video_id: str, budget: RunBudget) -> list:
+        """One video's comments, fetched on a worker thread and scored later as a batch"""
+        with tracing.span("channel_sentiment.fetch", "youtube", video_id=video_id):
+            return list(iter_comments(video_id, self.comments_per_video, self.include_replies, budget))
+
+    def run(self):
+        """
+        Fetches comments of several videos concurrently, scores each video's
+        comments as one batch and rolls the results up into a channel trend
+        """
+        try:
+            budget = RunBudget(quota_units=self.quota_budget, seconds=self.time_budget_seconds)
+            video_count = max(1, min(self.video_count, MAX_VIDEOS))
+
+            if self.playlist_id:
+                source, playlist_id = f"Playlist {self.playlist_id}", self.playlist_id
+            else:
+                resolved = self._uploads_playlist(budget)
+                if not resolved:
+                    if budget.exhausted:
+                        return f"{YELLOW}⚠️ Stopped before the channel was resolved: {budget.describe()}{ENDC}"
+                    return f"{RED}❌ Error: Channel not found{ENDC}"
+                source, playlist_id = resolved
+
+            videos = self._list_videos(playlist_id, video_count, budget)
+            if not videos:
+                if budget.exhausted:
+                    return f"{YELLOW}⚠️ Stopped before any videos were listed: {budget.describe()}{ENDC}"
+                return f"{YELLOW}⚠️ No videos found{ENDC}"
+
+            # Fetch comments concurrently; score each finished video on this thread so
+            # that TextBlob (pure Python) does not compete with the fetches for the GIL
+            results: Dict[str, dict] = {}
+            skipped = []
+            executor = ThreadPoolExecutor(max_workers=VIDEO_FETCH_WORKERS, thread_name_prefix="channel-sentiment")
+            try:
+                futures = {executor.submit(self._fetch_comments, video['id'], budget): video for video in videos}
+                pending = set(futures)
+                while pending:
+                    # Wait a little past the deadline for in-flight requests to return
+                    timeout = budget.remaining_seconds()
+                    done, pending = wait(pending, timeout=None if timeout is None else timeout + 10,
+                                         return_when=FIRST_COMPLETED)
+                    if not done:
+                        skipped.extend(futures[f]['title'] for f in pending)
+                        break
+                    for future in done:
+                        video = futures[future]
+                        try:
+                            comments = future.result()
+                        except Exception as e:
+                            print(f"Error getting comments for {video['id']}: {str(e)}")
+                            comments = []
+                        if not comments:
+                            skipped.append(video['title'])
+                            continue
+                        with tracing.span("channel_sentiment.score", "nlp", video_id=video['id'], comments=len(comments)):
+                            table, _, most_critical = score_comments(comments, top_k=1)
+                        if not len(table):
+                            # Only spam
+                            skipped.append(video['title'])
+                            continue
+                        results[video['id']] = {'video': video, 'table': table, 'most_critical': most_critical}
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+            if not results:
+                reason = f" ({budget.describe()})" if budget.exhausted else ""
+                return f"{YELLOW}⚠️ No comments could be analyzed{reason}{ENDC}"
+
+            return self._format_report(source, videos, results, skipped, budget)
+
+        except Exception as e:
+            if "quotaExceeded" in str(e):
+                return f"{RED}❌ YouTube API quota exceeded. Please try again later.{ENDC}"
+            return f"{RED}❌ Error analyzing channel sentiment: {str(e)}{ENDC}"
+
+    def _format_report(self, source: str, videos: List[Dict], results: Dict[str, dict], skipped: List[str], budget: RunBudget) -> str:
+        """Per-video sentiment, oldest to newest, with the rolled-up trend"""
+        # Oldest first, so the trend reads left to right
+        ordered = sorted((results[v['id']] for v in videos if v['id'] in results), key=lambda r: r['video']['published'])
+        averages = np.array([r['table'].average_sentiment for r in ordered])
+        # Duplicate comments are collapsed, so videos are weighted by their collapsed comment weight
+        weights = np.array([r['table'].weight for r in ordered])
+        positive = sum(r['table'].positive for r in ordered)
+        negative = sum(r['table'].negative for r in ordered)
+        total = int(sum(len(r['table']) for r in ordered))
+        texts = sum(len(r['table'].group_sizes) for r in ordered)
+        neutral = texts - positive - negative
+        spam = sum(sum(r['table'].spam.values()) for r in ordered)
+        duplicates = sum(r['table'].duplicates for r in ordered)
+
+        output = [
+            f"\n{BOLD}📺 CHANNEL SENTIMENT ANALYSIS{ENDC}",
+            "=" * 70,
+            "",
+            f"{BLUE}Source:{ENDC} {source}",
+            f"{BLUE}Videos Analyzed:{ENDC} {len(ordered)} of {len(videos)}",
+            f"{BLUE}Comments Analyzed:{ENDC} {total}"
+            + (f" ({duplicates} duplicates collapsed, {spam} spam filtered)" if duplicates or spam else ""),
+            f"{BLUE}Quota Used:{ENDC} ~{budget.used} units",
+            "",
+            f"{BOLD}📊 OVERALL SENTIMENT{ENDC}",
+            f"{'─' * 30}",
+            f"All Comments: {self._format_sentiment(float(np.average(averages, weights=weights)))}",
+            f"{GREEN}Positive:{ENDC} {positive} ({positive/texts*100:.1f}%) | "
+            f"{YELLOW}Neutral:{ENDC} {neutral} ({neutral/texts*100:.1f}%) | "
+            f"{RED}Negative:{ENDC} {negative} ({negative/texts*100:.1f}%)"
+            + (" of distinct texts" if duplicates else ""),
+            f"Trend: {self._format_trend(averages)}",
+            "",
+            f"{BOLD}🎬 SENTIMENT PER VIDEO (oldest to newest){ENDC}",
+            f"{'─' * 30}"
+        ]
+        for result in ordered:
+            table = result['table']
+            output.append(
+                f"  {self._format_date(result['video']['published'])} | {result['video']['title'][:60]}\n"
+                f"    💭 {self._format_sentiment(table.average_sentiment)} | 💬 {len(table)} comments | "
+                f"{GREEN}+{table.positive}{ENDC} / {RED}-{table.negative}{ENDC}"
+            )
+
+        best, worst = ordered[int(np.argmax(averages))], ordered[int(np.argmin(averages))]
+        output.extend([
+            "",
+            f"{BOLD}🏆 HIGHLIGHTS{ENDC}",
+            f"{'─' * 30}",
+            f"{GREEN}Best Received:{ENDC} {best['video']['title']} ({best['table'].average_sentiment:.2f})",
+            f"{RED}Most Criticized:{ENDC} {worst['video']['title']} ({worst['table'].average_sentiment:.2f})",
+        ])
+        if worst['most_critical']:
+            _, text = worst['most_critical'][0]
+            output.append(f"  Most critical comment there: \"{text}...\"")
+
+        if skipped or budget.exhausted:
+            output.extend(["", f"{BOLD}⏱️ INCOMPLETE ANALYSIS{ENDC}", f"{'─' * 30}"])
+            if budget.exhausted:
+                output.append(f"{YELLOW}Stopped early: {budget.describe()}{ENDC}")
+            if skipped:
+                output.append(f"Videos without analyzed comments: {len(skipped)}")
+                output.extend(f"  • {title[:70]}" for title in skipped[:5])
+
+        return "\n".join(output)
+
+    def _format_trend(self, averages: np.ndarray) -> str:
+        """Direction of sentiment over the analyzed videos (oldest to newest)"""
+        if len(averages) < 3:
+            return "Not enough videos to show a trend"
+        slope = np.polyfit(np.arange(len(averages)), averages, 1)[0]
+        third = max(1, len(averages) // 3)
+        change = averages[-third:].mean() - averages[:third].mean()
+        detail = f"latest videos {change:+.2f} vs. oldest"
+        if slope > 0.01:
+            return f"{GREEN}Improving 📈{ENDC} ({detail})"
+        if slope < -0.01:
+            return f"{RED}Declining 📉{ENDC} ({detail})"
+        return f"{YELLOW}Stable ➡️{ENDC} ({detail})"
+
+    def _format_date(self, date_str: str) -> str:
+        """Format date to readable format"""
+        date = datetime.strptime(date_str[:19], "%Y-%m-%dT%H:%M:%S")
+        return date.strftime("%b %d, %Y")
+
+    def _format_sentiment(self, sentiment: float) -> str:
+        """Format sentiment score with color and emoji"""
+        if sentiment > 0.3:
+            return f"{GREEN}Positive 😊 ({sentiment:.2f}){ENDC}"
+        elif sentiment < -0.3:
+            return f"{RED}Negative 😠 ({sentiment:.2f}){ENDC}"
+        return f"{YELLOW}Neutral 😐 ({sentiment:.2f}){ENDC}"
+
+if __name__ == "__main__":
+    # Test with the default channel from .env
+    tool = ChannelSentiment(video_count=5)
+    print(tool.run())
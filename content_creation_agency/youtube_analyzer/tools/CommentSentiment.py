@@ -1,11 +1,16 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
-from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from textblob import TextBlob
+from utils.clients import youtube
 from datetime import datetime
 from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from utils import tracing
+from utils.comment_table import CommentTable, TopK, PREVIEW_CHARS
+from utils.comment_dedup import CommentDeduper
+from utils.comment_timeline import comment_timeline, BURST_WINDOW
+from utils.budget import RunBudget
+import numpy as np
 
 # ANSI color codes
 BLUE = '\033[94m'
@@ -16,45 +21,168 @@ ENDC = '\033[0m'
 BOLD = '\033[1m'
 UNDERLINE = '\033[4m'
 
-load_dotenv()
+# Parallel comments().list calls for reply threads that are not fully inlined
+REPLY_FETCH_WORKERS = int(os.getenv('REPLY_FETCH_WORKERS', '8'))
 
-# Initialize YouTube API
-youtube = build('youtube', 'v3', developerKey=os.getenv('YOUTUBE_API_KEY'))
-
-def get_all_comments(video_id: str, max_results: int = 100) -> list:
-    """Get all available comments for a video"""
+def get_thread_replies(thread_id: str, max_results: int = 100, budget: RunBudget = None) -> list:
+    """Get the replies of a comment thread through comments().list(parentId=...)"""
+    replies = []
+    next_page_token = None
     try:
-        comments = []
-        next_page_token = None
-        
-        while len(comments) < max_results:
-            request = youtube.commentThreads().list(
+        while len(replies) < max_results:
+            if budget is not None and not budget.spend(1):
+                break
+            response = youtube.comments().list(
                 part="snippet",
+                parentId=thread_id,
+                textFormat="plainText",
+                maxResults=min(100, max_results - len(replies)),
+                pageToken=next_page_token
+            ).execute()
+
+            replies.extend(item['snippet'] for item in response.get('items', []))
+
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token or len(response.get('items', [])) == 0:
+                break
+    except Exception as e:
+        # A failed thread only loses its own replies
+        print(f"Error getting replies for thread {thread_id}: {str(e)}")
+    return replies[:max_results]
+
+def iter_comments(video_id: str, max_results: int = 100, include_replies: bool = True, budget: RunBudget = None,
+                  order: str = "relevance"):
+    """
+    Stream the comments of a video as (thread_id, snippet) pairs, up to
+    max_results in total. Top-level comments come first from each page; replies
+    are taken inline when the thread has no more than the API returns inline,
+    otherwise they are fetched in parallel (at most REPLY_FETCH_WORKERS threads)
+    and yielded as soon as each thread's fetch completes. Each fetch asks for at
+    most what is left of max_results after the fetches already in flight, so
+    parallel fetches don't page through replies that would be thrown away. With a budget, every
+    request is charged to it and the stream ends early once it is used up.
+    order is the API's thread order: "relevance" or "time" (newest first).
+    """
+    yielded = 0
+    next_page_token = None
+    # Queued reply fetches and the most replies each may return
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=REPLY_FETCH_WORKERS, thread_name_prefix="reply-fetch") if include_replies else None
+
+    def finished(block: bool):
+        """Replies of fetches that are done (waits for at least one if block)"""
+        if block and pending:
+            wait(pending, return_when=FIRST_COMPLETED)
+        for future in [f for f in pending if f.done()]:
+            del pending[future]
+            thread_id, replies = future.result()
+            for reply in replies:
+                yield thread_id, reply
+
+    try:
+        while yielded < max_results:
+            if budget is not None and not budget.spend(1):
+                break
+            response = youtube.commentThreads().list(
+                part="snippet,replies" if include_replies else "snippet",
                 videoId=video_id,
                 textFormat="plainText",
-                maxResults=min(100, max_results - len(comments)),
+                maxResults=min(100, max_results - yielded),
                 pageToken=next_page_token,
-                order="relevance"
-            )
-            
-            response = request.execute()
-            
-            # Add comments from this page
+                order=order
+            ).execute()
+
             for item in response.get('items', []):
-                comment = item['snippet']['topLevelComment']['snippet']
-                comments.append(comment)
-            
+                if yielded >= max_results:
+                    break
+                thread_id = item['id']
+                yield thread_id, item['snippet']['topLevelComment']['snippet']
+                yielded += 1
+                if not include_replies:
+                    continue
+
+                inline = item.get('replies', {}).get('comments', [])
+                total_replies = item['snippet'].get('totalReplyCount', 0)
+                if total_replies > len(inline):
+                    # Keep the number of queued fetches bounded
+                    while len(pending) >= REPLY_FETCH_WORKERS * 2:
+                        for comment in finished(block=True):
+                            if yielded < max_results:
+                                yield comment
+                                yielded += 1
+                    # Nothing is submitted once the fetches in flight can fill the rest
+                    limit = min(total_replies, max_results - yielded - sum(pending.values()))
+                    if limit > 0:
+                        future = executor.submit(lambda t=thread_id, n=limit: (t, get_thread_replies(t, n, budget)))
+                        pending[future] = limit
+                else:
+                    for reply in inline:
+                        if yielded >= max_results:
+                            break
+                        yield thread_id, reply['snippet']
+                        yielded += 1
+
+            if include_replies:
+                for comment in finished(block=False):
+                    if yielded < max_results:
+                        yield comment
+                        yielded += 1
+
             # Check if there are more pages
             next_page_token = response.get('nextPageToken')
             if not next_page_token or len(response.get('items', [])) == 0:
                 break
-        
-        return comments
-        
+
+        while pending and yielded < max_results:
+            for comment in finished(block=True):
+                if yielded < max_results:
+                    yield comment
+                    yielded += 1
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def get_all_comments(video_id: str, max_results: int = 100, include_replies: bool = False) -> list:
+    """Get all available comments for a video"""
+    try:
+        return [snippet for _, snippet in iter_comments(video_id, max_results, include_replies)]
     except Exception as e:
         print(f"Error getting comments: {str(e)}")
         return []
 
+def score_comments(comments, top_k: int = 3):
+    """
+    Score a stream of (thread_id, snippet) pairs in a single pass. Spam is
+    dropped and (near-)duplicate texts are collapsed first (utils.comment_dedup),
+    so each distinct text is scored once. Returns the CommentTable and the
+    top_k most positive and most critical distinct comments as (row, text
+    preview) pairs.
+    """
+    # TextBlob is slow to import, so it is loaded on first use
+    from textblob import TextBlob
+    table = CommentTable()
+    deduper = CommentDeduper()
+    scores = []
+    most_positive, most_critical = TopK(top_k), TopK(top_k)
+    for thread_id, comment in comments:
+        text = comment['textDisplay']
+        group, is_new = deduper.add(text)
+        if group is None:
+            continue
+        if is_new:
+            scores.append(TextBlob(text).sentiment)
+        polarity, subjectivity = scores[group]
+        row = table.append(
+            text, polarity, subjectivity, comment.get('likeCount', 0), comment['publishedAt'],
+            comment['authorDisplayName'], thread_id, 'parentId' in comment, group
+        )
+        if is_new:
+            entry = (row, text[:PREVIEW_CHARS])
+            most_positive.push(polarity, entry)
+            most_critical.push(-polarity, entry)
+    table.spam = dict(deduper.spam)
+    return table, most_positive.items(), most_critical.items()
+
 class CommentSentiment(BaseTool):
     """
     Analyzes sentiment in video comments for any YouTube video
@@ -63,6 +191,19 @@ class CommentSentiment(BaseTool):
         ..., 
         description="Video ID or URL to analyze comments from"
     )
+    max_comments: int = Field(
+        default=100,
+        description="Maximum number of comments to analyze, replies included"
+    )
+    include_replies: bool = Field(
+        default=True,
+        description="Also analyze the replies to each comment and compare their sentiment with the comment they answer"
+    )
+    timeline: bool = Field(
+        default=False,
+        description="Also analyze how comments arrived over time: velocity, sentiment drift, like-weighted sentiment "
+                    "and comment bursts. Fetches the newest comments first; raise max_comments to cover the whole video"
+    )
 
     def _extract_video_id(self, video_input: str) -> str:
         """Extract video ID from various input formats"""
@@ -103,10 +244,17 @@ class CommentSentiment(BaseTool):
             
             video = video_response['items'][0]
             
-            # Get comments
-            comments = get_all_comments(video_id, max_results=100)
-            
-            if not comments:
+            with tracing.span("comments.fetch_and_score", "nlp") as span:
+                table, most_positive, most_critical = score_comments(
+                    iter_comments(video_id, self.max_comments, self.include_replies,
+                                  order="time" if self.timeline else "relevance")
+                )
+                span.set(comments=len(table), threads=len(table.thread_ids), table_bytes=table.nbytes(),
+                         scored=len(table.group_sizes), collapsed=table.duplicates, spam=sum(table.spam.values()))
+
+            if not len(table) and table.spam:
+                return f"{YELLOW}⚠️ All {sum(table.spam.values())} retrieved comments were filtered as spam{ENDC}"
+            if not len(table):
                 stats = video['statistics']
                 comment_count = int(stats.get('commentCount', 0))
                 if comment_count > 0:
@@ -114,22 +262,6 @@ class CommentSentiment(BaseTool):
                 else:
                     return f"{YELLOW}⚠️ No comments found for this video{ENDC}"
 
-            # Analyze sentiment
-            sentiments = []
-            for comment in comments:
-                analysis = TextBlob(comment['textDisplay'])
-                sentiments.append({
-                    'text': comment['textDisplay'],
-                    'author': comment['authorDisplayName'],
-                    'date': comment['publishedAt'],
-                    'likes': comment.get('likeCount', 0),
-                    'sentiment': analysis.sentiment.polarity,
-                    'subjectivity': analysis.sentiment.subjectivity
-                })
-
-            # Calculate average sentiment
-            avg_sentiment = sum(s['sentiment'] for s in sentiments) / len(sentiments)
-            
             # Format output
             output = [
                 f"\n{BOLD}💭 COMMENT SENTIMENT ANALYSIS{ENDC}",
@@ -144,8 +276,9 @@ class CommentSentiment(BaseTool):
                 "",
                 f"{BOLD}📊 SENTIMENT SUMMARY{ENDC}",
                 f"{'─' * 30}",
-                f"Overall Sentiment: {self._format_sentiment(avg_sentiment)}",
-                f"Total Comments Analyzed: {len(sentiments)}",
+                f"Overall Sentiment: {self._format_sentiment(table.average_sentiment)}",
+                f"Total Comments Analyzed: {len(table)}",
+                *self._format_collapsed(table),
                 "",
                 f"{BOLD}💬 TOP COMMENTS BY SENTIMENT{ENDC}",
                 f"{'─' * 30}"
@@ -153,36 +286,29 @@ class CommentSentiment(BaseTool):
 
             # Add top positive comments
             output.append(f"\n{GREEN}Most Positive Comments:{ENDC}")
-            for comment in sorted(sentiments, key=lambda x: x['sentiment'], reverse=True)[:3]:
-                output.extend([
-                    f"  • {comment['text'][:100]}...",
-                    f"    👤 {comment['author']} | 👍 {comment['likes']} likes | "
-                    f"💭 {self._format_sentiment(comment['sentiment'])}"
-                ])
+            output.extend(self._format_comments(table, most_positive))
 
             # Add top negative comments
             output.append(f"\n{RED}Most Critical Comments:{ENDC}")
-            for comment in sorted(sentiments, key=lambda x: x['sentiment'])[:3]:
-                output.extend([
-                    f"  • {comment['text'][:100]}...",
-                    f"    👤 {comment['author']} | 👍 {comment['likes']} likes | "
-                    f"💭 {self._format_sentiment(comment['sentiment'])}"
-                ])
-
-            # Add sentiment distribution
-            positive = sum(1 for s in sentiments if s['sentiment'] > 0.3)
-            negative = sum(1 for s in sentiments if s['sentiment'] < -0.3)
-            neutral = len(sentiments) - positive - negative
-            
+            output.extend(self._format_comments(table, most_critical))
+
+            # Add sentiment distribution (distinct texts, so a copy-paste flood counts once)
+            total = len(table.group_sizes)
             output.extend([
                 "",
-                f"{BOLD}📈 SENTIMENT DISTRIBUTION{ENDC}",
+                f"{BOLD}📈 SENTIMENT DISTRIBUTION{ENDC}" + (" (distinct texts)" if table.duplicates else ""),
                 f"{'─' * 30}",
-                f"{GREEN}Positive:{ENDC} {positive} ({positive/len(sentiments)*100:.1f}%)",
-                f"{YELLOW}Neutral:{ENDC} {neutral} ({neutral/len(sentiments)*100:.1f}%)",
-                f"{RED}Negative:{ENDC} {negative} ({negative/len(sentiments)*100:.1f}%)"
+                f"{GREEN}Positive:{ENDC} {table.positive} ({table.positive/total*100:.1f}%)",
+                f"{YELLOW}Neutral:{ENDC} {table.neutral} ({table.neutral/total*100:.1f}%)",
+                f"{RED}Negative:{ENDC} {table.negative} ({table.negative/total*100:.1f}%)"
             ])
 
+            if self.include_replies:
+                output.extend(self._format_threads(table))
+
+            if self.timeline:
+                output.extend(self._format_timeline(table, video))
+
             return "\n".join(output)
 
         except Exception as e:
@@ -195,6 +321,126 @@ class CommentSentiment(BaseTool):
             else:
                 return f"{RED}❌ Error analyzing comments: {str(e)}{ENDC}"
 
+    def _format_collapsed(self, table: CommentTable) -> list:
+        """How many comments were dropped as spam or collapsed into duplicate groups"""
+        spam = sum(table.spam.values())
+        if not spam and not table.duplicates:
+            return []
+        repeated = sum(1 for size in table.group_sizes if size > 1)
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(table.spam.items()))
+        output = [
+            f"Distinct Texts Scored: {len(table.group_sizes)} "
+            f"({table.duplicates} duplicates collapsed into {repeated} groups, each weighted 1 + ln(copies) in the average)"
+        ]
+        if spam:
+            output.append(f"Spam Filtered: {spam} ({reasons})")
+        return output
+
+    def _format_comments(self, table: CommentTable, comments: list) -> list:
+        """Format (row, text preview) pairs picked by TopK"""
+        sentiment, likes, authors = table.column('sentiment'), table.column('likes'), table.column('author')
+        groups = table.column('group')
+        output = []
+        for row, text in comments:
+            copies = table.group_sizes[groups[row]]
+            output.extend([
+                f"  • {text}..." + (f" (×{copies})" if copies > 1 else ""),
+                f"    👤 {table.authors[authors[row]]} | 👍 {likes[row]} likes | "
+                f"💭 {self._format_sentiment(float(sentiment[row]))}"
+            ])
+        return output
+
+    def _format_threads(self, table: CommentTable) -> list:
+        """Compare reply sentiment with the top-level comment of each thread"""
+        stats = table.thread_stats()
+        top_level = stats['top_level'][stats['has_top_level']]
+        reply_count = stats['reply_count']
+        output = [
+            "",
+            f"{BOLD}🧵 REPLY THREADS{ENDC}",
+            f"{'─' * 30}",
+            f"Top-level Comments: {len(top_level)} | Avg: {self._format_sentiment(float(top_level.mean()) if len(top_level) else 0.0)}",
+        ]
+        discussed = reply_count > 0
+        if not discussed.any():
+            output.append("No replies found")
+            return output
+
+        # Threads where the replies lean the opposite way of the comment they answer
+        top = stats['top_level'][discussed]
+        reply_avg = stats['reply_sum'][discussed] / reply_count[discussed]
+        disagreements = int(np.count_nonzero(((top > 0.1) & (reply_avg < -0.1)) | ((top < -0.1) & (reply_avg > 0.1))))
+        output.extend([
+            f"Replies: {table.replies} in {int(discussed.sum())} threads | "
+            f"Avg: {self._format_sentiment(table.reply_sentiment_sum / table.replies)}",
+            f"Threads where replies push back: {disagreements} ({disagreements / discussed.sum() * 100:.1f}%)",
+            f"\n{BLUE}Most Discussed Threads:{ENDC}"
+        ])
+        for thread in table.top_k(reply_count, 3):
+            count = int(reply_count[thread])
+            if not count:
+                break
+            output.extend([
+                f"  • {table.thread_previews[thread]}...",
+                f"    💬 {count} replies | comment {self._format_sentiment(float(stats['top_level'][thread]))} | "
+                f"replies {self._format_sentiment(float(stats['reply_sum'][thread] / count))}"
+            ])
+        return output
+
+    def _format_timeline(self, table: CommentTable, video: Dict[str, Any]) -> list:
+        """Velocity, sentiment drift, like-weighted sentiment and bursts over time since publication"""
+        with tracing.span("comments.timeline", "nlp", comments=len(table)):
+            t = comment_timeline(table, video['snippet']['publishedAt'])
+        width = t['bucket_hours']
+        unit = f"{width}h" if width < 24 else f"{width // 24}d"
+        counts, velocity = t['counts'], t['velocity']
+        output = [
+            "",
+            f"{BOLD}⏱️ COMMENT TIMELINE{ENDC}",
+            f"{'─' * 30}",
+            f"Buckets: {len(counts)} x {unit} since publication | Span: {self._format_hours(t['span_hours'])}",
+        ]
+        total = int(video['statistics'].get('commentCount', 0))
+        if total > len(table):
+            output.append(f"{YELLOW}Covers the newest {len(table)} of about {total} comments{ENDC}")
+        blocks = np.array(list("▁▂▃▄▅▆▇█"))
+        levels = np.ceil(counts / max(int(counts.max()), 1) * 7).astype(np.int64)
+        peak = int(np.argmax(counts))
+        output.extend([
+            f"Comments per {unit}: {''.join(blocks[levels])}",
+            f"{BLUE}Velocity:{ENDC} peak {velocity[peak]:.1f}/h at {self._format_hours(peak * width)} | "
+            f"latest {velocity[-1]:.1f}/h | half of the comments within {self._format_hours(t['median_age_hours'])} | "
+            f"{t['first_day_share']:.0%} in the first day",
+            "",
+            f"{BLUE}Sentiment Drift:{ENDC} earliest quarter {t['early_sentiment']:+.2f} -> latest quarter {t['late_sentiment']:+.2f}"
+            + (f" ({t['drift_per_day']:+.3f} per day, fitted)" if t['drift_per_day'] is not None else ""),
+            f"{BLUE}Like-weighted Sentiment:{ENDC} {self._format_sentiment(t['like_weighted_sentiment'])} "
+            f"vs. {t['sentiment_mean']:+.2f} unweighted"
+            + (" (liked comments are more positive)" if t['like_weighted_sentiment'] - t['sentiment_mean'] > 0.05
+               else " (liked comments are more critical)" if t['like_weighted_sentiment'] - t['sentiment_mean'] < -0.05
+               else ""),
+        ])
+
+        bursts = t['bursts']
+        if not len(bursts):
+            output.append(f"Bursts: none (no {unit} bucket far above the {BURST_WINDOW} before it)")
+            return output
+        output.append(f"\n{YELLOW}Bursts (far above the {BURST_WINDOW} buckets before):{ENDC}")
+        for bucket in bursts[np.argsort(-t['z'][bursts], kind='stable')][:5]:
+            output.append(
+                f"  • {self._format_hours(bucket * width)} after publication: {int(counts[bucket])} comments "
+                f"({t['z'][bucket]:.1f}σ) | sentiment {t['sentiment'][bucket]:+.2f}, like-weighted {t['like_sentiment'][bucket]:+.2f}"
+            )
+        return output
+
+    def _format_hours(self, hours: float) -> str:
+        """Hours as 5h, 3.5d or 12w"""
+        if hours < 48:
+            return f"{hours:.0f}h"
+        if hours < 24 * 28:
+            return f"{hours / 24:.1f}d"
+        return f"{hours / 168:.0f}w"
+
     def _format_date(self, date_str: str) -> str:
         """Format date to readable format"""
         date = datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%SZ")
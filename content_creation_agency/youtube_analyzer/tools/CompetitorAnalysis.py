@@ -1,10 +1,10 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
-from dotenv import load_dotenv
-from googleapiclient.discovery import build
+from utils.clients import youtube
+from utils.env import load_env
+from utils import similarity_index
 import re
-import json
 from datetime import datetime
 from typing import Dict, Any
 
@@ -16,9 +16,8 @@ RED = '\033[91m'
 ENDC = '\033[0m'
 BOLD = '\033[1m'
 
-load_dotenv()
+load_env()
 
-youtube = build('youtube', 'v3', developerKey=os.getenv('YOUTUBE_API_KEY'))
 default_channel = os.getenv('DEFAULT_CHANNEL_ID', 'UCbmCqH_WOUviDUsV83qloZQ')  # Fallback to your channel if not set
 
 class CompetitorAnalysis(BaseTool):
@@ -95,6 +94,20 @@ class CompetitorAnalysis(BaseTool):
             
         return None
 
+    def _index_videos(self, channel, items):
+        """Add the fetched videos to the similarity index used by ContentGapAnalysis"""
+        try:
+            similarity_index.shared_index().add_videos({
+                'video_id': item['snippet']['resourceId']['videoId'],
+                'channel_id': channel['id'],
+                'channel_title': channel['snippet']['title'],
+                'title': item['snippet']['title'],
+                'description': item['snippet'].get('description', ''),
+                'published': item['snippet']['publishedAt'],
+            } for item in items if item['snippet'].get('resourceId', {}).get('videoId'))
+        except Exception as e:
+            print(f"Error updating video index: {str(e)}")
+
     def run(self):
         """
         Analyzes a competitor's channel and recent videos
@@ -145,6 +158,7 @@ class CompetitorAnalysis(BaseTool):
                         f"\n• {video['title']}",
                         f"  Published: {video['publishedAt'][:10]}"
                     ])
+                self._index_videos(channel, videos_response['items'])
             
             return "\n".join(output)
             
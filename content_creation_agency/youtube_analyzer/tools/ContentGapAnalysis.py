@@ -0,0 +1,323 @@
+from agency_swarm.tools import BaseTool
+from pydantic import Field
+import os
+import re
+import time
+from utils.clients import youtube
+from utils.env import load_env
+from utils import similarity_index, tracing
+from youtube_analyzer.tools.ChannelAnalytics import ChannelAnalytics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# ANSI color codes
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+RED = '\033[91m'
+ENDC = '\033[0m'
+BOLD = '\033[1m'
+
+load_env()
+
+default_channel = os.getenv('DEFAULT_CHANNEL_ID')  # Get channel ID from .env
+
+# Competitor channels compared by default, comma-separated IDs or URLs
+default_competitors = [c.strip() for c in os.getenv('COMPETITOR_WATCHLIST', '').split(',') if c.strip()]
+
+# Channels whose uploads are fetched at the same time
+CHANNEL_FETCH_WORKERS = 4
+
+MAX_VIDEOS_PER_CHANNEL = 500
+
+def resolve_channel(channel_input: str) -> Optional[Tuple[str, str, str]]:
+    """(channel id, title, uploads playlist id) of a channel"""
+    channel_id = ChannelAnalytics(channel_input=channel_input)._extract_channel_id(channel_input)
+    if not channel_id:
+        return None
+    response = youtube.channels().list(part="snippet,contentDetails", id=channel_id).execute()
+    if not response.get('items'):
+        return None
+    channel = response['items'][0]
+    return channel_id, channel['snippet']['title'], channel['contentDetails']['relatedPlaylists']['uploads']
+
+def _name_key(name: str) -> str:
+    return re.sub(r'[\W_]+', '', name.lower())
+
+def indexed_channel_id(channel_input: str, known: Dict[str, str]) -> Optional[str]:
+    """
+    Channel id of an input without any API call: a channel ID or /channel/ URL,
+    or a handle, URL or name that matches the title of an indexed channel
+    (known maps channel id -> title); None when only a search could tell
+    """
+    if channel_input.startswith('UC'):
+        return channel_input
+    if '/channel/' in channel_input:
+        return channel_input.split('/channel/')[1].split('/')[0]
+    name = _name_key(channel_input.rstrip('/').rsplit('/', 1)[-1])
+    return next((channel_id for channel_id, title in known.items() if name and _name_key(title) == name), None)
+
+def fetch_channel_videos(channel_input: str, count: int) -> Optional[Tuple[str, str, List[Dict]]]:
+    """
+    (channel id, title, videos) for a channel's latest uploads, with tags and
+    statistics from videos().list (50 ids per request)
+    """
+    resolved = resolve_channel(channel_input)
+    if not resolved:
+        return None
+    channel_id, channel_title, playlist_id = resolved
+
+    video_ids = []
+    next_page_token = None
+    while len(video_ids) < count:
+        response = youtube.playlistItems().list(
+            part="contentDetails",
+            playlistId=playlist_id,
+            maxResults=min(50, count - len(video_ids)),
+            pageToken=next_page_token
+        ).execute()
+        video_ids.extend(item['contentDetails']['videoId'] for item in response.get('items', []))
+        next_page_token = response.get('nextPageToken')
+        if not next_page_token or not response.get('items'):
+            break
+
+    videos = []
+    for start in range(0, len(video_ids), 50):
+        response = youtube.videos().list(
+            part="snippet,statistics",
+            id=",".join(video_ids[start:start + 50])
+        ).execute()
+        for item in response.get('items', []):
+            snippet, stats = item['snippet'], item.get('statistics', {})
+            videos.append({
+                'id': item['id'],
+                'title': snippet['title'],
+                'tags': snippet.get('tags', []),
+                'description': snippet.get('description', ''),
+                'published': snippet.get('publishedAt', ''),
+                'views': int(stats.get('viewCount', 0)),
+                'likes': int(stats.get('likeCount', 0)),
+                'comments': int(stats.get('commentCount', 0)),
+            })
+    return channel_id, channel_title, videos
+
+class ContentGapAnalysis(BaseTool):
+    """
+    Finds topics that competitor channels cover and our channel doesn't, by comparing
+    titles, tags and descriptions of their videos with ours in a similarity index.
+    With a query, lists the indexed videos most similar to that topic instead.
+    """
+    own_channel: str = Field(
+        default=default_channel,
+        description="Our channel URL, ID, or name (defaults to channel from .env)"
+    )
+    competitor_channels: List[str] = Field(
+        default=default_competitors,
+        description="Competitor channel URLs, IDs, or names to compare against (defaults to COMPETITOR_WATCHLIST from .env)"
+    )
+    videos_per_channel: int = Field(
+        default=50,
+        description=f"Number of most recent videos to fetch per channel (at most {MAX_VIDEOS_PER_CHANNEL})"
+    )
+    query: Optional[str] = Field(
+        default=None,
+        description="Topic or video title to find similar videos for, e.g. 'fine-tuning llama locally'"
+    )
+    gap_threshold: float = Field(
+        default=0.35,
+        description="Competitor videos less similar than this (0-1) to every one of our videos count as gaps"
+    )
+    top_n: int = Field(
+        default=10,
+        description="Number of topics and videos to show"
+    )
+    refresh: bool = Field(
+        default=True,
+        description="Fetch the channels' latest uploads first; set to False to answer from the saved index only "
+                    "(channels are matched to the index by ID, URL or title; only names it doesn't know cost a search)"
+    )
+
+    def run(self):
+        """
+        Updates the similarity index with the latest uploads of every channel,
+        then answers the gap or nearest-video query from the index
+        """
+        try:
+            index = similarity_index.shared_index()
+            channels: Dict[str, str] = {}
+            new_videos = 0
+            inputs = ([self.own_channel] if self.own_channel else []) + list(self.competitor_channels)
+
+            if self.refresh and inputs:
+                with ThreadPoolExecutor(max_workers=CHANNEL_FETCH_WORKERS, thread_name_prefix="content-gap") as executor:
+                    results = list(executor.map(lambda c: self._safe_fetch(c, index), inputs))
+                for channel_input, result in zip(inputs, results):
+                    if result is None:
+                        print(f"Channel not found: {channel_input}")
+                        continue
+                    channel_id, channel_title, added = result
+                    channels[channel_input] = channel_id
+                    new_videos += added
+                if index.dirty:
+                    index.save(similarity_index.INDEX_PATH)
+            else:
+                known = index.channels()
+                for channel_input in inputs:
+                    channel_id = (indexed_channel_id(channel_input, known)
+                                  or ChannelAnalytics(channel_input=channel_input)._extract_channel_id(channel_input))
+                    if channel_id:
+                        channels[channel_input] = channel_id
+
+            if not len(index):
+                return f"{YELLOW}⚠️ The video index is empty; no videos could be fetched{ENDC}"
+
+            own_id = channels.get(self.own_channel)
+            header = [
+                f"{BLUE}Indexed Videos:{ENDC} {len(index)} ({new_videos} new this run)",
+            ]
+
+            if self.query:
+                return self._format_nearest(index, own_id, header)
+
+            competitor_ids = [channels[c] for c in self.competitor_channels if c in channels]
+            if not own_id:
+                return f"{RED}❌ Error: Our channel was not found; set own_channel or DEFAULT_CHANNEL_ID{ENDC}"
+            if not competitor_ids:
+                return f"{YELLOW}⚠️ No competitor channels to compare with; set competitor_channels or COMPETITOR_WATCHLIST{ENDC}"
+            return self._format_gaps(index, own_id, competitor_ids, header)
+
+        except Exception as e:
+            if "quotaExceeded" in str(e):
+                return f"{RED}❌ YouTube API quota exceeded. Please try again later.{ENDC}"
+            return f"{RED}❌ Error analyzing content gaps: {str(e)}{ENDC}"
+
+    def _fetch_channel(self, channel_input: str, index: similarity_index.VideoIndex) -> Optional[Tuple[str, str, int]]:
+        """Index a channel's latest uploads; returns (channel id, title, new videos)"""
+        with tracing.span("content_gap.fetch", "youtube", channel=channel_input):
+            count = max(1, min(self.videos_per_channel, MAX_VIDEOS_PER_CHANNEL))
+            fetched = fetch_channel_videos(channel_input, count)
+            if not fetched:
+                return None
+            channel_id, channel_title, videos = fetched
+            # Known videos are refreshed too so that gaps are ranked by current views
+            added = index.add_videos({
+                'video_id': video['id'], 'channel_id': channel_id, 'channel_title': channel_title,
+                'title': video['title'], 'tags': video['tags'], 'description': video['description'],
+                'views': video['views'], 'published': video['published'],
+            } for video in videos)
+            return channel_id, channel_title, added
+
+    def _safe_fetch(self, channel_input: str, index: similarity_index.VideoIndex):
+        try:
+            return self._fetch_channel(channel_input, index)
+        except Exception as e:
+            if "quotaExceeded" in str(e):
+                raise
+            print(f"Error fetching videos for {channel_input}: {str(e)}")
+            return None
+
+    def _format_nearest(self, index: similarity_index.VideoIndex, own_id: Optional[str], header: List[str]) -> str:
+        """Indexed videos most similar to the query"""
+        start = time.perf_counter()
+        matches = index.nearest(index.vector(self.query), k=self.top_n)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        output = [
+            f"\n{BOLD}🔎 SIMILAR VIDEOS{ENDC}",
+            "=" * 70,
+            "",
+            f"{BLUE}Query:{ENDC} {self.query}",
+            *header,
+            f"{BLUE}Search Time:{ENDC} {elapsed_ms:.1f} ms",
+            "",
+        ]
+        if not matches or matches[0][1] <= 0:
+            output.append(f"{YELLOW}No similar videos found{ENDC}")
+            return "\n".join(output)
+        for i, (row, score) in enumerate(matches, 1):
+            meta = index.meta[row]
+            owner = f"{GREEN}(ours){ENDC}" if meta['channel_id'] == own_id else meta['channel_title']
+            output.extend([
+                f"{i}. {meta['title']}",
+                f"   📺 {owner} | 👀 {self._format_number(meta['views'])} | 🎯 Similarity: {score:.2f}",
+                f"   🔗 https://youtube.com/watch?v={meta['id']}",
+            ])
+        return "\n".join(output)
+
+    def _format_gaps(self, index: similarity_index.VideoIndex, own_id: str, competitor_ids: List[str], header: List[str]) -> str:
+        """Topics and videos of competitors with no close match among our videos"""
+        own_rows = np.flatnonzero(index.channel_mask([own_id]))
+        competitor_rows = np.flatnonzero(index.channel_mask(competitor_ids))
+        if not len(own_rows) or not len(competitor_rows):
+            return f"{YELLOW}⚠️ Not enough indexed videos to compare ({len(own_rows)} ours, {len(competitor_rows)} competitors){ENDC}"
+
+        start = time.perf_counter()
+        best, match = index.coverage(competitor_rows, own_rows)
+        gap_rows = competitor_rows[best < self.gap_threshold]
+        topics = index.gap_terms(gap_rows, own_rows, top_n=self.top_n)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        views = np.array([index.meta[row]['views'] for row in gap_rows], dtype=np.float64)
+        # Popular videos on topics furthest from ours first
+        gap_scores = np.log1p(views) * (1 - best[best < self.gap_threshold])
+        top_gaps = gap_rows[np.argsort(-gap_scores, kind='stable')[:self.top_n]]
+        overlaps = np.argsort(-best, kind='stable')[:min(5, self.top_n)]
+
+        output = [
+            f"\n{BOLD}🧭 CONTENT GAP ANALYSIS{ENDC}",
+            "=" * 70,
+            "",
+            *header,
+            f"{BLUE}Our Videos:{ENDC} {len(own_rows)} | {BLUE}Competitor Videos:{ENDC} {len(competitor_rows)} "
+            f"from {len(competitor_ids)} channel(s)",
+            f"{BLUE}Gaps:{ENDC} {len(gap_rows)} competitor videos with similarity below {self.gap_threshold:.2f} to all of ours",
+            f"{BLUE}Analysis Time:{ENDC} {elapsed_ms:.1f} ms",
+            "",
+            f"{BOLD}💡 TOPICS THEY COVER THAT WE DON'T{ENDC}",
+            f"{'─' * 30}",
+        ]
+        if topics:
+            for topic in topics:
+                output.append(
+                    f"• {GREEN}{topic['term']}{ENDC} — {topic['videos']} video(s), "
+                    f"{self._format_number(topic['views'])} views (e.g. \"{topic['example'][:60]}\")"
+                )
+        else:
+            output.append(f"{YELLOW}No uncovered topics found{ENDC}")
+
+        output.extend(["", f"{BOLD}🎬 TOP GAP VIDEOS{ENDC}", f"{'─' * 30}"])
+        for i, row in enumerate(top_gaps, 1):
+            meta = index.meta[row]
+            output.append(
+                f"{i}. {meta['title']}\n"
+                f"   📺 {meta['channel_title']} | 👀 {self._format_number(meta['views'])} | "
+                f"🔗 https://youtube.com/watch?v={meta['id']}"
+            )
+
+        output.extend(["", f"{BOLD}🤝 CLOSEST OVERLAPS{ENDC}", f"{'─' * 30}"])
+        for i in overlaps:
+            theirs, ours = index.meta[competitor_rows[i]], index.meta[match[i]]
+            output.append(
+                f"• {theirs['title'][:60]} ({theirs['channel_title']})\n"
+                f"  ↔ ours: {ours['title'][:60]} | 🎯 {best[i]:.2f}"
+            )
+
+        return "\n".join(output)
+
+    def _format_number(self, num: int) -> str:
+        """Format large numbers for readability"""
+        if num >= 1000000:
+            return f"{num/1000000:.1f}M"
+        elif num >= 1000:
+            return f"{num/1000:.1f}K"
+        return str(num)
+
+if __name__ == "__main__":
+    # Compare the default channel with a competitor
+    tool = ContentGapAnalysis(competitor_channels=["UCWN3xxRkmTPmbKwht9FuE5A"], videos_per_channel=25)
+    print(tool.run())
+
+    # Find indexed videos about a topic
+    tool = ContentGapAnalysis(query="fine-tuning open source LLMs", refresh=False)
+    print(tool.run())
@@ -0,0 +1,185 @@
+from agency_swarm.tools import BaseTool
+from pydantic import Field
+import os
+import time
+from utils.env import load_env
+from utils import keyword_stats, similarity_index, tracing
+from youtube_analyzer.tools.ContentGapAnalysis import fetch_channel_videos
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Literal
+import numpy as np
+
+# ANSI color codes
+BLUE = '\033[94m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+RED = '\033[91m'
+ENDC = '\033[0m'
+BOLD = '\033[1m'
+
+load_env()
+
+default_channel = os.getenv('DEFAULT_CHANNEL_ID')  # Get channel ID from .env
+
+# Channels whose uploads are fetched at the same time
+CHANNEL_FETCH_WORKERS = 4
+
+MAX_VIDEOS_PER_CHANNEL = 500
+
+METRIC_NAMES = {'views_per_day': 'Views per Day', 'engagement_rate': 'Engagement Rate'}
+
+class KeywordPerformance(BaseTool):
+    """
+    Finds which title and tag keywords go with more (or fewer) views per day and
+    higher engagement across the videos of one or more channels, keeping only
+    statistically significant keywords. Use it to choose topics and title wording.
+    """
+    channels: List[str] = Field(
+        default=[default_channel] if default_channel else [],
+        description="Channel URLs, IDs, or names whose videos are analyzed together (defaults to channel from .env)"
+    )
+    videos_per_channel: int = Field(
+        default=200,
+        description=f"Number of most recent videos to analyze per channel (at most {MAX_VIDEOS_PER_CHANNEL})"
+    )
+    metric: Literal["views_per_day", "engagement_rate", "both"] = Field(
+        default="both",
+        description="Outcome to relate keywords to: views_per_day, engagement_rate ((likes + comments) / views) or both"
+    )
+    min_videos: int = Field(
+        default=3,
+        description="Only test keywords used by at least this many videos"
+    )
+    significance: float = Field(
+        default=0.05,
+        description="False discovery rate for keeping a keyword as significant"
+    )
+    top_n: int = Field(
+        default=10,
+        description="Number of keywords to show per direction and metric"
+    )
+
+    def _fetch(self, channel_input: str):
+        with tracing.span("keyword_performance.fetch", "youtube", channel=channel_input):
+            count = max(1, min(self.videos_per_channel, MAX_VIDEOS_PER_CHANNEL))
+            return fetch_channel_videos(channel_input, count)
+
+    def _safe_fetch(self, channel_input: str):
+        """(result, None), or (None, reason) when the channel could not be fetched; the other channels go on"""
+        try:
+            return self._fetch(channel_input), None
+        except Exception as e:
+            if "quotaExceeded" in str(e):
+                raise
+            # HttpError's reason without the request URL (which holds the API key)
+            return None, getattr(e, 'reason', None) or str(e)
+
+    def run(self):
+        """
+        Fetches the channels' latest uploads, builds the keyword x video matrix
+        and ranks keywords by their correlation with each metric
+        """
+        try:
+            if not self.channels:
+                return f"{RED}❌ Error: No channels given; set channels or DEFAULT_CHANNEL_ID{ENDC}"
+
+            with ThreadPoolExecutor(max_workers=CHANNEL_FETCH_WORKERS, thread_name_prefix="keyword-performance") as executor:
+                fetched = list(executor.map(self._safe_fetch, self.channels))
+
+            videos: List[Dict] = []
+            channel_titles = []
+            skipped = []
+            relative: Dict[str, List[np.ndarray]] = {name: [] for name in keyword_stats.METRICS}
+            index = similarity_index.shared_index()
+            for channel_input, (result, error) in zip(self.channels, fetched):
+                if error or not result or not result[2]:
+                    skipped.append(f"{channel_input} ({error or ('channel not found' if not result else 'no videos')})")
+                    continue
+                channel_id, channel_title, channel_videos = result
+                channel_titles.append(channel_title)
+                videos.extend(channel_videos)
+                # Relative to the channel's median video, so big channels don't dominate the keywords they use
+                for name, values in keyword_stats.video_metrics(channel_videos).items():
+                    median = np.median(values)
+                    relative[name].append(values / median if median > 0 else values)
+                index.add_videos({
+                    'video_id': v['id'], 'channel_id': channel_id, 'channel_title': channel_title, 'title': v['title'],
+                    'tags': v['tags'], 'description': v['description'], 'views': v['views'], 'published': v['published'],
+                } for v in channel_videos)
+
+            if not videos:
+                return f"{YELLOW}⚠️ No videos found{ENDC}" + (f"\n{RED}Skipped:{ENDC} {'; '.join(skipped)}" if skipped else "")
+
+            start = time.perf_counter()
+            matrix = keyword_stats.KeywordMatrix(v['title'] + ' , ' + ' , '.join(v['tags']) for v in videos)
+            metrics = [self.metric] if self.metric != "both" else list(keyword_stats.METRICS)
+            results = {
+                name: keyword_stats.keyword_performance(
+                    matrix, np.concatenate(relative[name]), self.min_videos, self.significance
+                )
+                for name in metrics
+            }
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            return self._format_output(channel_titles, skipped, len(videos), matrix, results, elapsed_ms)
+
+        except Exception as e:
+            if "quotaExceeded" in str(e):
+                return f"{RED}❌ YouTube API quota exceeded. Please try again later.{ENDC}"
+            return f"{RED}❌ Error analyzing keyword performance: {str(e)}{ENDC}"
+
+    def _format_output(self, channel_titles: List[str], skipped: List[str], video_count: int, matrix: keyword_stats.KeywordMatrix,
+                       results: Dict[str, List[Dict]], elapsed_ms: float) -> str:
+        """Ranked keywords per metric, best first, then the ones to avoid"""
+        output = [
+            f"\n{BOLD}🔑 KEYWORD PERFORMANCE ANALYSIS{ENDC}",
+            "=" * 70,
+            "",
+            f"{BLUE}Channels:{ENDC} {', '.join(channel_titles)}"
+            + (f"\n{RED}Skipped:{ENDC} {'; '.join(skipped)}" if skipped else ""),
+            f"{BLUE}Videos Analyzed:{ENDC} {video_count}",
+            f"{BLUE}Keywords:{ENDC} {len(matrix)} distinct, {int((matrix.support >= self.min_videos).sum())} "
+            f"used by at least {self.min_videos} videos",
+            f"{BLUE}Analysis Time:{ENDC} {elapsed_ms:.1f} ms",
+            f"Lift compares videos with the keyword to the channel's videos without it "
+            f"(1.5x = 50% better); r is the correlation.",
+        ]
+
+        recommended = []
+        for name, rows in results.items():
+            significant = [row for row in rows if row['significant']]
+            output.extend(["", f"{BOLD}📈 {METRIC_NAMES[name].upper()}{ENDC}", f"{'─' * 30}"])
+            if not rows:
+                output.append(f"{YELLOW}Not enough videos per keyword to test (need {self.min_videos}+ with and without){ENDC}")
+                continue
+            if not significant:
+                output.append(f"{YELLOW}No keyword is significant at {self.significance:.0%} FDR; strongest candidates:{ENDC}")
+                significant = rows[:self.top_n // 2] + rows[-(self.top_n // 2):] if len(rows) > 1 else rows
+
+            better = [row for row in significant if row['r'] > 0][:self.top_n]
+            worse = [row for row in reversed(significant) if row['r'] < 0][:self.top_n]
+            for label, selected in ((f"{GREEN}Goes with higher", better), (f"{RED}Goes with lower", worse)):
+                output.append(f"{label} {METRIC_NAMES[name].lower()}:{ENDC}")
+                output.extend([self._format_row(row) for row in selected] or ["  (none)"])
+            recommended.extend(row['keyword'] for row in better if row['significant'])
+
+        if recommended:
+            output.extend([
+                "",
+                f"{BOLD}💡 RECOMMENDED KEYWORDS{ENDC}",
+                f"{'─' * 30}",
+                ", ".join(dict.fromkeys(recommended)),
+            ])
+        return "\n".join(output)
+
+    def _format_row(self, row: Dict) -> str:
+        marker = "" if row['significant'] else f" {YELLOW}(not significant){ENDC}"
+        return (
+            f"  • {row['keyword']} — {row['videos']} videos | lift {row['lift']:.2f}x | "
+            f"r {row['r']:+.2f} | p {row['p']:.3f}{marker}"
+        )
+
+if __name__ == "__main__":
+    # Test with the default channel from .env
+    tool = KeywordPerformance(videos_per_channel=100)
+    print(tool.run())
@@ -1,10 +1,7 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
-import os
-from dotenv import load_dotenv
-from googleapiclient.discovery import build
+from utils.clients import youtube
 from datetime import datetime
-from typing import Dict, Any
 
 # ANSI color codes
 BLUE = '\033[94m'
@@ -15,10 +12,6 @@ ENDC = '\033[0m'
 BOLD = '\033[1m'
 UNDERLINE = '\033[4m'
 
-load_dotenv()
-
-youtube = build('youtube', 'v3', developerKey=os.getenv('YOUTUBE_API_KEY'))
-
 class VideoPerformance(BaseTool):
     """
     Analyzes performance of specific videos using public metrics
@@ -1,5 +1,7 @@
 from agency_swarm import Agent
 
+from utils.context_budget import FetchStoredResult
+
 class YouTubeAnalyzer(Agent):
     def __init__(self):
         super().__init__(
@@ -7,6 +9,7 @@ class YouTubeAnalyzer(Agent):
             description="Analyzes any YouTube channel, videos, and trends based on user input",
             instructions="./instructions.md",
             tools_folder="./tools",
+            tools=[FetchStoredResult],  # Reads long tool results that were shortened in the thread
             temperature=0.7,
         )
     